@@ -1,9 +1,6 @@
 import dash
 import dash_bootstrap_components as dbc
-from components.layout import create_layout
-from callbacks import register_callbacks
-from utils.configs import app_config
-from flask import Flask, request
+from flask import Flask, request, send_file, abort
 import requests
 import os
 
@@ -13,50 +10,77 @@ def get_base_pathname():
         proxy_prefix += '/'
     return proxy_prefix
 
-server = Flask(__name__)
-app = dash.Dash(__name__, 
-                server=server,
-                external_stylesheets=[dbc.themes.FLATLY, dbc.icons.BOOTSTRAP], 
-                suppress_callback_exceptions=True,
-                url_base_pathname=get_base_pathname())
+def create_app():
+    """
+    Builds the Dash app, its callbacks and the Flask routes.
 
-app.layout = create_layout()
-register_callbacks(app)
+    Kept out of module scope so processes that re-import this module as their main module, such as
+    the spawned plot export workers, do not build the app and its callback graph. The app modules are
+    imported here for the same reason, since they load the GPU dataframe libraries.
+    """
+    from components.layout import create_layout
+    from callbacks import register_callbacks
+    from utils.artifact_store import artifact_store
 
-@server.route('/projects/nvidia-alm/applications/dash-app/api/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
-def proxy_to_fastapi(path):
-    path = path.rstrip('/')
-    fastapi_url = f"http://localhost:8000/{path}"
+    server = Flask(__name__)
+    app = dash.Dash(__name__, 
+                    server=server,
+                    external_stylesheets=[dbc.themes.FLATLY, dbc.icons.BOOTSTRAP], 
+                    suppress_callback_exceptions=True,
+                    url_base_pathname=get_base_pathname())
+
+    app.layout = create_layout()
+    register_callbacks(app)
+
+    @server.route('/projects/nvidia-alm/applications/dash-app/api/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
+    def proxy_to_fastapi(path):
+        path = path.rstrip('/')
+        fastapi_url = f"http://localhost:8000/{path}"
     
 
-    try:
-        resp = requests.request(
-            method=request.method,
-            url=fastapi_url,
-            headers={key: value for (key, value) in request.headers if key != 'Host'},
-            data=request.get_data(),
-            cookies=request.cookies,
-            allow_redirects=False)
+        try:
+            resp = requests.request(
+                method=request.method,
+                url=fastapi_url,
+                headers={key: value for (key, value) in request.headers if key != 'Host'},
+                data=request.get_data(),
+                cookies=request.cookies,
+                allow_redirects=False)
         
-        # Handle response
-        excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
-        headers = [(name, value) for (name, value) in resp.raw.headers.items()
-                   if name.lower() not in excluded_headers]
+            # Handle response
+            excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
+            headers = [(name, value) for (name, value) in resp.raw.headers.items()
+                       if name.lower() not in excluded_headers]
         
-        response = app.server.make_response(resp.content)
-        response.status_code = resp.status_code
+            response = app.server.make_response(resp.content)
+            response.status_code = resp.status_code
         
-        for name, value in headers:
-            response.headers[name] = value
+            for name, value in headers:
+                response.headers[name] = value
             
-        return response
-    except requests.exceptions.RequestException as e:
-        print(f"Error proxying request: {str(e)}")  # Debug logging
-        return app.server.make_response(
-            {'error': f'Failed to connect to FastAPI backend: {str(e)}'}, 
-            502
-        )
+            return response
+        except requests.exceptions.RequestException as e:
+            print(f"Error proxying request: {str(e)}")  # Debug logging
+            return app.server.make_response(
+                {'error': f'Failed to connect to FastAPI backend: {str(e)}'}, 
+                502
+            )
+
+    # Registered under the same prefix artifact_url builds its links from.
+    @server.route(f"{get_base_pathname()}artifacts/<artifact_id>", methods=['GET', 'HEAD'])
+    def serve_artifact(artifact_id):
+        path = artifact_store.path(artifact_id)
+        if path is None:
+            abort(404)
+        download_name = request.args.get('download')
+        # conditional=True lets werkzeug answer Range and If-None-Match requests with 206/304 responses.
+        return send_file(path, mimetype=artifact_store.content_type(artifact_id), conditional=True, etag=artifact_id,
+                         max_age=31536000, as_attachment=bool(download_name), download_name=download_name or artifact_id)
+
+    return app
 
 if __name__ == '__main__':
+    from utils.configs import app_config
+    app = create_app()
     print(f"Starting Dash app with base pathname: {get_base_pathname()}")  # Debug logging
     app.run(debug=app_config['DEBUG'], host='0.0.0.0', port=10000)
\ No newline at end of file
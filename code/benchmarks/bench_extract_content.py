@@ -0,0 +1,111 @@
+"""
+Benchmarks utils.utilities.extract_content (the line-based block parser) against the previous
+regex implementation, on realistic LLM output and on adversarial inputs that make the old table
+regex backtrack.
+
+Run from the code directory:
+
+    python -m benchmarks.bench_extract_content --sizes 100 400 1600 --repeat 3
+
+Keep sizes modest: the previous implementation grows super-linearly on the adversarial cases.
+"""
+import argparse
+import re
+import time
+from utils.utilities import extract_content
+
+
+def legacy_extract_content(content):
+    """
+    The extract_content implementation the line-based parser replaced, kept verbatim for comparison.
+    """
+    elements = []
+    
+    # Pattern for code blocks (including nested ones and those with shell markdown)
+    code_pattern = r'```(?:shell\s*\n)?markdown\n([\s\S]*?)```'
+    
+    # Pattern for tables (now including those without leading/trailing pipes)
+    table_pattern = r'(\|[^\n]+\|(?:\n\|[-:| ]+\|)?(?:\n[^\n]+\|)+|\n*[^\n\|]+\|[^\n]+(?:\n[-:| ]+\|[-:| ]+)+(?:\n[^\n\|]+\|[^\n]+)+)'
+    
+    # Split content by code blocks first
+    parts = re.split(code_pattern, content)
+    
+    for i, part in enumerate(parts):
+        if i % 2 == 0:  # Not a code block
+            # Extract tables
+            table_parts = re.split(table_pattern, part)
+            for j, table_part in enumerate(table_parts):
+                if j % 2 == 0:  # Not a table
+                    if table_part.strip():
+                        elements.append(('text', table_part.strip()))
+                else:  # Table
+                    elements.append(('table', table_part.strip()))
+        else:  # Code block (potential markdown table)
+            # Check if the code block contains a table
+            table_match = re.search(table_pattern, part)
+            if table_match:
+                elements.append(('table', table_match.group(0).strip()))
+            else:
+                elements.append(('code', part.strip()))
+    
+    return elements
+
+
+def realistic(size: int) -> str:
+    section = ("## Findings\n\nRevenue grew 12% in the north.\n\n"
+               "| Region | Revenue | Growth |\n|--------|---------|--------|\n| North | 1200 | 0.14 |\n| West | 980 | 0.11 |\n\n"
+               "Region | Orders\n---|---\nNorth | 310\nWest | 288\n\n"
+               "```markdown\n| a | b |\n|---|---|\n| 1 | 2 |\n```\n\nFurther notes follow.\n")
+    return section * max(size // 16, 1)
+
+
+def pipes_without_tables(size: int) -> str:
+    # Prose lines full of pipes but no separator rows: every line is a candidate table start.
+    return "\n".join("value a | value b | value c | value d | value e" for _ in range(size))
+
+
+def long_pipe_line(size: int) -> str:
+    # One very long line with many pipes and no newline to end a table row.
+    return "|" + " x |" * (size * 20)
+
+
+def separator_runs(size: int) -> str:
+    # Headers followed by long runs of separator rows and no body.
+    return "\n".join(["header a | header b"] + ["---|---"] * size + ["plain text"]) * 4
+
+
+CASES = {
+    "realistic": realistic,
+    "pipes without tables": pipes_without_tables,
+    "long pipe line": long_pipe_line,
+    "separator runs": separator_runs,
+}
+
+
+def best_time(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 400, 1600])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'case':<22} {'size':>6} {'chars':>9} {'previous s':>11} {'line-based s':>13} {'same output':>12}")
+    for name, make in CASES.items():
+        for size in args.sizes:
+            content = make(size)
+            legacy = best_time(lambda: legacy_extract_content(content), args.repeat)
+            current = best_time(lambda: extract_content(content), args.repeat)
+            same = legacy_extract_content(content) == extract_content(content)
+            print(f"{name:<22} {size:>6} {len(content):>9,} {legacy:>11.4f} {current:>13.4f} {str(same):>12}")
+
+
+if __name__ == "__main__":
+    main()
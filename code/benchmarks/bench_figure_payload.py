@@ -0,0 +1,81 @@
+"""
+Benchmarks the wire size and serialization time of figures before and after typed-array encoding
+(plots.figure_store).
+
+"Before" is the text JSON the app used to produce (every number written as decimal text, as in
+`json.loads(plot.to_json())` with list-backed traces). "After" is `encode_figure`, plus the
+reference-only payload a store carries once the figure lives in the figure store. Callback time is
+the server-side cost of one callback that round-trips the payload: serialize, then parse.
+
+Run from the code directory:
+
+    python -m benchmarks.bench_figure_payload --points 10000 100000 --repeat 5
+"""
+import argparse
+import gzip
+import json
+import time
+import numpy as np
+import plotly.graph_objects as go
+from plotly.utils import PlotlyJSONEncoder
+from plots.figure_store import encode_figure, figure_store
+
+
+def text_figure(figure: go.Figure) -> dict:
+    """
+    The figure with every array written out as JSON numbers, as the previous serialization sent it.
+    """
+    def as_text(node):
+        if isinstance(node, dict):
+            return {key: as_text(value) for key, value in node.items()}
+        if isinstance(node, np.ndarray):
+            return node.tolist()
+        if isinstance(node, (list, tuple)):
+            return [as_text(item) for item in node]
+        return node
+    return as_text(figure.to_plotly_json())
+
+
+def make_figures(points: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.random(points))
+    side = max(int(points ** 0.5), 2)
+    return {
+        "scatter": go.Figure(go.Scattergl(x=rng.normal(size=points), y=rng.normal(size=points), mode="markers",
+                                          marker=dict(size=rng.integers(2, 12, size=points)))),
+        "line": go.Figure(go.Scatter(x=x, y=np.sin(x / 50) * 100 + rng.normal(size=points), mode="lines")),
+        "heatmap": go.Figure(go.Heatmap(z=rng.poisson(5, size=(side, side)))),
+    }
+
+
+def callback_seconds(payload, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        json.loads(json.dumps(payload, cls=PlotlyJSONEncoder))
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'points':>8} {'figure':<8} {'payload':<12} {'bytes':>11} {'gzip bytes':>11} {'callback s':>11}")
+    for points in args.points:
+        for name, figure in make_figures(points).items():
+            payloads = {
+                "text json": text_figure(figure),
+                "typed array": encode_figure(figure),
+                "reference": {"figure_ref": figure_store.put(figure)},
+            }
+            for label, payload in payloads.items():
+                raw = json.dumps(payload, cls=PlotlyJSONEncoder, separators=(",", ":")).encode()
+                seconds = callback_seconds(payload, args.repeat)
+                print(f"{points:>8} {name:<8} {label:<12} {len(raw):>11,} {len(gzip.compress(raw)):>11,} {seconds:>11.4f}")
+
+
+if __name__ == "__main__":
+    main()
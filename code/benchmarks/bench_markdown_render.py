@@ -0,0 +1,199 @@
+"""
+Benchmarks per-section markdown conversion for the PDF report: the single-pass renderer
+(reports.pdf.markdown_renderer) against the previous path. The previous path ran extract_content and
+pandas over every table, then markdown, then eight BeautifulSoup passes.
+
+Run from the code directory:
+
+    python -m benchmarks.bench_markdown_render --sections 20 --repeat 5
+"""
+import argparse
+import time
+import markdown
+import pandas as pd
+from bs4 import BeautifulSoup
+from utils.utilities import extract_content
+from reports.pdf.markdown_renderer import render_markdown
+
+SECTION_MARKDOWN = """
+# Regional Performance
+
+## Overview
+
+Revenue grew **12%** quarter over quarter, driven by the *north* and *west* regions, while `returns`
+fell. The table below compares the regions.
+
+| Region | Revenue | Growth | Orders |
+|--------|---------|--------|--------|
+| North  | 1200.5  | 0.14   | 310    |
+| West   | 980.25  | 0.11   | 288    |
+| South  | 640     | 0.03   | 190    |
+| East   | 512.75  | 0.02   | 170    |
+
+### Drivers
+
+- Orders rose in every region
+- Average basket size was flat
+- Returns fell to 2.1%
+
+1. Expand the north campaign
+2. Review pricing in the south
+
+## Overview
+
+```
+df.groupby('region')['revenue'].sum()
+```
+"""
+
+
+def legacy_process_tables(md_content):
+    """
+    Processes markdown content to extract and convert tables into HTML format.
+
+    Args:
+        md_content (str): The markdown content containing tables to be processed.
+
+    Returns:
+        list: A list of HTML table strings.
+
+    The function performs the following steps:
+    1. Sets the pandas display option for maximum column width.
+    2. Extracts elements from the markdown content.
+    3. Iterates through the extracted elements to identify and process tables.
+    4. For string-based tables, it parses the table rows and headers.
+    5. For dictionary-based tables, it directly uses the columns and data.
+    6. Cleans the table data by removing markdown bold syntax.
+    7. Converts the table data into a pandas DataFrame.
+    8. Formats numeric values to two decimal places.
+    9. Converts the DataFrame to an HTML table with specific classes and without escaping HTML characters.
+    10. Appends the HTML table to the list of processed tables.
+
+    Note:
+        - The function assumes that the first row of a string-based table contains headers.
+        - Rows are split by newline characters, and cells are split by the '|' character.
+        - The function handles both string and dictionary representations of tables.
+    """
+    pd.set_option('display.max_colwidth', 0)
+    elements = extract_content(md_content)
+    processed_tables = []
+
+    for element_type, element in elements:
+        if element_type == 'table':
+            if isinstance(element, str):
+                rows = [row.strip() for row in element.split('\n') if row.strip()]
+                headers = [cell.strip() for cell in rows[0].split('|') if cell.strip()]
+                table_data = [headers]
+                for row in rows[2:]:
+                    cells = [cell.strip() for cell in row.split('|') if cell.strip()]
+                    if len(cells) == len(headers):
+                        table_data.append(cells)
+            elif isinstance(element, dict):
+                table_data = [element['columns']] + element['data']
+
+            table_data = [[cell.replace('**', '') for cell in row] for row in table_data]
+            df = pd.DataFrame(table_data[1:], columns=table_data[0])
+            df = df.map(lambda x: f"{float(x):.2f}" if x.replace('.', '', 1).isdigit() else x)
+            html_table = df.to_html(index=False, classes=['table', 'table-striped', 'table-bordered'], escape=False)
+            processed_tables.append(html_table)
+
+    return processed_tables
+
+def legacy_convert_markdown_to_html(md_content, section_title):
+    """
+    Converts Markdown content to HTML with additional processing for tables and specific HTML elements.
+    Args:
+        md_content (str): The Markdown content to be converted.
+        section_title (str): The title of the section being processed.
+    Returns:
+        str: The processed HTML content as a string.
+    The function performs the following steps:
+    1. Processes tables within the Markdown content.
+    2. Converts the Markdown content to HTML using the `markdown` library with specific extensions.
+    3. Uses BeautifulSoup to parse the HTML content and perform additional processing:
+        - Adds specific classes to headers (h2 to h6) to ensure unique headers.
+        - Removes all h1 headers.
+        - Adds 'list-unstyled' class to all unordered (ul) and ordered (ol) lists.
+        - Adds 'paragraph' class to all paragraph (p) tags.
+        - Adds 'code-block' class to all preformatted (pre) tags.
+        - Adds 'inline-code' class to all inline code (code) tags that are not within pre tags.
+        - Adds 'bold-text' class to all strong and b tags.
+        - Adds 'italic-text' class to all em and i tags.
+    4. Replaces table tags in the HTML content with processed tables.
+    Note:
+        The function assumes that the `process_tables` function and the `markdown` and `BeautifulSoup` libraries are available in the scope.
+    """
+    processed_tables = legacy_process_tables(md_content)
+    html_content = markdown.markdown(md_content, extensions=['tables', 'fenced_code', 'sane_lists', 'smarty', 'toc'])
+    
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    seen_headers = set()
+    for i in range(2, 7):  # h2 to h6, skip h1
+        for header in soup.find_all(f'h{i}'):
+            header_text = header.get_text(strip=True).lower()
+            if header_text not in seen_headers:
+                seen_headers.add(header_text)
+                header['class'] = header.get('class', []) + [f'header-{i}']
+            else:
+                header.decompose()  
+                
+    for header in soup.find_all('h1'):
+        header.decompose()
+        
+    for ul in soup.find_all('ul'):
+        ul['class'] = ul.get('class', []) + ['list-unstyled']
+    
+    for ol in soup.find_all('ol'):
+        ol['class'] = ol.get('class', []) + ['list-unstyled']
+    
+    for p in soup.find_all('p'):
+        p['class'] = p.get('class', []) + ['paragraph']
+    
+    for pre in soup.find_all('pre'):
+        pre['class'] = pre.get('class', []) + ['code-block']
+    
+    for code in soup.find_all('code'):
+        if code.parent.name != 'pre':
+            code['class'] = code.get('class', []) + ['inline-code']
+    
+    for strong in soup.find_all(['strong', 'b']):
+        strong['class'] = strong.get('class', []) + ['bold-text']
+    
+    for em in soup.find_all(['em', 'i']):
+        em['class'] = em.get('class', []) + ['italic-text']
+    
+    table_tags = soup.find_all('table')
+    for i, table_tag in enumerate(table_tags):
+        if i < len(processed_tables):
+            new_table = BeautifulSoup(processed_tables[i], 'html.parser')
+            table_tag.replace_with(new_table)
+    
+    return str(soup)
+
+
+def best_time(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sections = [SECTION_MARKDOWN.replace("Regional Performance", f"Section {i}") for i in range(args.sections)]
+    legacy = best_time(lambda: [legacy_convert_markdown_to_html(s, "Section") for s in sections], args.repeat)
+    single = best_time(lambda: [render_markdown(s) for s in sections], args.repeat)
+    print(f"{'implementation':<22} {'ms per section':>15}")
+    print(f"{'previous':<22} {1000 * legacy / args.sections:>15.3f}")
+    print(f"{'single-pass renderer':<22} {1000 * single / args.sections:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmarks PDF rendering with the shared PDF renderer (reports.pdf.pdf_engine) against the previous
+per-call setup, for reports of 5, 20 and 50 sections.
+
+The previous path re-read the stylesheet, rebuilt the Jinja template and the font configuration, and
+parsed the stylesheet twice (inline <style> and `stylesheets=`) on every call. Both paths render the
+same section HTML, so the difference is the setup cost. The renderer's one-off start-up time is
+reported separately.
+
+Run from the code directory:
+
+    python -m benchmarks.bench_pdf_render --sections 5 20 50 --repeat 3
+"""
+import argparse
+import io
+import time
+from jinja2 import Template
+from weasyprint import HTML, CSS
+from weasyprint.text.fonts import FontConfiguration
+from reports.pdf.new_pdf import convert_markdown_to_html, generate_toc
+from reports.pdf.pdf_engine import PDFRenderer, REPORT_TEMPLATE, STYLESHEET_PATH
+
+THEME = {"primary_color": "1a73e8", "accent_color": "fbbc04", "company_name": "Acme", "report_title": "Quarterly Review"}
+
+SECTION_MARKDOWN = """
+## Overview
+
+Revenue grew **12%** quarter over quarter, driven by the *north* and *west* regions.
+
+- Orders rose in every region
+- Average basket size was flat
+- Returns fell to 2.1%
+
+| Region | Revenue | Growth |
+|--------|---------|--------|
+| North  | 1200.50 | 0.14   |
+| West   | 980.25  | 0.11   |
+| South  | 640.00  | 0.03   |
+"""
+
+
+def make_sections(count: int) -> list:
+    return [{
+        "id": f"section-{i}",
+        "number": i,
+        "title": f"Section {i}",
+        "content": convert_markdown_to_html(SECTION_MARKDOWN, f"Section {i}"),
+        "plot": None,
+        "plot_description": "",
+    } for i in range(1, count + 1)]
+
+
+def legacy_render(sections: list) -> bytes:
+    """
+    The rendering steps create_pdf_report used to repeat on every call.
+    """
+    with open(STYLESHEET_PATH, 'r') as file:
+        css_template = file.read()
+    css = css_template
+    for key, value in THEME.items():
+        css = css.replace("{" + key + "}", value)
+    template = Template(REPORT_TEMPLATE.replace("</head>", "<style>{{ css }}</style></head>"))
+    html_content = template.render(report_title=THEME["report_title"], logo=None, generated_date="01-01-2025",
+                                   sections=sections, end_matter="", css=css, toc=generate_toc(sections))
+    font_config = FontConfiguration()
+    buffer = io.BytesIO()
+    HTML(string=html_content).write_pdf(buffer, stylesheets=[CSS(string=css)], font_config=font_config)
+    return buffer.getvalue()
+
+
+def engine_render(renderer: PDFRenderer, sections: list) -> bytes:
+    html_content = renderer.render_html(report_title=THEME["report_title"], logo=None, generated_date="01-01-2025",
+                                        sections=sections, end_matter="", toc=generate_toc(sections))
+    buffer = io.BytesIO()
+    renderer.write_pdf(html_content, THEME, buffer)
+    return buffer.getvalue()
+
+
+def best_time(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    renderer = PDFRenderer()
+    print(f"renderer start-up: {time.perf_counter() - start:.3f}s (once per process)")
+
+    print(f"{'sections':>8} {'implementation':<16} {'seconds':>9}")
+    for count in args.sections:
+        sections = make_sections(count)
+        legacy = best_time(lambda: legacy_render(sections), args.repeat)
+        engine = best_time(lambda: engine_render(renderer, sections), args.repeat)
+        print(f"{count:>8} {'previous':<16} {legacy:>9.3f}")
+        print(f"{count:>8} {'pdf renderer':<16} {engine:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmarks the size and render time of report plot images before and after the per-target image
+pipeline (plots.report_images).
+
+"Before" is one true-color 1800x1000 PNG per plot, base64-inlined into the PDF HTML and decoded
+again for every slide. "After" is an SVG (or palette PNG for dense and WebGL plots) for the PDF, and
+a palette PNG rendered at the slide placeholder's exact size for the PPTX. Render times are for a
+warm renderer pool with the exporter cache cleared between runs.
+
+Run from the code directory:
+
+    python -m benchmarks.bench_report_images --repeat 3
+"""
+import argparse
+import base64
+import json
+import time
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from plots.plot_export import ExportSettings, plot_exporter
+from plots.report_images import pdf_settings, slide_settings
+
+# The plot placeholder of the default template's plot layouts, in EMU (6.5in x 4.5in).
+SLIDE_PLACEHOLDER = (5943600, 4114800)
+LEGACY_SETTINGS = ExportSettings(format="png", width=900, height=500, dpi=192)
+
+
+def make_figures(seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    categories = [f"Region {index}" for index in range(12)]
+    x = np.arange(500)
+    return {
+        "bar": go.Figure(go.Bar(x=categories, y=rng.integers(100, 1000, size=len(categories)))),
+        "line": go.Figure([go.Scatter(x=x, y=np.cumsum(rng.normal(size=x.size)), mode="lines", name=f"series {index}")
+                           for index in range(4)]),
+        "density": go.Figure(go.Heatmap(z=rng.poisson(5, size=(100, 100)))),
+        "scattergl": go.Figure(go.Scattergl(x=rng.normal(size=50000), y=rng.normal(size=50000), mode="markers")),
+    }
+
+
+def timed_export(figure_json: str, settings: ExportSettings, repeat: int):
+    timings, image = [], None
+    for _ in range(repeat):
+        plot_exporter._cache.clear()
+        plot_exporter._cache_bytes = 0
+        start = time.perf_counter()
+        image = plot_exporter.export([figure_json], settings)[0]
+        timings.append(time.perf_counter() - start)
+    return image, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    plot_exporter.export([go.Figure()], LEGACY_SETTINGS)
+    print(f"{'figure':<10} {'target':<5} {'pipeline':<9} {'format':<6} {'bytes':>10} {'render s':>9} {'decode s':>9}")
+    totals = {"before": 0, "after": 0}
+    for name, figure in make_figures().items():
+        figure_json = pio.to_json(figure, validate=False)
+        legacy, legacy_seconds = timed_export(figure_json, LEGACY_SETTINGS, args.repeat)
+        inlined = base64.b64encode(legacy)
+        start = time.perf_counter()
+        base64.b64decode(inlined)
+        decode_seconds = time.perf_counter() - start
+
+        targets = {"pdf": pdf_settings(json.loads(figure_json)), "pptx": slide_settings(*SLIDE_PLACEHOLDER)}
+        for target, settings in targets.items():
+            # The legacy PNG went into the PDF as base64 text and was decoded again for each slide.
+            before = len(inlined) if target == "pdf" else len(legacy)
+            image, seconds = timed_export(figure_json, settings, args.repeat)
+            totals["before"] += before
+            totals["after"] += len(image)
+            print(f"{name:<10} {target:<5} {'before':<9} {'png':<6} {before:>10,} {legacy_seconds:>9.4f} "
+                  f"{decode_seconds if target == 'pptx' else 0:>9.4f}")
+            print(f"{name:<10} {target:<5} {'after':<9} {settings.format:<6} {len(image):>10,} {seconds:>9.4f} {0:>9.4f}")
+    print(f"\nTotal image bytes: {totals['before']:,} before, {totals['after']:,} after "
+          f"({1 - totals['after'] / max(totals['before'], 1):.0%} smaller)")
+    plot_exporter.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 from dash import html, dcc, Input, Output, State, no_update
 from utils.configs import get_llm
-from utils.utilities import get_dataframe, get_data_from_api
-from utils.constants import DATETIME_FORMATS, NUMERIC_DTYPES, CATEGORICAL_DTYPES
 from prompts.chat_prompt_template import context
+from chat.context import build_chat_prompt
+from chat.memory import ConversationMemory
 import json
-from chat.parse_code import process_response
+from chat.parse_code import render_response
+from plots.figure_store import figure_store
 from components.chat_tab import textbox
 from dash import html, dcc, Input, Output
 import dash_bootstrap_components as dbc
@@ -40,26 +41,15 @@ def register_chat_callbacks(app):
                 return no_update, no_update, no_update
 
          
-            df = get_dataframe()
-            schema = get_data_from_api("schema")
-            sample_data = get_data_from_api("sample")
-            columns = schema.get('columns', [])
-            column_names = ', '.join(columns)
-            
-          
-            categorical_columns = [col for col in columns if schema['dtypes'][col] in CATEGORICAL_DTYPES]
-            numeric_columns = [col for col in columns if schema['dtypes'][col] in NUMERIC_DTYPES]
-            datetime_columns = [col for col in columns if schema['dtypes'][col] in DATETIME_FORMATS]
-                
-            
-           
             chat_history = json.loads(chat_history) if chat_history else []
+            llm = get_llm("chat")
+            memory = ConversationMemory(provider=llm.config.provider)
+            conversation = memory.render(chat_history)
             chat_history.append({"role": "user", "content": user_input})
 
-            prompt = context.replace("{{user_input}}", user_input).replace("{{column_names}}", column_names).replace("{{categorical_columns}}", ', '.join(categorical_columns)).replace("{{numeric_columns}}", ', '.join(numeric_columns)).replace("{{datetime_columns}}", ', '.join(datetime_columns))
+            prompt = build_chat_prompt(context, user_input)
              
-            model_input = prompt + json.dumps(chat_history)
-            llm = get_llm()
+            model_input = prompt + "\n" + conversation
             response = llm.get_response(model_input)
         
             chat_history.append({
@@ -100,7 +90,7 @@ def register_chat_callbacks(app):
             if message["role"] == "user":
                 messages.append(textbox(message["content"], box="user"))
             elif message["role"] == "assistant":
-                response = process_response(message["content"])
+                response = render_response(message["content"])
                 
                 content = []
                 for result in response["results"]:
@@ -118,7 +108,7 @@ def register_chat_callbacks(app):
                             content.append(html.Div([
                                 dbc.Card([
                                     dcc.Graph(
-                                        figure=result["content"],
+                                        figure=figure_store.get(result["ref"]),
                                         config={'displayModeBar': False},
                                     ),
                                 ], className="chat-plot-card"),
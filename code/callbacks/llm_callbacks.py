@@ -1,10 +1,11 @@
-from dash import Input, Output, State, html, callback_context
+from dash import Input, Output, State, html, callback_context, ALL
 from dash.exceptions import PreventUpdate
 from utils.llm_factory import get_llm
 from utils.llm_singleton import llm_holder
 import dash
 import dash_bootstrap_components as dbc
-from utils.constants import LLM_PROVIDERS
+from utils.constants import LLM_PROVIDERS, LLM_TASKS
+from components.llm_config_modal import DEFAULT_ROUTE
 
 def register_llm_callbacks(app):
     @app.callback(
@@ -21,10 +22,11 @@ def register_llm_callbacks(app):
         State("llm-api-key", "value"),
         State("llm-temperature", "value"),
         State("llm-max-tokens", "value"),
+        State("llm-primary", "value"),
         prevent_initial_call=True
     )
     def update_llm_config(active_tab, llm_submit_clicks, modal_is_open,                        
-                          provider, model, api_key, temperature, max_tokens):
+                          provider, model, api_key, temperature, max_tokens, primary):
         """
         Update the configuration of the LLM (Language Learning Model) based on user inputs.
         Parameters:
@@ -36,6 +38,7 @@ def register_llm_callbacks(app):
         api_key (str): The API key for accessing the LLM.
         temperature (float): The temperature setting for the LLM.
         max_tokens (int): The maximum number of tokens for the LLM.
+        primary (bool): Whether the LLM becomes the default model, rather than one that tasks can be routed to.
         Returns:
         tuple: A tuple containing:
             - (bool): Whether to show an error alert.
@@ -56,11 +59,11 @@ def register_llm_callbacks(app):
                               temperature=float(temperature) if temperature else None, 
                               max_tokens=int(max_tokens) if max_tokens else None)
                 
-                llm_holder.llm = llm
+                llm_holder.add(llm, primary=primary is not False)
                 
-                provider_name = next(key for key, value in LLM_PROVIDERS.items() if value == provider)
+                provider_name = next(key for key, value in LLM_PROVIDERS.items() if value == llm_holder.llm.config.provider)
                 
-                llm_setup_output = f"Provider: {provider_name}, Model: {model}"
+                llm_setup_output = f"Provider: {provider_name}, Model: {llm_holder.llm.config.model}"
                 alert = dbc.Alert("LLM Connection Established", color="#76b900", dismissable=True)
                 return False, None, llm_setup_output, False, alert
             except ValueError as e:
@@ -75,6 +78,51 @@ def register_llm_callbacks(app):
             return dash.no_update, dash.no_update, "No LLM connected", False, False
             
 
+    @app.callback(
+        Output({"type": "llm-route", "task": ALL}, "options"),
+        Input("llm-setup-output", "children"),
+        State({"type": "llm-route", "task": ALL}, "id"),
+    )
+    def update_route_options(llm_setup_output, route_ids):
+        """
+        Offers every configured model for each task once a model is added.
+
+        Args:
+            llm_setup_output (str): The LLM setup message, which changes whenever a model is configured.
+            route_ids (list): The ids of the task route selects.
+
+        Returns:
+            list: The select options for each task.
+        """
+        options = [{"label": "Default model", "value": DEFAULT_ROUTE}] + [
+            {"label": f"{llm.config.model} ({llm.config.provider})", "value": f"{llm.config.provider}|{llm.config.model}"}
+            for llm in llm_holder.configured_llms
+        ]
+        return [options for _ in route_ids]
+
+    @app.callback(
+        Output("llm-routing-output", "children"),
+        Input({"type": "llm-route", "task": ALL}, "value"),
+        State({"type": "llm-route", "task": ALL}, "id"),
+        prevent_initial_call=True
+    )
+    def update_llm_routes(route_values, route_ids):
+        """
+        Routes each task to the selected model.
+
+        Args:
+            route_values (list): The selected 'provider|model' value, or the default, for each task.
+            route_ids (list): The ids of the task route selects.
+
+        Returns:
+            str: A summary of the tasks that run on a model other than the default one.
+        """
+        for route_id, value in zip(route_ids, route_values):
+            route = tuple(value.split("|", 1)) if value and value != DEFAULT_ROUTE else None
+            llm_holder.router.set_route(route_id["task"], route)
+        routed = [f"{LLM_TASKS[task]}: {model}" for task, (_, model) in llm_holder.router.routes.items()]
+        return "; ".join(routed) if routed else "All tasks use the default model."
+
     @app.callback(
     Output("card-alert-placeholder", "children", allow_duplicate=True),
     Input("alert-placeholder", "children"),
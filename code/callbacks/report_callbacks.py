@@ -2,9 +2,9 @@ from dash.exceptions import PreventUpdate
 import dash
 import io
 import plotly.graph_objects as go
-import plotly.express as px
 from reports.pdf.new_pdf import create_pdf_report
-from reports.pptx.presentation_report import create_presentation
+from reports.pdf.pdf_engine import get_pdf_renderer
+from reports.pptx.presentation_report import create_presentation, prepare_slides, load_template, plot_placeholder_sizes
 from dash import dcc, html, Input, Output, State, callback_context, ALL
 import traceback
 import base64
@@ -13,12 +13,17 @@ from dash import html, no_update
 
 import asyncio
 from utils.utilities import run_async_in_sync
-from plotly.io import to_image
-from reports.backend.create_sections import write_section_async, get_outline, write_recommendations_conclusions_async, summarize_section_async
-from plots.plot_factory import parse_llm_response
-from components.pdf_gen_options_modal import create_section_modal_body
+from plots.report_images import store_figure, export_pdf_images, prefetch_slide_images
+from utils.artifact_store import artifact_store
+from reports.backend.section_cache import section_key, get_section_plot, set_part
+from reports.backend.speculation import section_speculator
+from reports.backend.outline_stream import start_outline, get_outline_progress, stop_outline
+from reports.backend.create_sections import write_recommendations_conclusions_async, summarize_section_async
+from plots.plot_factory import parse_llm_response, recommend_section_plots
+from components.pdf_gen_options_modal import create_section_modal_body, create_section_checklist
 from components.pdf_display import create_pdf_display  
 import logging
+import threading
 
 logging.basicConfig(
     filename='/project/code/app.log',
@@ -29,6 +34,8 @@ logging.basicConfig(
 logger = logging.getLogger('report_callback')
 
 def register_report_callbacks(app):
+    # Compile the PDF template and parse the base stylesheet and fonts before the first report needs them.
+    threading.Thread(target=get_pdf_renderer, name='pdf-renderer-warmup', daemon=True).start()
         
     @app.callback(
     Output("error-toast", "is_open"),
@@ -83,12 +90,15 @@ def register_report_callbacks(app):
                 error_message = "Please enter a query to generate a report."
                 return error, error_message, no_update, no_update, no_update, no_update
             
-            report_title, section_names, num_sections = run_async_in_sync(get_outline(prompt))
+            # The outline streams in the background and the modal fills in as sections arrive (see poll_outline).
+            # With speculation on, each proposed section starts being written as soon as its name is generated.
             outline_data = {
-                "report_title": report_title,
-                "sections": [{"name": name, "selected": True} for name in section_names]
+                "report_title": "",
+                "sections": [],
+                "stream_id": start_outline(prompt),
+                "streaming": True
             }
-            modal_body = create_section_modal_body(outline_data)
+            modal_body = create_section_modal_body(outline_data, streaming=True)
             return no_update, no_update, True, modal_body, outline_data, False
         
         elif button_id == "submit-sections" and submit_clicks:
@@ -97,6 +107,9 @@ def register_report_callbacks(app):
             
             outline_data = outline_data.copy()
             outline_data["sections"] = outline_data.get("sections", [])
+            # Sections still streaming in were never shown, so the report uses the ones the user saw.
+            stop_outline(outline_data.get("stream_id"))
+            outline_data["streaming"] = False
             
             if section_inputs and len(section_inputs) > 0:
                 outline_data["report_title"] = section_inputs[0]
@@ -107,14 +120,77 @@ def register_report_callbacks(app):
                 new_section = section_inputs[-1] if len(section_inputs) > 1 else None
                 if new_section:
                     outline_data["sections"].append({"name": new_section, "selected": True})
-            
+
+            section_speculator.keep_only(prompt, [section["name"] for section in outline_data["sections"] if section.get("selected", False)])
             return no_update, no_update,False, None, outline_data, True
         
         elif button_id == "cancel-sections":
+            if outline_data is not None:
+                stop_outline(outline_data.get("stream_id"))
+            if prompt is not None:
+                section_speculator.cancel(prompt)
             return no_update, no_update,False, None, None, False
         
         return no_update, no_update,no_update, no_update, no_update, no_update
 
+    @app.callback(
+        Output("section-checklist", "children"),
+        Output({"type": "section-input", "index": 0}, "value"),
+        Output("outline-data", "data", allow_duplicate=True),
+        Input("outline-poll", "n_intervals"),
+        State("outline-data", "data"),
+        State({"type": "section-checkbox", "index": ALL}, "value"),
+        State({"type": "section-input", "index": 0}, "value"),
+        prevent_initial_call=True
+    )
+    def poll_outline(n_intervals, outline_data, section_checkboxes, report_title):
+        """
+        Adds the outline's title and sections to the section modal as they are generated.
+
+        Only the section checklist is re-rendered, keeping the ticks the user has changed so far, and the
+        title is filled in only if the user has not typed one. The styling inputs are left untouched.
+
+        Args:
+            n_intervals (int): Number of times the poll interval has fired.
+            outline_data (dict): The outline shown so far, with the id of the outline stream.
+            section_checkboxes (list): The current values of the section checkboxes.
+            report_title (str): The current value of the report title input.
+
+        Returns:
+            tuple: The updated checklist, title and outline data, or no_update for each if nothing new has arrived.
+        """
+        if not outline_data or not outline_data.get("streaming"):
+            raise PreventUpdate
+        progress = get_outline_progress(outline_data.get("stream_id"))
+        if progress is None:
+            raise PreventUpdate
+        shown = [section["name"] for section in outline_data["sections"]]
+        if progress["sections"] == shown and progress["report_title"] == outline_data["report_title"] and not progress["done"]:
+            return no_update, no_update, no_update
+
+        selected = {section["name"]: section["selected"] for section in outline_data["sections"]}
+        for name, checked in zip(shown, section_checkboxes):
+            if checked is not None:
+                selected[name] = checked
+        title_update = progress["report_title"] if not report_title and progress["report_title"] else no_update
+        outline_data = {
+            **outline_data,
+            "report_title": progress["report_title"],
+            "sections": [{"name": name, "selected": selected.get(name, True)} for name in progress["sections"]],
+            "streaming": not progress["done"]
+        }
+        return create_section_checklist(outline_data["sections"], outline_data["streaming"]), title_update, outline_data
+
+    @app.callback(
+        Output("outline-poll", "disabled"),
+        Input("outline-data", "data")
+    )
+    def toggle_outline_poll(outline_data):
+        """
+        Polls for outline progress only while an outline is streaming.
+        """
+        return not (outline_data and outline_data.get("streaming"))
+
     @app.callback(
         Output("analysis-output", "children"),
         Output('report-data', 'data'),
@@ -142,42 +218,66 @@ def register_report_callbacks(app):
 
             async def generate_sections():
                 logger.info("Starting section generation...")
-                section_tasks = [write_section_async(section_name, prompt) for section_name in selected_sections]
-                section_results = await asyncio.gather(*section_tasks)
-                
-                processed_results = []
+                # Plots of sections that were in an earlier report for the same data, query and model are reused.
+                plot_keys = {name: section_key("plot", prompt, name, 10000, task="plot_config") for name in selected_sections}
+                cached_plots = {name: get_section_plot(plot_keys[name]) for name in selected_sections}
+                new_plot_sections = [name for name in selected_sections if cached_plots[name] is None]
+                logger.info(f"Reusing plots for {len(selected_sections) - len(new_plot_sections)} of {len(selected_sections)} sections")
+
+                async def recommend_new_plots():
+                    return await recommend_section_plots(new_plot_sections, max_samples=10000) if new_plot_sections else {}
+
+                section_tasks = [section_speculator.write_section(section_name, prompt) for section_name in selected_sections]
+                section_results, plot_recommendations = await asyncio.gather(
+                    asyncio.gather(*section_tasks),
+                    recommend_new_plots()
+                )
+
+                parsed_sections = []
                 for section_name, section_content in section_results:
+                    if cached_plots[section_name] is not None:
+                        parsed_sections.append((section_name, section_content, None, cached_plots[section_name]))
+                        continue
                     try:
                         logger.info(f"Processing section: {section_name}")
-                        plot, plot_data, plot_config = await parse_llm_response(section_name, max_samples=10000)
-                        
-                        if plot:
-                            try:
-                                if isinstance(plot, (go.Figure, px)):
-                                    img_bytes = to_image(plot, format="png", engine="kaleido", width=900, height=500, scale=2)
-                                    plot_image = base64.b64encode(img_bytes).decode('utf-8')
-                                else:
-                                    plot_image = None
-                            except Exception as img_error:
-                                logger.error(f"Error converting plot to image: {str(img_error)}")
-                                plot_image = None
-                        else:
-                            plot_image = None
-                                
-                        processed_results.append((section_name, (section_content, plot_image, plot_config)))
+                        plot, figure_ref, plot_config = await parse_llm_response(section_name, max_samples=10000,
+                                                                                recommendation=plot_recommendations.get(section_name))
+                        if not isinstance(plot, go.Figure):
+                            plot, figure_ref = None, None
+                        section_plot = {'plot_image': None, 'plot_config': plot_config, 'figure_ref': figure_ref,
+                                        'figure_source': store_figure(plot)}
+                        parsed_sections.append((section_name, section_content, plot, section_plot))
                     except Exception as e:
                         logger.error(f"Error processing section {section_name}: {str(e)}")
                         logger.error(traceback.format_exc())
-                        processed_results.append((section_name, (section_content, None, None)))
-                
+                        parsed_sections.append((section_name, section_content, None, None))
+
+                logger.info("Exporting section plots...")
+                # Each figure is serialized once; the PDF images now and the slide images later render from that copy.
+                new_plots = [(section_name, section_plot) for section_name, _, plot, section_plot in parsed_sections if plot is not None]
+                images = await export_pdf_images([section_plot['figure_source'] for _, section_plot in new_plots])
+                for (section_name, section_plot), plot_image in zip(new_plots, images):
+                    section_plot['plot_image'] = plot_image
+                    # Sections without a plot are not cached, as a failed plot looks the same as no plot.
+                    if plot_image:
+                        set_part(plot_keys[section_name], section_plot)
+
+                section_plots = [section_plot or {} for _, _, _, section_plot in parsed_sections]
+                processed_results = [
+                    (section_name, (section_content, section_plot.get('plot_image'), section_plot.get('plot_config')))
+                    for (section_name, section_content, _, _), section_plot in zip(parsed_sections, section_plots)
+                ]
+                figure_refs = [section_plot.get('figure_ref') for section_plot in section_plots]
+                figure_sources = [section_plot.get('figure_source') for section_plot in section_plots]
+
                 logger.info("Summarizing sections...")
                 summarized_sections = [(name, await summarize_section_async(content)) for name, (content, _, _) in processed_results]
                 end_matter = await write_recommendations_conclusions_async(summarized_sections)
                 
-                return processed_results, end_matter
+                return processed_results, end_matter, figure_refs, figure_sources
 
             logger.info("Running section generation...")
-            section_results, end_matter = run_async_in_sync(generate_sections())
+            section_results, end_matter, figure_refs, figure_sources = run_async_in_sync(generate_sections())
 
             logger.info("Creating report data structure...")
             report_data = {
@@ -187,7 +287,11 @@ def register_report_callbacks(app):
                     (name, (content, plot_image, plot_config))
                     for name, (content, plot_image, plot_config) in section_results
                 ],
-                'end_matter': end_matter
+                'end_matter': end_matter,
+                # Interactive figures stay on the server; the store only carries their references.
+                'figure_refs': figure_refs,
+                # Figure JSON artifacts that slide images are rendered from at each placeholder's size.
+                'figure_sources': figure_sources
             }
             
             # Process report styling
@@ -241,11 +345,11 @@ def register_report_callbacks(app):
                 raise
 
             logger.info("Creating PDF display component...")
-            pdf_frame = create_pdf_display(pdf_buffer)
-            pdf_base64 = base64.b64encode(pdf_buffer.getvalue()).decode('utf-8')
+            pdf_artifact = artifact_store.put(pdf_buffer.getvalue(), 'pdf')
+            pdf_frame = create_pdf_display(pdf_artifact)
 
             logger.info("Report generation completed successfully")
-            return pdf_frame, report_data, pdf_base64, True
+            return pdf_frame, report_data, pdf_artifact, True
 
         except Exception as e:
             logger.error(f"Error in report generation: {str(e)}")
@@ -377,15 +481,20 @@ def register_report_callbacks(app):
             section_results = report_data['section_results']
             section_title = report_data['section_title']
 
+            figure_sources = report_data.get('figure_sources') or [None] * len(section_results)
+            prefetch_slide_images(figure_sources, plot_placeholder_sizes(load_template(selected_template)))
+            section_slides = run_async_in_sync(prepare_slides([content for _, (content, _, _) in section_results]))
+
             prs = None
-            for name, (content, plot_image, plot_config) in section_results:
+            for (name, (content, plot_image, plot_config)), slides, plot_source in zip(section_results, section_slides, figure_sources):
                 section_content = {
                     "report_title": report_title,
                     "section_title": section_title,
                     "content": content,
-                    "plot_image": plot_image
+                    "plot_image": plot_image,
+                    "plot_source": plot_source
                 }
-                prs = create_presentation(section_content, prs, selected_template)
+                prs = create_presentation(section_content, prs, selected_template, slides=slides)
             
             buffer = io.BytesIO()
             prs.save(buffer)
@@ -1,10 +1,14 @@
 from dash.dependencies import Input, Output, State
 from dash.exceptions import PreventUpdate
 import base64
+import hashlib
 import traceback
 from data_staging.load_data import ingest_data
 from utils.cache_config import cache, cache_key
 from utils.data_router import get_schema, get_summary
+from utils.constants import DATASET_VERSION_KEY
+from utils.column_index import build_column_index
+from utils.timeseries_pyramid import build_timeseries_pyramids
 
 def register_upload_callbacks(app):
     @app.callback(
@@ -59,6 +63,8 @@ def register_upload_callbacks(app):
                     
                     print("Setting data in cache...")  # Debug logging
                     cache.set('current_df', df)
+                    dataset_version = hashlib.md5(decoded).hexdigest()
+                    cache.set(DATASET_VERSION_KEY, dataset_version)
                     
                     # Update cache with new schema and summary
                     print("Fetching and caching schema...")  # Debug logging
@@ -68,6 +74,12 @@ def register_upload_callbacks(app):
                     
                     cache.set(cache_key("get_schema"), new_schema)
                     cache.set(cache_key("get_summary"), new_summary)
+
+                    print("Building column index...")  # Debug logging
+                    build_column_index(new_schema, new_summary)
+
+                    print("Building time-series pyramids...")  # Debug logging
+                    build_timeseries_pyramids(df, dataset_version)
                     
                     print("Data processing completed successfully")  # Debug logging
                     return stored_data, f"Data uploaded successfully: {filename}", True
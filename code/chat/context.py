@@ -0,0 +1,80 @@
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from utils.data_cache import cached_get_schema
+from utils.data_router import get_sample
+from utils.utilities import get_dataset_version
+from utils.column_index import relevant_columns
+from utils.prompt_context import render_sample_rows
+from utils.constants import DATETIME_FORMATS, NUMERIC_DTYPES, CATEGORICAL_DTYPES, CHAT_SAMPLE_ROWS
+
+
+class ChatContext(NamedTuple):
+    """
+    The dataset-derived parts of the chat prompt, computed once per dataset version.
+
+    Attributes:
+        columns (Tuple[str, ...]): All column names in dataset order.
+        buckets (Dict[str, str]): Column name to 'categorical', 'numeric' or 'datetime' (absent if none applies).
+        sample (List[Dict[str, Any]]): Sample rows used for the prompt's sample table.
+    """
+    columns: Tuple[str, ...]
+    buckets: Dict[str, str]
+    sample: List[Dict[str, Any]]
+
+
+def _bucket(dtype: str) -> Optional[str]:
+    if dtype in CATEGORICAL_DTYPES:
+        return "categorical"
+    if dtype in NUMERIC_DTYPES:
+        return "numeric"
+    if dtype in DATETIME_FORMATS:
+        return "datetime"
+    return None
+
+
+@lru_cache(maxsize=1)
+def _load_chat_context(dataset_version: str) -> ChatContext:
+    schema = cached_get_schema()
+    dtypes = schema.get('dtypes', {})
+    columns = tuple(schema.get('columns', []))
+    buckets = {col: _bucket(dtypes.get(col)) for col in columns}
+    return ChatContext(columns, {col: b for col, b in buckets.items() if b}, get_sample(CHAT_SAMPLE_ROWS))
+
+
+@lru_cache(maxsize=256)
+def _render_columns(dataset_version: str, columns: Tuple[str, ...]) -> Dict[str, str]:
+    chat_context = _load_chat_context(dataset_version)
+    omitted = len(chat_context.columns) - len(columns)
+    by_bucket = {bucket: [col for col in columns if chat_context.buckets.get(col) == bucket]
+                 for bucket in ("categorical", "numeric", "datetime")}
+    return {
+        "{{column_names}}": ', '.join(columns),
+        "{{categorical_columns}}": ', '.join(by_bucket["categorical"]),
+        "{{numeric_columns}}": ', '.join(by_bucket["numeric"]),
+        "{{datetime_columns}}": ', '.join(by_bucket["datetime"]),
+        "{{column_note}}": f"The dataframe also has {omitted} other columns; only use them if the user names them." if omitted > 0 else "",
+        "{{sample_data}}": render_sample_rows(chat_context.sample, list(columns), max_rows=CHAT_SAMPLE_ROWS),
+    }
+
+
+def build_chat_prompt(template: str, user_input: str) -> str:
+    """
+    Fills the chat prompt template for a user message.
+
+    The schema, sample rows and dtype buckets are loaded once per dataset version, and the rendered
+    column lists and sample table are cached per set of relevant columns, so a chat turn does no
+    data access of its own.
+
+    Args:
+        template (str): The chat prompt template.
+        user_input (str): The user's message.
+
+    Returns:
+        str: The filled-in prompt.
+    """
+    version = get_dataset_version()
+    columns = relevant_columns(user_input) or _load_chat_context(version).columns
+    prompt = template
+    for placeholder, value in _render_columns(version, tuple(columns)).items():
+        prompt = prompt.replace(placeholder, value)
+    return prompt.replace("{{user_input}}", user_input)
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from utils.cache_config import cache
+from utils.configs import get_llm
+from utils.token_counter import count_tokens
+from prompts.chat_prompt_template import summary_prompt
+from utils.constants import (CHAT_MEMORY_RECENT_TURNS, CHAT_MEMORY_TOKEN_BUDGET, CHAT_SUMMARY_MAX_TOKENS,
+                             CHAT_MEMORY_EXCERPT_CHARS)
+
+logger = logging.getLogger('chat_memory')
+
+_BLOCK = re.compile(r'<(CODE|FIGURE)>(.*?)</\1>', re.DOTALL | re.IGNORECASE)
+SUMMARY_KEY_PREFIX = 'chat_summary_'
+
+_summarizer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chat-summary')
+_pending_lock = threading.Lock()
+_pending = set()
+_summaries: Dict[str, str] = {}
+
+
+def compact_message(message: Dict[str, str]) -> Dict[str, str]:
+    """
+    Replaces code and figure blocks in an assistant message with short references.
+
+    A reference keeps a stable id (a hash of the block), the first line of the code and its length,
+    which is enough for the model to refer back to earlier analysis without re-reading it.
+
+    Args:
+        message (Dict[str, str]): A chat message with "role" and "content" keys.
+
+    Returns:
+        Dict[str, str]: The compacted message.
+    """
+    if message.get("role") != "assistant":
+        return {"role": message.get("role"), "content": message.get("content", "")}
+
+    def reference(match):
+        kind, body = match.group(1).lower(), match.group(2).strip()
+        lines = body.splitlines() or [""]
+        ref = hashlib.md5(body.encode("utf-8")).hexdigest()[:8]
+        return f"[{kind} {ref}: {lines[0][:80]}{' …' if len(lines) > 1 else ''} ({len(lines)} line{'s' if len(lines) != 1 else ''})]"
+
+    return {"role": "assistant", "content": _BLOCK.sub(reference, message.get("content", "")).strip()}
+
+
+def _excerpt(message: Dict[str, str]) -> str:
+    content = " ".join(message["content"].split())
+    if len(content) > CHAT_MEMORY_EXCERPT_CHARS:
+        content = content[:CHAT_MEMORY_EXCERPT_CHARS - 1] + "…"
+    return f"{message['role']}: {content}"
+
+
+def _prefix_keys(messages: List[Dict[str, str]]) -> List[str]:
+    """
+    Returns a cache key for every prefix of the conversation; keys[n] identifies messages[:n].
+    """
+    digest = hashlib.md5()
+    keys = [SUMMARY_KEY_PREFIX + digest.hexdigest()]
+    for message in messages:
+        digest.update(json.dumps(message, sort_keys=True).encode("utf-8"))
+        keys.append(SUMMARY_KEY_PREFIX + digest.copy().hexdigest())
+    return keys
+
+
+def _get_summary(key: str) -> Optional[str]:
+    summary = _summaries.get(key)
+    if summary is None:
+        summary = cache.get(key)
+        if summary is not None:
+            _summaries[key] = summary
+    return summary
+
+
+def _summarize(previous: str, messages: List[Dict[str, str]], key: str, provider: str):
+    """
+    Folds messages into the previous summary with one LLM call and stores the result under key.
+    """
+    try:
+        transcript = "\n".join(_excerpt(m) for m in messages)
+        prompt = summary_prompt.format(summary=previous or "(none)", transcript=transcript,
+                                       max_words=int(CHAT_SUMMARY_MAX_TOKENS * 0.75))
+        summary = get_llm("summary").get_response(prompt).strip()
+        summary = _truncate(summary, CHAT_SUMMARY_MAX_TOKENS, provider)
+        _summaries[key] = summary
+        cache.set(key, summary)
+        logger.info(f"Folded {len(messages)} chat messages into the conversation summary")
+    except Exception as e:
+        logger.error(f"Error summarizing conversation: {str(e)}")
+    finally:
+        with _pending_lock:
+            _pending.discard(key)
+
+
+def _truncate(text: str, token_budget: int, provider: str) -> str:
+    if count_tokens(text, provider) <= token_budget:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle], provider) <= token_budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low].rstrip() + "…"
+
+
+class ConversationMemory:
+    """
+    Builds the conversation part of the chat prompt under a token budget.
+
+    The last few turns are kept verbatim (with code and figures reduced to references); older turns
+    are folded into a running summary. Summaries are produced by a background worker between turns
+    and cached per conversation prefix, so a request never waits on summarization. Messages folded
+    since the last finished summary are included as short excerpts until the worker catches up.
+
+    Attributes:
+        recent_turns (int): Number of user/assistant exchanges kept verbatim.
+        token_budget (int): Maximum tokens for the rendered memory.
+        provider (str): LLM provider used for token counting.
+
+    Methods:
+        render(chat_history: List[Dict[str, str]]) -> str:
+            Returns the memory to append to the prompt and schedules summarization of folded turns.
+    """
+    def __init__(self, recent_turns: int = CHAT_MEMORY_RECENT_TURNS, token_budget: int = CHAT_MEMORY_TOKEN_BUDGET,
+                 provider: str = None):
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.provider = provider
+
+    def _tokens(self, messages: List[Dict[str, str]]) -> int:
+        return count_tokens(json.dumps(messages), self.provider)
+
+    def _split(self, messages: List[Dict[str, str]]) -> int:
+        split = max(0, len(messages) - 2 * self.recent_turns)
+        # Verbatim turns get most of the budget; fold more turns if they do not fit, but always keep the latest message.
+        while split < len(messages) - 1 and self._tokens(messages[split:]) > self.token_budget * 0.75:
+            split += 1
+        return split
+
+    def _latest_summary(self, keys: List[str], split: int) -> Tuple[int, str]:
+        for n in range(split, 0, -1):
+            summary = _get_summary(keys[n])
+            if summary is not None:
+                return n, summary
+        return 0, ""
+
+    def _schedule(self, previous: str, messages: List[Dict[str, str]], key: str):
+        with _pending_lock:
+            if key in _pending:
+                return
+            _pending.add(key)
+        _summarizer.submit(_summarize, previous, messages, key, self.provider)
+
+    def render(self, chat_history: List[Dict[str, str]]) -> str:
+        """
+        Renders the conversation so far for the prompt.
+
+        Args:
+            chat_history (List[Dict[str, str]]): The full chat history, oldest first.
+
+        Returns:
+            str: A summary of older turns followed by the recent turns as JSON.
+        """
+        messages = [compact_message(m) for m in chat_history]
+        split = self._split(messages)
+        recent = messages[split:]
+        if split == 0:
+            return json.dumps(recent)
+
+        keys = _prefix_keys(messages[:split])
+        summarized, summary = self._latest_summary(keys, split)
+        if summarized < split:
+            self._schedule(summary, messages[summarized:split], keys[split])
+
+        budget = max(0, self.token_budget - self._tokens(recent))
+        summary = _truncate(summary, min(budget, CHAT_SUMMARY_MAX_TOKENS), self.provider) if summary else ""
+        remaining = budget - count_tokens(summary, self.provider)
+        excerpts = []
+        for message in reversed(messages[summarized:split]):
+            line = _excerpt(message)
+            remaining -= count_tokens(line, self.provider) + 1
+            if remaining < 0:
+                break
+            excerpts.insert(0, line)
+
+        parts = []
+        if summary:
+            parts.append(f"Summary of the earlier conversation:\n{summary}")
+        if excerpts:
+            parts.append("Earlier messages (abridged):\n" + "\n".join(excerpts))
+        parts.append(f"Recent messages:\n{json.dumps(recent)}")
+        return "\n\n".join(parts)
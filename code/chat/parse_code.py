@@ -1,4 +1,11 @@
-from utils.utilities import get_data_from_api, get_dataframe
+from utils.utilities import get_data_from_api, get_dataset_version
+from utils.cache_config import cache_key
+from utils.constants import CHAT_RENDER_CACHE_SIZE
+from plots.plot_data import get_pandas_frame
+from plots.figure_store import figure_store
+from utils.timeseries_pyramid import decimate_figure
+from collections import OrderedDict
+import threading
 import pandas as pd
 import cudf
 import plotly.express as px
@@ -7,6 +14,9 @@ import re
 import sys
 import io
 
+_render_lock = threading.Lock()
+_rendered = OrderedDict()
+
 def remove_show_calls(code):
     """
     Remove all instances of plt.show() and fig.show() from the given code string.
@@ -68,8 +78,7 @@ def process_response(response):
                     "content": str  # The error message
     """
     segments = re.split(r'(<CODE>.*?</CODE>|<FIGURE>.*?</FIGURE>)', response, flags=re.DOTALL | re.IGNORECASE)
-    df = get_dataframe()
-    df = df.to_pandas()
+    df = get_pandas_frame()
 
     results = []
     context = {}
@@ -90,7 +99,7 @@ def process_response(response):
                     sys.stdout = sys.__stdout__
                     code_output = buffer.getvalue()
                     if 'fig' in local_vars:
-                        results.append({"type": "figure", "content": local_vars['fig']})
+                        results.append({"type": "figure", "content": decimate_figure(local_vars['fig'])})
                     else:
                         results.append({"type": "code", "content": code, "output": code_output})
                         context.update(local_vars)
@@ -104,7 +113,7 @@ def process_response(response):
                     local_vars = {"pd": pd, "cudf": cudf, "px": px, "df": df, "get_data_from_api": get_data_from_api}
                     exec(figure_code, globals(), local_vars)
                     if 'fig' in local_vars:
-                        results.append({"type": "figure", "content": local_vars['fig']})
+                        results.append({"type": "figure", "content": decimate_figure(local_vars['fig'])})
                     else:
                         results.append({"type": "error", "content": "Figure not created"})
                 except Exception as e:
@@ -117,4 +126,37 @@ def process_response(response):
     return {
         "type": "mixed",
         "results": results,
-    }
\ No newline at end of file
+    }
+
+
+def render_response(response):
+    """
+    Processes an assistant response once per (dataset version, response text) and remembers the result.
+
+    The chat display re-renders the whole conversation whenever it changes; without this every earlier
+    message's code would be executed again. Figures are kept in the figure store, binary-encoded, and
+    the results hold their references under "ref" in place of the figure objects.
+
+    Args:
+        response (str): The assistant response containing <CODE> and <FIGURE> segments.
+
+    Returns:
+        dict: The same structure as `process_response`, with each figure result's "content" replaced by "ref".
+    """
+    key = cache_key(get_dataset_version(), response)
+    with _render_lock:
+        rendered = _rendered.get(key)
+        if rendered is not None:
+            _rendered.move_to_end(key)
+            return rendered
+
+    rendered = process_response(response)
+    for result in rendered["results"]:
+        if result["type"] == "figure":
+            result["ref"] = figure_store.put(result.pop("content"))
+
+    with _render_lock:
+        _rendered[key] = rendered
+        while len(_rendered) > CHAT_RENDER_CACHE_SIZE:
+            _rendered.popitem(last=False)
+    return rendered
@@ -61,6 +61,7 @@ def create_layout():
             dcc.Store(id='report-data'),
             dcc.Store(id='open-pdf-modal', data=False),
             dcc.Store(id='outline-data'),
+            dcc.Interval(id='outline-poll', interval=500, disabled=True),
             dcc.Store(id='report-style-data'),
             html.Div(id='connection-status', style={'display': 'none'}),
             navbar,
@@ -1,6 +1,8 @@
 import dash_bootstrap_components as dbc
-from dash import dcc
-from utils.constants import LLM_PROVIDER_OPTIONS
+from dash import dcc, html
+from utils.constants import LLM_PROVIDER_OPTIONS, LLM_TASKS
+
+DEFAULT_ROUTE = "default"
 
 llm_config_modal = dbc.Modal([
     dbc.ModalHeader("LLM Configuration", style={'fontWeight': 'bold', 'fontSize': '1.5rem', 'alignItems': 'center'}),
@@ -19,6 +21,19 @@ llm_config_modal = dbc.Modal([
             className="mt-3"
         ),
         dbc.Input(id="llm-max-tokens", type="number", placeholder="Enter Max Tokens", className="mt-2"),
+        dbc.Checkbox(id="llm-primary", label="Use as the default model", value=True, className="mt-2"),
         dbc.Button("Submit", id="llm-submit", color="primary", className="mt-3"),
+        html.Hr(),
+        html.H6("Model per task", className="mb-2"),
+        dcc.Markdown("_Route light tasks to a small, fast model. Tasks left on the default model use the default model._"),
+        *[
+            dbc.Row([
+                dbc.Col(html.Span(label), width=5),
+                dbc.Col(dbc.Select(id={"type": "llm-route", "task": task}, value=DEFAULT_ROUTE,
+                                   options=[{"label": "Default model", "value": DEFAULT_ROUTE}]), width=7),
+            ], className="mb-2 align-items-center")
+            for task, label in LLM_TASKS.items()
+        ],
+        html.Div(id="llm-routing-output", className="text-muted"),
     ]),
 ], className="custom-modal-body", id="llm-config-modal", is_open=False)
\ No newline at end of file
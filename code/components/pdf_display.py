@@ -1,9 +1,9 @@
 from dash import html
 import sys
 import os
-import base64
 import dash_bootstrap_components as dbc
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.artifact_store import artifact_url
 
 import traceback
 import logging
@@ -17,43 +17,29 @@ logging.basicConfig(
 
 logger = logging.getLogger('pdf_display')
 
-def create_pdf_display(pdf_buffer):
+def create_pdf_display(pdf_artifact):
     """
-    Generates an HTML component to display a PDF from a given buffer.
+    Generates an HTML component to display a stored PDF.
+
+    The iframe loads the PDF from the artifact download route, so the PDF bytes never pass through
+    Dash callbacks.
 
     Args:
-        pdf_buffer (io.BytesIO): A buffer containing the PDF data.
+        pdf_artifact (str): The artifact id of the PDF in the artifact store.
 
     Returns:
         html.Div: A Dash HTML component containing an iframe that displays the PDF.
     """
     logger.info("Starting PDF display creation...")
-    logger.info(f"PDF Buffer type: {type(pdf_buffer)}")
     
     try:
-        # Get proxy prefix
-        proxy_prefix = os.getenv('PROXY_PREFIX', '/projects/nvidia-alm/applications/dash-app').rstrip('/')
-        logger.info(f"Proxy prefix: {proxy_prefix}")
-        
-        # Validate PDF buffer
-        if pdf_buffer is None:
-            logger.error("PDF buffer is None!")
-            raise ValueError("PDF buffer is None")
-            
-        # Convert PDF to base64
-        pdf_bytes = pdf_buffer.getvalue()
-        logger.info(f"PDF bytes size: {len(pdf_bytes) if pdf_bytes else 0}")
-        
-        if not pdf_bytes:
-            logger.error("PDF buffer is empty!")
-            raise ValueError("PDF buffer is empty")
-            
-        pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
-        logger.info(f"Base64 PDF size: {len(pdf_base64)}")
-        
-        # Create the data URL for the PDF
-        report = f"data:application/pdf;base64,{pdf_base64}"
-        logger.info("PDF successfully converted to data URL")
+        # Validate PDF artifact
+        if not pdf_artifact:
+            logger.error("PDF artifact is missing!")
+            raise ValueError("PDF artifact is missing")
+
+        report = artifact_url(pdf_artifact)
+        logger.info(f"PDF served from {report}")
 
         # Create and return the display component
         display_component = html.Div([
@@ -1,7 +1,7 @@
 import dash_bootstrap_components as dbc
 from dash import html, dcc, Input, Output, callback
 
-def create_section_modal_body(outline_data):
+def create_section_modal_body(outline_data, streaming=False):
     """
     Creates the body of a modal for configuring PDF generation options.
     Parameters:
@@ -10,6 +10,7 @@ def create_section_modal_body(outline_data):
         - sections (list of dict): A list of sections where each section is a dictionary with:
             - name (str): The name of the section.
             - selected (bool): Whether the section is selected to be included in the report.
+    streaming (bool, optional): Whether more sections are still being generated. Defaults to False.
     Returns:
     html.Div: A Dash HTML component containing the layout for the modal body, which includes:
         - A section for changing the report title and selecting sections to include.
@@ -34,15 +35,7 @@ def create_section_modal_body(outline_data):
                             dbc.CardBody([
                                 html.H6("Select sections to include:", className="mb-2"),
                                 html.Hr(),
-                                *[
-                                    dbc.Checkbox(
-                                        id={"type": "section-checkbox", "index": i},
-                                        label=section["name"],
-                                        value=section["selected"],
-                                        className="mb-2"
-                                    )
-                                    for i, section in enumerate(outline_data["sections"])
-                                ],
+                                html.Div(create_section_checklist(outline_data["sections"], streaming), id="section-checklist"),
                             ]),
                         ], className="section-modal-card-inner mb-3"),
                         dbc.Card([
@@ -102,6 +95,33 @@ def create_section_modal_body(outline_data):
         ]),
     ])
     
+def create_section_checklist(sections, streaming=False):
+    """
+    Creates the section checkboxes of the section modal.
+
+    The checklist sits in its own container so it can be re-rendered as outline sections stream in
+    without touching the title and styling inputs around it.
+
+    Parameters:
+    sections (list of dict): The sections, each with a 'name' and whether it is 'selected'.
+    streaming (bool, optional): Whether more sections are still being generated. Defaults to False.
+    Returns:
+    list: The checkboxes, followed by a spinner while streaming.
+    """
+    return [
+        *[
+            dbc.Checkbox(
+                id={"type": "section-checkbox", "index": i},
+                label=section["name"],
+                value=section["selected"],
+                className="mb-2"
+            )
+            for i, section in enumerate(sections)
+        ],
+        *([html.Div([dbc.Spinner(size="sm", className="me-2"), "Suggesting more sections..."],
+                    className="text-muted")] if streaming else []),
+    ]
+
 @callback(
     Output("logo-preview", "children"),
     Input("uploaded-logo", "contents"),
@@ -2,11 +2,14 @@ from fastapi import FastAPI, HTTPException, Request
 from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
 from utils.cache_config import cache
-from utils.utilities import get_dataframe
+from utils.utilities import get_dataframe, get_dataset_version
+from utils.timeseries_pyramid import get_series_pyramid, DECIMATION_METHODS
 from utils.fuzzy_matching import apply_fuzzy_matching
 import traceback
 from fastapi import Query
+from typing import Optional
 import numpy as np
+import pandas as pd
 
 
 app = FastAPI()
@@ -146,6 +149,45 @@ async def detect_outliers(column_name: str):
         "outlier_range": {"lower": float(lower_bound), "upper": float(upper_bound)}
     }
     
+@app.get("/timeseries/{x_column}/{y_column}")
+async def get_timeseries(x_column: str, y_column: str, start: Optional[str] = None, end: Optional[str] = None,
+                         width: int = Query(default=1000, ge=10, le=10000), method: str = "minmax"):
+    df = get_dataframe()
+    for column in (x_column, y_column):
+        if column not in df.columns:
+            raise HTTPException(status_code=404, detail=f"Column '{column}' not found. Available columns are: {', '.join(df.columns)}")
+    if method not in DECIMATION_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown method '{method}'. Use one of: {', '.join(DECIMATION_METHODS)}")
+
+    try:
+        start_ns = pd.Timestamp(start).value if start else None
+        end_ns = pd.Timestamp(end).value if end else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time range: {str(e)}")
+
+    try:
+        pyramid = get_series_pyramid(x_column, y_column, get_dataset_version(), df)
+        if pyramid is None or pyramid.count(start_ns, end_ns) <= 2 * width:
+            pair = df[[x_column, y_column]].dropna()
+            if start_ns is not None:
+                pair = pair[pair[x_column] >= pd.Timestamp(start)]
+            if end_ns is not None:
+                pair = pair[pair[x_column] <= pd.Timestamp(end)]
+            pair = pair.sort_values(by=x_column)
+            times = pair[x_column].astype('datetime64[ns]').astype('int64').to_numpy()
+            values = pair[y_column].astype('float64').to_numpy()
+            level = None
+        else:
+            times, values, level = pyramid.query(start_ns, end_ns, width, method)
+        return {
+            "x": np.datetime_as_string(times.astype('datetime64[ns]'), unit='ms').tolist(),
+            "y": values.tolist(),
+            "level": level,
+            "method": method if level is not None else "raw",
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error decimating time series: {str(e)}")
+
 @app.api_route("/{path_name:path}", methods=["GET", "POST", "PUT", "DELETE"])
 async def catch_all(request: Request, path_name: str):
     return {"message": f"You requested {request.method} {path_name}"}
\ No newline at end of file
@@ -0,0 +1,307 @@
+import math
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+from utils.constants import PLOT_DENSITY_BINS, PLOT_DISTRIBUTION_BINS, PLOT_KDE_POINTS, PLOT_HEATMAP_MAX_COLUMNS
+
+NUMERIC_TYPES = ['float64', 'float32', 'int64', 'int32']
+
+
+class Density2D(NamedTuple):
+    """
+    A 2-D histogram of two numeric columns.
+
+    Attributes:
+        x_centers (np.ndarray): Bin centres along x.
+        y_centers (np.ndarray): Bin centres along y.
+        counts (np.ndarray): Counts with shape (len(y_centers), len(x_centers)).
+        size_means (Optional[np.ndarray]): Mean of the size column per bin, if one was given.
+    """
+    x_centers: np.ndarray
+    y_centers: np.ndarray
+    counts: np.ndarray
+    size_means: Optional[np.ndarray]
+
+
+class Distribution(NamedTuple):
+    """
+    A binned distribution of one numeric column for one group.
+
+    Attributes:
+        edges (np.ndarray): Bin edges, one more than the number of bins.
+        counts (np.ndarray): Values per bin.
+        quartiles (tuple): (min, q1, median, q3, max).
+        std (float): Standard deviation of the values.
+    """
+    edges: np.ndarray
+    counts: np.ndarray
+    quartiles: tuple
+    std: float
+
+
+def _to_host(obj):
+    return obj.to_pandas() if hasattr(obj, "to_pandas") else obj
+
+
+def _bin_index(series, low: float, high: float, bins: int):
+    width = (high - low) / bins or 1.0
+    return ((series - low) // width).clip(0, bins - 1).astype('int64')
+
+
+def binned_density(df, x: str, y: str, size: Optional[str] = None, bins: int = PLOT_DENSITY_BINS,
+                   bounds: Optional[Tuple[float, float, float, float]] = None) -> Density2D:
+    """
+    Counts points on a bins x bins grid with a single grouped aggregation in the frame's backend.
+
+    Args:
+        df (cudf.DataFrame): The data.
+        x (str): The x column.
+        y (str): The y column.
+        size (Optional[str], optional): A numeric column to average per bin. Defaults to None.
+        bins (int, optional): Bins per axis. Defaults to PLOT_DENSITY_BINS.
+        bounds (Optional[Tuple[float, float, float, float]], optional): The (x_low, x_high, y_low, y_high) extent
+            of the grid, so several grids can share one. Defaults to the extent of the data.
+
+    Returns:
+        Density2D: The grid.
+    """
+    columns = [x, y] + ([size] if size else [])
+    data = df[columns].dropna()
+    if bounds is None:
+        bounds = density_bounds(data, x, y)
+    x_low, x_high, y_low, y_high = bounds
+    keyed = data.assign(_ix=_bin_index(data[x], x_low, x_high, bins), _iy=_bin_index(data[y], y_low, y_high, bins))
+    aggregations = {x: 'count'}
+    if size:
+        aggregations[size] = 'mean'
+    grouped = _to_host(keyed.groupby(['_iy', '_ix']).agg(aggregations)).reset_index()
+
+    counts = np.zeros((bins, bins))
+    counts[grouped['_iy'].to_numpy(), grouped['_ix'].to_numpy()] = grouped[x].to_numpy()
+    size_means = None
+    if size:
+        size_means = np.full((bins, bins), np.nan)
+        size_means[grouped['_iy'].to_numpy(), grouped['_ix'].to_numpy()] = grouped[size].to_numpy()
+
+    x_width = (x_high - x_low) / bins or 1.0
+    y_width = (y_high - y_low) / bins or 1.0
+    return Density2D(x_low + x_width * (np.arange(bins) + 0.5), y_low + y_width * (np.arange(bins) + 0.5), counts, size_means)
+
+
+def density_bounds(df, x: str, y: str) -> Tuple[float, float, float, float]:
+    """
+    Returns the (x_low, x_high, y_low, y_high) extent of two columns, for grids shared by several binned_density calls.
+    """
+    data = df[[x, y]].dropna()
+    return float(data[x].min()), float(data[x].max()), float(data[y].min()), float(data[y].max())
+
+
+def small_groups(df, column: str, max_groups: int) -> Optional[List]:
+    """
+    Returns the distinct values of a column, or None if it has more than max_groups of them.
+
+    Args:
+        df (cudf.DataFrame): The data.
+        column (str): The column to group by.
+        max_groups (int): The largest number of groups accepted.
+
+    Returns:
+        Optional[List]: The sorted group values, or None if there are too many.
+    """
+    counts = _to_host(df[column].value_counts())
+    if len(counts) > max_groups:
+        return None
+    return sorted(counts.index.tolist(), key=str)
+
+
+def binned_distributions(df, value: str, group: Optional[str] = None, bins: int = PLOT_DISTRIBUTION_BINS) -> Dict[str, Distribution]:
+    """
+    Histograms and quartiles of a numeric column, per group, from grouped aggregations in the frame's backend.
+
+    All groups share the same bin edges so their densities and cumulative distributions are comparable.
+
+    Args:
+        df (cudf.DataFrame): The data.
+        value (str): The numeric column.
+        group (Optional[str], optional): A categorical column to split by. Defaults to None.
+        bins (int, optional): Number of bins. Defaults to PLOT_DISTRIBUTION_BINS.
+
+    Returns:
+        Dict[str, Distribution]: Distributions keyed by group value (or the column name when ungrouped).
+    """
+    columns = [value] + ([group] if group else [])
+    data = df[columns].dropna()
+    if not group:
+        data = data.assign(_group=value)
+        group = '_group'
+    low, high = float(data[value].min()), float(data[value].max())
+    edges = np.linspace(low, high if high > low else low + 1.0, bins + 1)
+
+    keyed = data.assign(_bin=_bin_index(data[value], low, high, bins))
+    histogram = _to_host(keyed.groupby([group, '_bin'])[value].count()).reset_index()
+    grouped = data.groupby(group)[value]
+    stats = pd.concat([_to_host(grouped.quantile(q)).rename(name) for name, q in
+                       (("min", 0.0), ("q1", 0.25), ("median", 0.5), ("q3", 0.75), ("max", 1.0))], axis=1)
+    stats["std"] = _to_host(grouped.std())
+
+    distributions = {}
+    for name, rows in histogram.groupby(group):
+        counts = np.zeros(bins)
+        counts[rows['_bin'].to_numpy()] = rows[value].to_numpy()
+        row = stats.loc[name]
+        quartiles = (row["min"], row["q1"], row["median"], row["q3"], row["max"])
+        distributions[str(name)] = Distribution(edges, counts, quartiles, 0.0 if pd.isna(row["std"]) else float(row["std"]))
+    return distributions
+
+
+def kde_from_histogram(distribution: Distribution, points: int = PLOT_KDE_POINTS) -> tuple:
+    """
+    Approximates a Gaussian KDE by smoothing a fine histogram with Scott's bandwidth.
+
+    Args:
+        distribution (Distribution): The binned distribution.
+        points (int, optional): Number of output points. Defaults to PLOT_KDE_POINTS.
+
+    Returns:
+        tuple: (grid, density) arrays, with density normalised to integrate to one.
+    """
+    counts = distribution.counts
+    n = counts.sum()
+    bin_width = distribution.edges[1] - distribution.edges[0]
+    centers = distribution.edges[:-1] + bin_width / 2
+    if n == 0:
+        return centers, counts
+    bandwidth = 1.06 * distribution.std * n ** (-1 / 5) if distribution.std > 0 else bin_width
+    sigma_bins = max(bandwidth / bin_width, 0.5)
+    radius = int(math.ceil(4 * sigma_bins))
+    kernel = np.exp(-0.5 * (np.arange(-radius, radius + 1) / sigma_bins) ** 2)
+    padded = np.concatenate([np.zeros(radius), counts, np.zeros(radius)])
+    density = np.convolve(padded, kernel / kernel.sum(), mode="same")
+    grid = np.concatenate([centers[0] - bin_width * np.arange(radius, 0, -1), centers, centers[-1] + bin_width * np.arange(1, radius + 1)])
+    density = density / (n * bin_width)
+    if len(grid) > points:
+        step = len(grid) / points
+        keep = (np.arange(points) * step).astype(int)
+        grid, density = grid[keep], density[keep]
+    return grid, density
+
+
+def ecdf_steps(distribution: Distribution) -> tuple:
+    """
+    Returns the empirical CDF evaluated at every bin's upper edge.
+
+    Args:
+        distribution (Distribution): The binned distribution.
+
+    Returns:
+        tuple: (x, proportion) step arrays, starting at the lower edge with 0.
+    """
+    total = distribution.counts.sum() or 1.0
+    cumulative = np.cumsum(distribution.counts) / total
+    return distribution.edges, np.concatenate([[0.0], cumulative])
+
+
+def grouped_sums(df, x: str, y: str, color: Optional[str] = None, max_categories: int = PLOT_DISTRIBUTION_BINS):
+    """
+    Sums y per x (and colour) value, binning a high-cardinality numeric x first, as a bar histogram would.
+
+    Args:
+        df (cudf.DataFrame): The data.
+        x (str): The category (or numeric) column.
+        y (str): The numeric column to sum.
+        color (Optional[str], optional): A second grouping column. Defaults to None.
+        max_categories (int, optional): Numeric x with more distinct values is binned. Defaults to PLOT_DISTRIBUTION_BINS.
+
+    Returns:
+        pd.DataFrame: One row per group with the summed y, sorted by y descending.
+    """
+    keys = [x] + ([color] if color and color != x else [])
+    data = df[list(dict.fromkeys(keys + [y]))]
+    if data[x].dtype.kind in "fiu" and int(data[x].nunique()) > max_categories:
+        low, high = float(data[x].min()), float(data[x].max())
+        width = (high - low) / max_categories or 1.0
+        data = data.assign(**{x: _bin_index(data[x], low, high, max_categories) * width + low + width / 2})
+    summed = _to_host(data.groupby(keys)[y].sum()).reset_index()
+    return summed.sort_values(by=y, ascending=False)
+
+
+class CovarianceStats(NamedTuple):
+    """
+    Covariance and correlation matrices of a frame's numeric columns.
+
+    Attributes:
+        columns (list): The numeric columns, in frame order.
+        covariance (pd.DataFrame): The covariance matrix.
+        correlation (pd.DataFrame): The Pearson correlation matrix.
+    """
+    columns: list
+    covariance: pd.DataFrame
+    correlation: pd.DataFrame
+
+
+def covariance_stats(df, max_columns: int = PLOT_HEATMAP_MAX_COLUMNS) -> CovarianceStats:
+    """
+    Computes the covariance matrix in one vectorized pass in the frame's backend and derives the correlations from it.
+
+    Constant columns are skipped, and at most max_columns numeric columns are kept so the matrix stays small.
+
+    Args:
+        df (cudf.DataFrame): The data.
+        max_columns (int, optional): Maximum number of columns. Defaults to PLOT_HEATMAP_MAX_COLUMNS.
+
+    Returns:
+        CovarianceStats: The matrices, as small pandas frames.
+    """
+    numeric = df.select_dtypes(include=NUMERIC_TYPES).columns.tolist()
+    if not numeric:
+        empty = pd.DataFrame()
+        return CovarianceStats([], empty, empty)
+    covariance = _to_host(df[numeric].cov())
+    variances = pd.Series(np.diag(covariance.to_numpy()), index=covariance.columns)
+    columns = variances[variances > 0].index.tolist()[:max_columns]
+    covariance = covariance.loc[columns, columns]
+    std = np.sqrt(variances[columns].to_numpy())
+    correlation = (covariance / np.outer(std, std)).clip(-1.0, 1.0)
+    return CovarianceStats(columns, covariance, correlation)
+
+
+def choose_color_column(stats: CovarianceStats) -> Optional[str]:
+    """
+    Picks the numeric column most correlated with the others on average, as the most informative colour scale.
+
+    Args:
+        stats (CovarianceStats): The frame's covariance statistics.
+
+    Returns:
+        Optional[str]: The column name, or None if there are no usable numeric columns.
+    """
+    if not stats.columns:
+        return None
+    strength = stats.correlation.abs().fillna(0.0).sum() - 1.0
+    return str(strength.idxmax())
+
+
+def stratified_sample(df, n: int, strata: Optional[str] = None, seed: int = 42):
+    """
+    Samples about n rows, keeping each stratum's share of the frame and at least one row per stratum.
+
+    Rows are shuffled once and then numbered within their stratum, so the whole sample is a single
+    grouped pass in the frame's backend.
+
+    Args:
+        df (cudf.DataFrame): The data.
+        n (int): The target number of rows.
+        strata (Optional[str], optional): A categorical column to stratify by. Defaults to None (a plain random sample).
+
+    Returns:
+        cudf.DataFrame: The sample, in the frame's backend.
+    """
+    if len(df) <= n:
+        return df
+    if not strata:
+        return df.sample(n=n, random_state=seed)
+    shuffled = df.sample(frac=1.0, random_state=seed)
+    groups = shuffled.groupby(strata)
+    rank = groups.cumcount()
+    quota = (groups[strata].transform('count') * n // len(df)).clip(lower=1)
+    return shuffled[rank < quota]
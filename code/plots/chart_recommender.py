@@ -0,0 +1,269 @@
+import itertools
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import json_repair
+from utils.configs import get_llm
+from utils.column_index import tokenize
+from prompts.plot_generation_template import plot_tiebreak_prompt
+from utils.constants import (PLOT_RECOMMENDER_TIE_MARGIN, PLOT_RECOMMENDER_LLM_TIEBREAK, PLOT_RECOMMENDER_MAX_OPTIONS,
+                             PLOT_RECOMMENDER_MAX_COLUMNS)
+
+logger = logging.getLogger('chart_recommender')
+
+NUMERIC_TYPES = ['float64', 'float32', 'int64', 'int32']
+CATEGORICAL_TYPES = ['object', 'string']
+DATETIME_TYPES = ['datetime64', 'datetime64[ns]']
+
+# Base preference for each chart type before the section name and columns are considered.
+PRIORS = {
+    "timeseries": 1.0,
+    "bar": 0.6,
+    "scatter": 0.5,
+    "violin": 0.4,
+    "pie": 0.4,
+    "regression": 0.3,
+    "ecdf": 0.3,
+    "heatmap": 0.2,
+    "parallelcoordinates": 0.1,
+}
+
+# Word prefixes in a section name that point at a chart type.
+INTENT_TERMS = {
+    "timeseries": ["trend", "time", "month", "year", "daily", "week", "season", "growth", "histor", "forecast", "period", "evolution"],
+    "scatter": ["relation", "correlat", "versus", "impact", "effect", "driver", "associat", "depend", "interact"],
+    "regression": ["predict", "regress", "forecast", "model", "estimat", "driver", "impact"],
+    "bar": ["compar", "breakdown", "segment", "rank", "top", "across", "performance"],
+    "pie": ["share", "proportion", "composition", "mix", "split", "percent", "part"],
+    "violin": ["distribut", "variab", "spread", "range", "dispers", "outlier"],
+    "ecdf": ["distribut", "percentile", "cumulative", "threshold", "quantile"],
+    "heatmap": ["correlat", "relationship", "matrix", "overview", "interdepend", "associat"],
+    "parallelcoordinates": ["multivariat", "profile", "dimension", "pattern", "cluster", "multi"],
+}
+
+INTENT_WEIGHT = 0.8
+COLUMN_WEIGHT = 1.0
+QUALITY_WEIGHT = 0.5
+
+
+class ColumnProfile(NamedTuple):
+    """
+    The statistics the recommender uses for one column.
+
+    Attributes:
+        name (str): Column name.
+        kind (str): 'numeric', 'categorical' or 'datetime'.
+        cardinality (int): Number of distinct values.
+        std (Optional[float]): Standard deviation for numeric columns.
+        minimum (Optional[float]): Minimum for numeric columns.
+    """
+    name: str
+    kind: str
+    cardinality: int
+    std: Optional[float] = None
+    minimum: Optional[float] = None
+
+
+class DataProfile(NamedTuple):
+    """
+    Column profiles plus pairwise correlations between numeric columns.
+
+    Attributes:
+        columns (Dict[str, ColumnProfile]): Profiles by column name, in dataset order.
+        correlations (Dict[Tuple[str, str], float]): Pearson correlation for each ordered numeric pair.
+    """
+    columns: Dict[str, ColumnProfile]
+    correlations: Dict[Tuple[str, str], float]
+
+
+class Candidate(NamedTuple):
+    """
+    One scored chart recommendation.
+
+    Attributes:
+        plot_type (str): A key of the plot factory's plot functions, e.g. 'bar'.
+        config (Dict[str, Any]): The plot function arguments.
+        score (float): Higher is better.
+    """
+    plot_type: str
+    config: Dict[str, Any]
+    score: float
+
+    def describe(self) -> str:
+        return f"{self.plot_type}: " + (", ".join(f"{k}={v}" for k, v in self.config.items()) or "all numeric columns")
+
+
+def profile_frame(df) -> DataProfile:
+    """
+    Profiles a (sampled) cuDF DataFrame for chart recommendation.
+
+    Args:
+        df (cudf.DataFrame): The plotting frame.
+
+    Returns:
+        DataProfile: Column kinds, cardinalities, spread and numeric correlations.
+    """
+    numeric = df.select_dtypes(include=NUMERIC_TYPES).columns.tolist()
+    categorical = df.select_dtypes(include=CATEGORICAL_TYPES).columns.tolist()
+    datetime = df.select_dtypes(include=DATETIME_TYPES).columns.tolist()
+
+    profiles = {}
+    stds = df[numeric].std().to_pandas().to_dict() if numeric else {}
+    minimums = df[numeric].min().to_pandas().to_dict() if numeric else {}
+    for column in df.columns:
+        if column in numeric:
+            profiles[column] = ColumnProfile(column, "numeric", int(df[column].nunique()), float(stds[column]), float(minimums[column]))
+        elif column in categorical:
+            profiles[column] = ColumnProfile(column, "categorical", int(df[column].nunique()))
+        elif column in datetime:
+            profiles[column] = ColumnProfile(column, "datetime", int(df[column].nunique()))
+
+    correlations = {}
+    if len(numeric) > 1:
+        matrix = df[numeric].corr().to_pandas()
+        for x, y in itertools.permutations(numeric, 2):
+            value = matrix.at[x, y]
+            correlations[(x, y)] = 0.0 if value != value else float(value)
+    return DataProfile(profiles, correlations)
+
+
+def _matches(term: str, prefixes: List[str]) -> bool:
+    return any(term.startswith(prefix) or (len(term) >= 4 and prefix.startswith(term)) for prefix in prefixes)
+
+
+def _column_relevance(section_terms: List[str], column: str) -> float:
+    column_terms = tokenize(column)
+    if not column_terms or not section_terms:
+        return 0.0
+    hits = sum(1 for term in column_terms if _matches(term, section_terms))
+    return hits / len(column_terms)
+
+
+def _ranked(profiles: List[ColumnProfile], relevance: Dict[str, float]) -> List[ColumnProfile]:
+    order = sorted(range(len(profiles)), key=lambda i: (-relevance[profiles[i].name], i))
+    return [profiles[i] for i in order][:PLOT_RECOMMENDER_MAX_COLUMNS]
+
+
+def _cardinality_fit(cardinality: int, best: int, limit: int) -> float:
+    if cardinality < 2 or cardinality > limit:
+        return 0.0
+    return 1.0 if cardinality <= best else 0.5
+
+
+def recommend_charts(profile: DataProfile, section_name: str) -> List[Candidate]:
+    """
+    Scores every sensible (chart type, columns) combination for a section.
+
+    The score adds a prior per chart type, a bonus when the section name signals that chart's intent,
+    a bonus when the x and y columns are named in the section, and a data-quality term: correlation strength for
+    scatter, regression and the correlation heatmap, and how well a categorical column's cardinality suits bars, pies, violins
+    and ECDF colouring.
+
+    Args:
+        profile (DataProfile): The dataset profile.
+        section_name (str): The report section name.
+
+    Returns:
+        List[Candidate]: Candidates ordered best first.
+    """
+    section_terms = tokenize(section_name)
+    intent = {plot_type: sum(1 for term in section_terms if _matches(term, prefixes)) for plot_type, prefixes in INTENT_TERMS.items()}
+    relevance = {name: _column_relevance(section_terms, name) for name in profile.columns}
+
+    numeric = _ranked([p for p in profile.columns.values() if p.kind == "numeric" and p.std], relevance)
+    categorical = _ranked([p for p in profile.columns.values() if p.kind == "categorical" and p.cardinality >= 2], relevance)
+    datetime = _ranked([p for p in profile.columns.values() if p.kind == "datetime"], relevance)
+
+    candidates = []
+
+    def add(plot_type: str, config: Dict[str, Any], quality: float):
+        columns = {config[axis] for axis in ("x", "y") if axis in config}
+        score = (PRIORS[plot_type] + INTENT_WEIGHT * intent[plot_type] + QUALITY_WEIGHT * quality
+                 + COLUMN_WEIGHT * sum(relevance[c] for c in columns))
+        candidates.append(Candidate(plot_type, config, round(score, 4)))
+
+    for x in datetime:
+        for y in numeric:
+            add("timeseries", {"x": x.name, "y": y.name}, 1.0)
+
+    for x, y in itertools.permutations(numeric, 2):
+        strength = abs(profile.correlations.get((x.name, y.name), 0.0))
+        add("regression", {"x": x.name, "y": y.name}, strength)
+        sizes = [s for s in numeric if s.name not in (x.name, y.name) and s.minimum is not None and s.minimum >= 0]
+        if sizes:
+            config = {"x": x.name, "y": y.name, "size": sizes[0].name}
+            colors = [c for c in categorical if c.cardinality <= 12]
+            if colors:
+                config["color"] = colors[0].name
+            add("scatter", config, strength)
+
+    for x in categorical:
+        for y in numeric:
+            bar_fit = _cardinality_fit(x.cardinality, 12, 30)
+            if bar_fit:
+                add("bar", {"x": x.name, "y": y.name, "color": x.name}, bar_fit)
+            violin_fit = _cardinality_fit(x.cardinality, 6, 12)
+            if violin_fit:
+                add("violin", {"x": x.name, "y": y.name, "color": x.name}, violin_fit)
+            pie_fit = _cardinality_fit(x.cardinality, 6, 8)
+            if pie_fit and y.minimum is not None and y.minimum >= 0:
+                add("pie", {"x": x.name, "y": y.name}, pie_fit)
+
+    for x in numeric:
+        for color in categorical:
+            color_fit = _cardinality_fit(color.cardinality, 4, 8)
+            if color_fit:
+                add("ecdf", {"x": x.name, "color": color.name}, color_fit)
+
+    if len(numeric) >= 3:
+        pairs = list(itertools.combinations([p.name for p in numeric], 2))
+        mean_strength = sum(abs(profile.correlations.get(pair, 0.0)) for pair in pairs) / len(pairs)
+        add("heatmap", {}, mean_strength)
+        add("parallelcoordinates", {}, mean_strength)
+
+    candidates.sort(key=lambda c: -c.score)
+    return candidates
+
+
+def _is_tie(candidates: List[Candidate]) -> bool:
+    return len(candidates) > 1 and candidates[0].score - candidates[1].score <= PLOT_RECOMMENDER_TIE_MARGIN
+
+
+async def choose_section_charts(profile: DataProfile, section_names: List[str],
+                                use_llm: bool = PLOT_RECOMMENDER_LLM_TIEBREAK) -> Dict[str, Optional[Candidate]]:
+    """
+    Picks a chart for every section, asking the LLM only to break close ties.
+
+    All tied sections are resolved in one batched LLM call; if that call fails or is disabled, the
+    top-scored candidate is used.
+
+    Args:
+        profile (DataProfile): The dataset profile.
+        section_names (List[str]): The report section names.
+        use_llm (bool, optional): Whether to use the LLM as a tiebreaker. Defaults to PLOT_RECOMMENDER_LLM_TIEBREAK.
+
+    Returns:
+        Dict[str, Optional[Candidate]]: The chosen candidate per section, or None if no chart fits.
+    """
+    ranked = {name: recommend_charts(profile, name) for name in section_names}
+    choices = {name: (candidates[0] if candidates else None) for name, candidates in ranked.items()}
+    tied = [name for name, candidates in ranked.items() if _is_tie(candidates)]
+    if not use_llm or not tied:
+        return choices
+
+    options = {name: ranked[name][:PLOT_RECOMMENDER_MAX_OPTIONS] for name in tied}
+    listing = "\n\n".join(
+        f"Section {i + 1}: {name}\n" + "\n".join(f"  {j + 1}. {c.describe()}" for j, c in enumerate(options[name]))
+        for i, name in enumerate(tied)
+    )
+    try:
+        response = await get_llm("plot_config").get_acompletion(plot_tiebreak_prompt.replace("{sections}", listing))
+        picks = json_repair.loads(response)
+        if isinstance(picks, dict):
+            for i, name in enumerate(tied):
+                pick = picks.get(str(i + 1))
+                if isinstance(pick, (int, float)) and 1 <= int(pick) <= len(options[name]):
+                    choices[name] = options[name][int(pick) - 1]
+        logger.info(f"Resolved chart ties for {len(tied)} of {len(section_names)} sections in one LLM call")
+    except Exception as e:
+        logger.error(f"Error breaking chart ties with the LLM, using top-scored charts: {str(e)}")
+    return choices
@@ -0,0 +1,157 @@
+import base64
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+import numpy as np
+import plotly.io as pio
+from utils.cache_config import cache
+from utils.constants import FIGURE_TYPED_ARRAY_MIN_LENGTH, FIGURE_STORE_CACHE_BYTES
+
+logger = logging.getLogger('figure_store')
+
+# Array dtypes plotly.js can decode from a typed-array spec; int64 is not among them.
+TYPED_ARRAY_INTS = [np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32]
+
+
+# Integers up to this magnitude are exact in float64.
+FLOAT64_EXACT_INT = 2 ** 53
+
+
+def _narrowest(array: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Casts an integer or float array to the smallest plotly.js typed-array dtype that holds it exactly,
+    or returns None for integers no such dtype holds exactly (e.g. epoch nanoseconds).
+    """
+    if array.dtype.kind in "iu":
+        low, high = (int(array.min()), int(array.max())) if array.size else (0, 0)
+        for dtype in TYPED_ARRAY_INTS:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return array.astype(dtype)
+        if -FLOAT64_EXACT_INT <= low and high <= FLOAT64_EXACT_INT:
+            return array.astype(np.float64)
+        return None
+    as_single = array.astype(np.float32)
+    if np.array_equal(as_single, array, equal_nan=True):
+        return as_single
+    return array.astype(np.float64)
+
+
+def _typed_array(value) -> Optional[dict]:
+    """
+    Returns the plotly.js typed-array spec ({dtype, bdata[, shape]}) for a numeric array, or None.
+    """
+    if isinstance(value, (list, tuple)) and (len(value) < FIGURE_TYPED_ARRAY_MIN_LENGTH
+                                             or not isinstance(value[0], (int, float, list, tuple))):
+        return None
+    try:
+        array = np.asarray(value)
+    except (ValueError, TypeError):
+        return None
+    if array.dtype.kind not in "iuf" or array.size < FIGURE_TYPED_ARRAY_MIN_LENGTH or array.ndim > 2:
+        return None
+    array = _narrowest(array)
+    if array is None:
+        return None
+    array = np.ascontiguousarray(array)
+    spec = {"dtype": array.dtype.str.lstrip("<|="), "bdata": base64.b64encode(array.tobytes()).decode("ascii")}
+    if array.ndim == 2:
+        spec["shape"] = f"{array.shape[0]},{array.shape[1]}"
+    return spec
+
+
+def _encode(node):
+    if isinstance(node, dict):
+        return {key: _encode(value) for key, value in node.items()}
+    if isinstance(node, (list, tuple, np.ndarray)):
+        spec = _typed_array(node)
+        if spec is not None:
+            return spec
+        if isinstance(node, np.ndarray):
+            return node
+        return [_encode(item) for item in node]
+    return node
+
+
+def encode_figure(figure) -> dict:
+    """
+    Converts a figure to a plain dict whose numeric trace arrays are base64 typed arrays.
+
+    plotly.js decodes these specs directly into typed arrays, so large numeric columns cross the wire
+    as packed binary rather than decimal text. Integers and floats are narrowed to the smallest dtype
+    that holds every value exactly. Arrays shorter than FIGURE_TYPED_ARRAY_MIN_LENGTH, strings and
+    dates are left as they are.
+
+    Args:
+        figure (go.Figure or dict): The figure.
+
+    Returns:
+        dict: The encoded figure, ready for `dcc.Graph(figure=...)` or JSON serialization.
+    """
+    figure = figure.to_plotly_json() if hasattr(figure, "to_plotly_json") else figure
+    encoded = dict(figure)
+    encoded["data"] = [_encode(trace) for trace in figure.get("data", [])]
+    return json.loads(pio.to_json(encoded, validate=False))
+
+
+class FigureStore:
+    """
+    Content-addressed storage for encoded figures, shared with other processes through the disk cache.
+
+    Figures are stored once per content hash, and callers pass the returned reference around in place of
+    the figure itself. A byte-bounded in-memory LRU sits in front of the disk cache.
+
+    Attributes:
+        max_bytes (int): Upper bound on the in-memory cache size.
+
+    Methods:
+        put(figure):
+            Encodes and stores a figure, returning its reference.
+        get(ref):
+            Returns the encoded figure for a reference, or None.
+    """
+    def __init__(self, max_bytes: int = FIGURE_STORE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._figures: "OrderedDict[str, str]" = OrderedDict()
+        self._size = 0
+
+    def _remember(self, ref: str, figure_json: str):
+        with self._lock:
+            if ref in self._figures:
+                self._figures.move_to_end(ref)
+                return
+            self._figures[ref] = figure_json
+            self._size += len(figure_json)
+            while self._size > self.max_bytes and len(self._figures) > 1:
+                _, evicted = self._figures.popitem(last=False)
+                self._size -= len(evicted)
+
+    def put(self, figure: Any) -> str:
+        figure_json = json.dumps(encode_figure(figure), separators=(",", ":"))
+        ref = "figure_" + hashlib.sha256(figure_json.encode()).hexdigest()[:32]
+        with self._lock:
+            known = ref in self._figures
+        if not known:
+            cache.set(ref, figure_json)
+        self._remember(ref, figure_json)
+        return ref
+
+    def get(self, ref: str) -> Optional[dict]:
+        if not ref or not ref.startswith("figure_"):
+            return None
+        with self._lock:
+            figure_json = self._figures.get(ref)
+        if figure_json is None:
+            figure_json = cache.get(ref)
+            if figure_json is None:
+                logger.warning(f"Figure {ref} is not in the store")
+                return None
+        self._remember(ref, figure_json)
+        return json.loads(figure_json)
+
+
+figure_store = FigureStore()
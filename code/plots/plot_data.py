@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+import cudf
+import pandas as pd
+from utils.utilities import is_timeseries, resample_df, get_dataframe, get_dataset_version
+from utils.constants import PLOT_FRAME_CACHE_SIZE
+from .chart_recommender import DataProfile, profile_frame
+from .aggregations import CovarianceStats, covariance_stats
+
+logger = logging.getLogger('plot_data')
+
+_lock = threading.Lock()
+_version = None
+_build_locks: "Dict[Tuple[str, str, int], threading.Lock]" = {}
+_frames: "OrderedDict[Tuple[str, int], cudf.DataFrame]" = OrderedDict()
+_profiles: "OrderedDict[Tuple[str, int], DataProfile]" = OrderedDict()
+_stats: "OrderedDict[Tuple[str, int], CovarianceStats]" = OrderedDict()
+_pandas_frames: "OrderedDict[Tuple[str, int], pd.DataFrame]" = OrderedDict()
+_STORES = {'frame': _frames, 'profile': _profiles, 'stats': _stats, 'pandas': _pandas_frames}
+
+
+def _remember(store: OrderedDict, key, value):
+    store[key] = value
+    store.move_to_end(key)
+    while len(store) > PLOT_FRAME_CACHE_SIZE:
+        store.popitem(last=False)
+
+
+def _drop_stale(version: str):
+    # Called with _lock held. Entries for an older dataset are released as soon as a new version is
+    # seen, so a large frame of the previous upload does not linger on the GPU or the host.
+    global _version
+    if version == _version:
+        return
+    _version = version
+    for store in _STORES.values():
+        for key in [key for key in store if key[0] != version]:
+            del store[key]
+    for key in [key for key in _build_locks if key[1] != version]:
+        del _build_locks[key]
+
+
+def _get_or_build(kind: str, key: Tuple[str, int], build: Callable[[], Any]) -> Any:
+    """
+    Returns the cached value for key, building it at most once at a time per key.
+
+    Builds run under a per-key lock, so a slow build (e.g. a multi-million-row frame) only blocks
+    callers that need the same value.
+    """
+    store = _STORES[kind]
+    with _lock:
+        _drop_stale(key[0])
+        value = store.get(key)
+        if value is not None:
+            store.move_to_end(key)
+            return value
+        build_lock = _build_locks.setdefault((kind, *key), threading.Lock())
+    with build_lock:
+        with _lock:
+            value = store.get(key)
+        if value is None:
+            value = build()
+            with _lock:
+                if key[0] == _version:
+                    _remember(store, key, value)
+        return value
+
+
+def build_plot_frame(df: cudf.DataFrame, max_samples: int = 10000) -> cudf.DataFrame:
+    """
+    Prepares a dataset for plotting: resamples time series, fills numeric gaps with column means,
+    drops duplicates and samples down to max_samples rows.
+
+    Args:
+        df (cudf.DataFrame): The full dataset.
+        max_samples (int, optional): The maximum number of rows to keep. Defaults to 10000.
+
+    Returns:
+        cudf.DataFrame: The plotting frame.
+    """
+    if is_timeseries(df):
+        df = resample_df(df)
+    numeric_cols = df.select_dtypes(include=['float64', 'float32', 'int64', 'int32']).columns.tolist()
+    if numeric_cols:
+        df = df.fillna({col: df[col].mean() for col in numeric_cols})
+    df = df.drop_duplicates()
+    if len(df) > max_samples:
+        df = df.sample(n=max_samples, random_state=42)
+    return df
+
+
+def get_plot_frame(max_samples: int = 10000) -> cudf.DataFrame:
+    """
+    Returns the plotting frame for the loaded dataset, built once per (dataset version, max_samples).
+
+    The frame is shared between callers and must not be modified in place.
+
+    Args:
+        max_samples (int, optional): The maximum number of rows to keep. Defaults to 10000.
+
+    Returns:
+        cudf.DataFrame: The plotting frame.
+    """
+    def build():
+        start = time.perf_counter()
+        frame = build_plot_frame(get_dataframe(), max_samples)
+        logger.info(f"Built plotting frame for max_samples={max_samples} in {time.perf_counter() - start:.3f}s")
+        return frame
+
+    return _get_or_build('frame', (get_dataset_version(), max_samples), build)
+
+
+def get_plot_profile(max_samples: int = 10000) -> DataProfile:
+    """
+    Returns the chart recommender's profile of the plotting frame, computed once per (dataset version, max_samples).
+
+    Args:
+        max_samples (int, optional): The maximum number of rows in the plotting frame. Defaults to 10000.
+
+    Returns:
+        DataProfile: The column profile of the plotting frame.
+    """
+    return _get_or_build('profile', (get_dataset_version(), max_samples), lambda: profile_frame(get_plot_frame(max_samples)))
+
+
+def get_covariance_stats(max_samples: int = 10000) -> CovarianceStats:
+    """
+    Returns the covariance and correlation matrices of the plotting frame, computed once per (dataset version, max_samples).
+
+    Args:
+        max_samples (int, optional): The maximum number of rows in the plotting frame. Defaults to 10000.
+
+    Returns:
+        CovarianceStats: The numeric columns' covariance and correlation matrices.
+    """
+    return _get_or_build('stats', (get_dataset_version(), max_samples), lambda: covariance_stats(get_plot_frame(max_samples)))
+
+
+def get_pandas_frame() -> pd.DataFrame:
+    """
+    Returns a private pandas copy of the full dataset for chat code execution.
+
+    The device-to-host conversion happens once per dataset version; each call gets its own copy
+    because chat code may modify the frame.
+
+    Returns:
+        pd.DataFrame: The full dataset as a pandas DataFrame.
+    """
+    frame = _get_or_build('pandas', (get_dataset_version(), 0), lambda: get_dataframe().to_pandas())
+    return frame.copy()
@@ -0,0 +1,249 @@
+import asyncio
+import atexit
+import hashlib
+import io
+import logging
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, List, NamedTuple, Optional, Sequence
+import plotly.io as pio
+from utils.constants import PLOT_EXPORT_SETTINGS, PLOT_EXPORT_WORKERS, PLOT_EXPORT_CACHE_BYTES
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger('plot_export')
+
+EXPORT_FORMATS = ("png", "webp", "svg")
+CSS_DPI = 96
+
+
+class ExportSettings(NamedTuple):
+    """
+    How a figure is rasterized or serialized.
+
+    Attributes:
+        format (str): One of 'png', 'webp' or 'svg'.
+        width (int): Layout width in CSS pixels.
+        height (int): Layout height in CSS pixels.
+        dpi (int): Output resolution; 96 renders at layout size, 192 at twice the size. Ignored for SVG.
+        quality (Optional[int]): WebP quality from 1 to 100. Defaults to the encoder default.
+        compress_level (Optional[int]): PNG zlib level from 0 to 9. None keeps the renderer's output as is.
+        colors (Optional[int]): Quantize PNGs to a palette of at most this many colors. None keeps true color.
+    """
+    format: str = "png"
+    width: int = 900
+    height: int = 500
+    dpi: int = 192
+    quality: Optional[int] = None
+    compress_level: Optional[int] = None
+    colors: Optional[int] = None
+
+
+DEFAULT_EXPORT_SETTINGS = ExportSettings(**PLOT_EXPORT_SETTINGS)
+
+
+def _warm_renderer():
+    """
+    Starts the worker's Kaleido/Chromium renderer so the first real export does not pay for it.
+    """
+    try:
+        pio.to_image({"data": [], "layout": {}}, format="png", engine="kaleido", width=10, height=10)
+    except Exception as e:
+        logger.error(f"Error warming plot renderer: {str(e)}")
+
+
+def _render(figure_json: str, settings: ExportSettings) -> bytes:
+    """
+    Renders one serialized figure in a worker process.
+    """
+    figure = pio.from_json(figure_json, skip_invalid=True)
+    if settings.format == "svg":
+        return pio.to_image(figure, format="svg", engine="kaleido", width=settings.width, height=settings.height)
+
+    image = pio.to_image(figure, format="png", engine="kaleido", width=settings.width, height=settings.height,
+                         scale=settings.dpi / CSS_DPI)
+    if Image is None or (settings.format == "png" and settings.compress_level is None and settings.colors is None):
+        return image
+
+    buffer = io.BytesIO()
+    with Image.open(io.BytesIO(image)) as raster:
+        if settings.format == "webp":
+            raster.save(buffer, format="WEBP", quality=settings.quality or 80, method=4)
+        else:
+            if settings.colors:
+                # Charts use few distinct colors, so an undithered palette is visually lossless and far smaller.
+                raster = raster.quantize(colors=settings.colors, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+            raster.save(buffer, format="PNG", optimize=True, compress_level=settings.compress_level or 9,
+                        dpi=(settings.dpi, settings.dpi))
+    return buffer.getvalue()
+
+
+class PlotExporter:
+    """
+    Exports plotly figures through a pool of warm Kaleido renderer processes.
+
+    Renderers are started once and reused, so each export pays only for the render itself. Figures
+    are rendered in parallel, and results are content-addressed by a hash of the figure and export
+    settings: a figure that was already exported, or is being exported, is never rendered again.
+
+    Attributes:
+        workers (int): Number of renderer processes.
+        max_cache_bytes (int): Size limit of the in-memory result cache.
+
+    Methods:
+        figure_hash(figure, settings) -> str:
+            Returns the content address of a figure under the given settings.
+        submit(figure, settings) -> Future:
+            Schedules one export and returns a future for its bytes.
+        export(figures, settings) -> List[Optional[bytes]]:
+            Exports a batch of figures, blocking until all are done.
+        export_async(figures, settings) -> List[Optional[bytes]]:
+            Exports a batch of figures without blocking the event loop.
+        shutdown():
+            Stops the renderer processes.
+    """
+    def __init__(self, workers: int = PLOT_EXPORT_WORKERS, max_cache_bytes: int = PLOT_EXPORT_CACHE_BYTES):
+        self.workers = workers
+        self.max_cache_bytes = max_cache_bytes
+        self._pool = None
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._in_flight = {}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned rather than forked so workers never inherit the parent's CUDA context.
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_warm_renderer)
+        return self._pool
+
+    @staticmethod
+    def _serialize(figure: Any) -> str:
+        return figure if isinstance(figure, str) else pio.to_json(figure, validate=False)
+
+    @staticmethod
+    def figure_hash(figure: Any, settings: ExportSettings = DEFAULT_EXPORT_SETTINGS) -> str:
+        figure_json = PlotExporter._serialize(figure)
+        return hashlib.sha256(f"{figure_json}\x00{tuple(settings)}".encode("utf-8")).hexdigest()
+
+    def _store(self, key: str, future: Future):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            data = future.result()
+            self._cache[key] = data
+            self._cache_bytes += len(data)
+            while self._cache_bytes > self.max_cache_bytes and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+    def submit(self, figure: Any, settings: ExportSettings = DEFAULT_EXPORT_SETTINGS) -> Future:
+        """
+        Schedules an export of one figure.
+
+        Args:
+            figure (Any): A plotly figure, figure dict, or figure JSON string.
+            settings (ExportSettings, optional): Export settings. Defaults to PLOT_EXPORT_SETTINGS.
+
+        Returns:
+            Future: Resolves to the exported bytes.
+        """
+        if settings.format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {settings.format}. Use one of {', '.join(EXPORT_FORMATS)}.")
+        figure_json = self._serialize(figure)
+        key = self.figure_hash(figure_json, settings)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                done = Future()
+                done.set_result(self._cache[key])
+                return done
+            if key in self._in_flight:
+                return self._in_flight[key]
+            try:
+                future = self._get_pool().submit(_render, figure_json, settings)
+            except BrokenProcessPool:
+                # A renderer crashed (e.g. Chromium died) and took the pool down; start a fresh one.
+                logger.warning("Plot export workers crashed, restarting them")
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                future = self._get_pool().submit(_render, figure_json, settings)
+            self._in_flight[key] = future
+        future.add_done_callback(lambda f: self._store(key, f))
+        return future
+
+    def _submit_batch(self, figures: Sequence[Any], settings: ExportSettings) -> List[Optional[Future]]:
+        futures = []
+        for figure in figures:
+            try:
+                futures.append(self.submit(figure, settings) if figure is not None else None)
+            except Exception as e:
+                logger.error(f"Error scheduling plot export: {str(e)}")
+                futures.append(None)
+        return futures
+
+    def export(self, figures: Sequence[Any], settings: ExportSettings = DEFAULT_EXPORT_SETTINGS) -> List[Optional[bytes]]:
+        """
+        Exports a batch of figures in parallel.
+
+        Args:
+            figures (Sequence[Any]): Figures to export; None entries are passed through.
+            settings (ExportSettings, optional): Export settings. Defaults to PLOT_EXPORT_SETTINGS.
+
+        Returns:
+            List[Optional[bytes]]: Exported bytes in input order, None where an export failed.
+        """
+        start = time.perf_counter()
+        results = []
+        for future in self._submit_batch(figures, settings):
+            try:
+                results.append(future.result() if future is not None else None)
+            except Exception as e:
+                logger.error(f"Error exporting plot: {str(e)}")
+                results.append(None)
+        logger.info(f"Exported {len(figures)} plots in {time.perf_counter() - start:.3f}s")
+        return results
+
+    async def export_async(self, figures: Sequence[Any], settings: ExportSettings = DEFAULT_EXPORT_SETTINGS) -> List[Optional[bytes]]:
+        """
+        Exports a batch of figures in parallel without blocking the event loop.
+
+        Args:
+            figures (Sequence[Any]): Figures to export; None entries are passed through.
+            settings (ExportSettings, optional): Export settings. Defaults to PLOT_EXPORT_SETTINGS.
+
+        Returns:
+            List[Optional[bytes]]: Exported bytes in input order, None where an export failed.
+        """
+        start = time.perf_counter()
+        futures = await asyncio.to_thread(self._submit_batch, figures, settings)
+        outcomes = await asyncio.gather(*[asyncio.wrap_future(f) for f in futures if f is not None], return_exceptions=True)
+        outcomes = iter(outcomes)
+        results = []
+        for future in futures:
+            outcome = next(outcomes) if future is not None else None
+            if isinstance(outcome, BaseException):
+                logger.error(f"Error exporting plot: {str(outcome)}")
+                outcome = None
+            results.append(outcome)
+        logger.info(f"Exported {len(figures)} plots in {time.perf_counter() - start:.3f}s")
+        return results
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+plot_exporter = PlotExporter()
+atexit.register(plot_exporter.shutdown)
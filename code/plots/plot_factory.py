@@ -1,78 +1,16 @@
+import asyncio
 import cudf
-import json_repair
-from utils.configs import get_llm
-from prompts.plot_generation_template import generate_plots_prompt
-import io
-import re
-from utils.utilities import is_timeseries, resample_df, get_dataframe
-from typing import Optional, Dict, Any
-import json
-from .plot_generators import plot_scatter, plot_comparison_bars, plot_linear_regression, plot_violin, plot_ecdf, plot_parallel_coordinates, plot_pie, plot_time_series
+from typing import Optional, Dict, Any, List, Tuple
+from .plot_generators import plot_scatter, plot_comparison_bars, plot_linear_regression, plot_violin, plot_ecdf, plot_parallel_coordinates, plot_heatmap, plot_pie, plot_time_series
 import traceback
+from .chart_recommender import choose_section_charts
+from .plot_data import get_plot_frame, get_plot_profile, get_covariance_stats
+from .figure_store import figure_store
+from utils.utilities import get_dataset_version
+from utils.timeseries_pyramid import get_series_pyramid
+from utils.constants import PLOT_TIMESERIES_WIDTH_PX, PLOT_AGGREGATE_MAX_ROWS
 
 
-def get_llm_response(df: cudf.DataFrame, section_name: str) -> str:
-    """
-    Generates a response from a language model based on the structure of a given DataFrame.
-    Args:
-        df (cudf.DataFrame): The input DataFrame for which the response is to be generated.
-        section_name (str): The name of the section to be included in the prompt.
-    Returns:
-        str: The response generated by the language model.
-    The function performs the following steps:
-    1. Extracts information about the DataFrame's structure and stores it in a buffer.
-    2. Identifies numerical, categorical, and datetime columns in the DataFrame.
-    3. Constructs a prompt by replacing placeholders with the identified column names and the provided section name.
-    4. Sends the constructed prompt to a language model to generate a response.
-    Note:
-        - The function assumes the existence of a global variable `generate_plots_prompt` which contains the template for the prompt.
-        - The function assumes the existence of a global object `llm` with a method `get_response` that takes a prompt and returns a response.
-    """
-    buffer = io.StringIO()
-    df.info(buf=buffer)
-    numerical_cols = df.select_dtypes(include=['float64', 'float32', 'int64', 'int32']).columns.tolist()
-    categorical_cols = df.select_dtypes(include=['object', 'string']).columns.tolist()
-    datetime_cols = df.select_dtypes(include=['datetime64', 'datetime64[ns]']).columns.tolist()
-    
-    if numerical_cols:
-        numerical_cols_str = ", ".join(numerical_cols)
-    else:
-        numerical_cols_str = "None"
-    if categorical_cols:
-        categorical_cols_str = ", ".join(categorical_cols)
-    else:
-        categorical_cols_str = "None"
-    if datetime_cols:
-        datetime_cols_str = ", ".join(datetime_cols)
-    else:
-        datetime_cols_str = "None"
-    
-    # Replace placeholders with the corresponding strings
-    prompt = generate_plots_prompt.replace("{numerical_columns}", numerical_cols_str)\
-                                  .replace("{section_name}", section_name)\
-                                  .replace("{categorical_columns}", categorical_cols_str)\
-                                  .replace("{datetime_columns}", datetime_cols_str)
-                                  
-    llm = get_llm()
-    return llm.get_response(prompt)
-
-def extract_plot_config(response: str) -> Optional[str]:
-    """
-    Extracts a JSON-like configuration string from the given response.
-
-    This function searches for a JSON-like object within the provided response string
-    using a regular expression. If a match is found, the JSON-like string is returned;
-    otherwise, None is returned.
-
-    Args:
-        response (str): The input string containing the response from which to extract the JSON-like configuration.
-
-    Returns:
-        Optional[str]: The extracted JSON-like configuration string if found, otherwise None.
-    """
-    match = re.search(r'\{.*\}', response, re.DOTALL)
-    return match.group(0) if match else None
-
 def validate_plot_config(plot_type: str, plot_config: Dict[str, Any]) -> Dict[str, Any]:
     """
     Validates and filters the plot configuration dictionary based on the plot type.
@@ -97,65 +35,115 @@ def validate_plot_config(plot_type: str, plot_config: Dict[str, Any]) -> Dict[st
     valid_params = required_params.get(plot_type, set())
     return {k: v for k, v in plot_config.items() if k in valid_params}
 
-async def parse_llm_response(section_name: str, max_samples: int = 10000):
+PLOT_FUNCTIONS = {
+    'scatter': plot_scatter,
+    'bar': plot_comparison_bars,
+    'regression': plot_linear_regression,
+    'violin': plot_violin,
+    'ecdf': plot_ecdf,
+    'parallelcoordinates': plot_parallel_coordinates,
+    'pie': plot_pie,
+    'timeseries': plot_time_series,
+    'heatmap': plot_heatmap
+}
+
+# Plot types drawn from grouped aggregates rather than one mark per row.
+AGGREGATED_PLOT_TYPES = {'scatter', 'bar', 'violin', 'ecdf', 'heatmap', 'parallelcoordinates'}
+
+async def recommend_section_plots(section_names: List[str], max_samples: int = 10000) -> Dict[str, Optional[Tuple[str, Dict[str, Any]]]]:
     """
-    Asynchronously parses the response from a language model to generate a plot.
+    Recommends a plot type and configuration for every section at once.
+    Charts are scored locally from the column profile and section names; the LLM is only consulted,
+    in a single batched call, for sections where the top candidates are tied.
+    Args:
+        section_names (List[str]): The report section names.
+        max_samples (int, optional): The maximum number of samples used to build the plotting frame. Defaults to 10000.
+    Returns:
+        Dict[str, Optional[Tuple[str, Dict[str, Any]]]]: The (plot type, plot config) per section, or None if no plot fits.
+    """
+    try:
+        profile = await asyncio.to_thread(get_plot_profile, max_samples)
+        choices = await choose_section_charts(profile, section_names)
+        return {name: (choice.plot_type, dict(choice.config)) if choice else None for name, choice in choices.items()}
+    except Exception:
+        print(traceback.format_exc())
+        return {name: None for name in section_names}
+
+def timeseries_frame(df: cudf.DataFrame, x: str, y: str) -> cudf.DataFrame:
+    """
+    Returns the points to draw for a time-series plot: a min-max decimated view of the full series
+    from its pyramid when one was built at ingest, so peaks survive, otherwise the plotting frame.
+    Args:
+        df (cudf.DataFrame): The plotting frame.
+        x (str): The datetime column.
+        y (str): The numeric column.
+    Returns:
+        cudf.DataFrame: The frame to plot.
+    """
+    pyramid = get_series_pyramid(x, y, get_dataset_version())
+    if pyramid is None:
+        return df
+    times, values, _ = pyramid.query(width=PLOT_TIMESERIES_WIDTH_PX)
+    return cudf.DataFrame({x: times.astype('datetime64[ns]'), y: values})
+
+def build_plot(df: cudf.DataFrame, plot_type: str, plot_config: Dict[str, Any]):
+    """
+    Builds a plot from a plot type and configuration.
+    Args:
+        df (cudf.DataFrame): The plotting frame.
+        plot_type (str): A key of PLOT_FUNCTIONS.
+        plot_config (Dict[str, Any]): The plot function arguments.
+    Returns:
+        tuple: The plot object, the reference of the stored, binary-encoded figure (see `figure_store`), and the
+               plot configuration dictionary, or (None, None, None) if the plot could not be built.
+    """
+    plot_function = PLOT_FUNCTIONS.get(plot_type)
+    if plot_function is None:
+        return None, None, None
+    plot_config = validate_plot_config(plot_type, plot_config)
+    if plot_type == 'regression':
+        plot = plot_function(df, **plot_config, test_size=0.2)
+    elif plot_type == 'timeseries':
+        plot = plot_function(timeseries_frame(df, plot_config.get('x'), plot_config.get('y')), **plot_config)
+    elif plot_type == 'parallelcoordinates':
+        plot = plot_function(df, stats=get_covariance_stats(PLOT_AGGREGATE_MAX_ROWS))
+        plot_config = {'type': 'parallelcoordinates'}
+    elif plot_type == 'heatmap':
+        plot = plot_function(df, stats=get_covariance_stats(PLOT_AGGREGATE_MAX_ROWS))
+    else:
+        plot = plot_function(df, **plot_config)
+
+    if plot:
+        try:
+            return plot, figure_store.put(plot), plot_config
+        except (TypeError, ValueError):
+            print(traceback.format_exc())
+    return None, None, None
+
+async def parse_llm_response(section_name: str, max_samples: int = 10000, recommendation: Optional[Tuple[str, Dict[str, Any]]] = None):
+    """
+    Asynchronously generates the plot for a report section.
     Args:
         section_name (str): The name of the section for which the plot is being generated.
         max_samples (int, optional): The maximum number of samples to use from the dataframe. Defaults to 10000.
+        recommendation (Optional[Tuple[str, Dict[str, Any]]], optional): A (plot type, plot config) pair from
+            `recommend_section_plots`. If omitted, a recommendation is made for this section alone.
     Returns:
-        tuple: A tuple containing the plot object, the plot data in JSON format, and the plot configuration dictionary.
+        tuple: A tuple containing the plot object, the stored figure's reference, and the plot configuration dictionary.
                If no plot is generated, returns (None, None, None).
     Raises:
         Exception: If any error occurs during the process, the exception traceback is printed and (None, None, None) is returned.
     """
     try:
-        df = get_dataframe()
-        if is_timeseries(df):
-            df = resample_df(df)
-        numeric_cols = df.select_dtypes(include=['float64', 'float32', 'int64', 'int32']).columns.tolist()
-        for numeric_col in numeric_cols:
-            df[numeric_col] = df[numeric_col].fillna(df[numeric_col].mean())
-        df = df.drop_duplicates()
-        if len(df) > max_samples:
-            df = df.sample(n=max_samples, random_state=42)  
-        response = get_llm_response(df, section_name)
-        plot_config_str = extract_plot_config(response)
-        if not plot_config_str:
+        if recommendation is None:
+            recommendation = (await recommend_section_plots([section_name], max_samples)).get(section_name)
+        if not recommendation:
             return None, None, None
-        
-        response_dict = json_repair.loads(plot_config_str)
-        plot_functions = {
-            'scatter': plot_scatter,
-            'bar': plot_comparison_bars,
-            'regression': plot_linear_regression,
-            'violin': plot_violin,
-            'ecdf': plot_ecdf,
-            'parallelcoordinates': plot_parallel_coordinates,
-            'pie': plot_pie,
-            'timeseries': plot_time_series
-        }
-
-        for plot_type, plot_function in plot_functions.items():
-            if plot_type in response_dict:
-                plot_config = validate_plot_config(plot_type, response_dict[plot_type])
-                if plot_type == 'regression':
-                    plot = plot_function(df, **plot_config, test_size=0.2)
-                elif plot_type == 'parallelcoordinates':
-                    plot = plot_function(df)
-                    plot_config = {'type': 'parallelcoordinates'}
-                else:
-                    plot = plot_function(df, **plot_config)
-                
-                if plot:
-                    try:
-                        plot_data = json.loads(plot.to_json())
-                        return plot, plot_data, plot_config
-                    except json.JSONDecodeError:
-                        print(traceback.format_exc())
-                else:
-                    return
-        
-        return None, None, None
+        plot_type, plot_config = recommendation
+        # Aggregated charts send a fixed-size payload to Plotly, so they can summarise the whole dataset.
+        rows = PLOT_AGGREGATE_MAX_ROWS if plot_type in AGGREGATED_PLOT_TYPES else max_samples
+        df = await asyncio.to_thread(get_plot_frame, rows)
+        return await asyncio.to_thread(build_plot, df, plot_type, plot_config)
     except Exception:
-        return None, None, None
\ No newline at end of file
+        print(traceback.format_exc())
+        return None, None, None
@@ -1,10 +1,15 @@
 from utils.fuzzy_matching import apply_fuzzy_matching
 import cudf
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import cupy as cp
 from cuml.model_selection import train_test_split
 from cuml.linear_model import LinearRegression
+from utils.constants import PLOT_AGGREGATE_MIN_ROWS, PLOT_DENSITY_MAX_FACETS, PLOT_PARALLEL_MAX_ROWS, PLOT_PARALLEL_MAX_DIMENSIONS, PLOT_PARALLEL_MAX_STRATA
+from .aggregations import (binned_density, density_bounds, small_groups, binned_distributions, kde_from_histogram, ecdf_steps, grouped_sums,
+                           CovarianceStats, covariance_stats, choose_color_column, stratified_sample)
 
 
 @apply_fuzzy_matching('x', 'y', 'size', 'color')
@@ -23,13 +28,47 @@ def plot_scatter(df: cudf.DataFrame, x: str, y: str, size: str, color: str = Non
     px.scatter: A Plotly Express scatter plot figure object.
 
     Notes:
-    - The DataFrame is sorted by the x column before plotting.
     - Missing values in the x, y, and size columns are filled with the mean of their respective columns.
+    - Frames with more than PLOT_AGGREGATE_MIN_ROWS rows are drawn as a 2-D density heatmap of point
+      counts, with the mean marker size per cell in the hover text, instead of one marker per row.
+      When color has at most PLOT_DENSITY_MAX_FACETS values, there is one heatmap per value on a shared
+      grid and colour scale; otherwise the colour grouping is left out and a note says so.
     - The background of the plot and paper is set to be transparent.
     """
-    df = df.sort_values(by=[x])  # Add sorting
-    df.fillna({x: df[x].mean(), y: df[y].mean(), size: df[size].mean()}, inplace=True)
-    fig = px.scatter(df.to_pandas(), x=x, y=y, size=size, color=color)
+    df = df.fillna({x: df[x].mean(), y: df[y].mean(), size: df[size].mean()})
+    if len(df) > PLOT_AGGREGATE_MIN_ROWS:
+        groups = small_groups(df, color, PLOT_DENSITY_MAX_FACETS) if color else None
+        facets = [(None, df)] if groups is None else [(group, df[df[color] == group]) for group in groups]
+        bounds = density_bounds(df, x, y)
+        columns = min(len(facets), 3)
+        rows = -(-len(facets) // columns)
+        fig = make_subplots(rows=rows, cols=columns, shared_xaxes=True, shared_yaxes=True,
+                            subplot_titles=[f"{color} = {group}" for group, _ in facets] if groups is not None else None)
+        for position, (group, facet) in enumerate(facets):
+            density = binned_density(facet, x, y, size, bounds=bounds)
+            fig.add_trace(go.Heatmap(
+                x=density.x_centers,
+                y=density.y_centers,
+                z=np.where(density.counts > 0, density.counts, np.nan),
+                customdata=density.size_means,
+                coloraxis='coloraxis',
+                name='' if group is None else str(group),
+                hovertemplate=f"{x}: %{{x:.3g}}<br>{y}: %{{y:.3g}}<br>count: %{{z}}<br>mean {size}: %{{customdata:.3g}}<extra>%{{fullData.name}}</extra>",
+            ), row=position // columns + 1, col=position % columns + 1)
+        fig.update_layout(coloraxis=dict(colorscale='Viridis', colorbar=dict(title='count')))
+        fig.update_xaxes(title_text=x, row=rows)
+        fig.update_yaxes(title_text=y, col=1)
+        if color and groups is None:
+            fig.add_annotation(
+                text=f"<b>{color} has more than {PLOT_DENSITY_MAX_FACETS} values, so points are not coloured by it</b>",
+                xref="paper", yref="paper",
+                x=0.5, y=1.05,
+                yshift=20,
+                showarrow=False,
+                font=dict(size=12)
+            )
+    else:
+        fig = px.scatter(df.to_pandas(), x=x, y=y, size=size, color=color)
     fig.update_layout({
         'plot_bgcolor': 'rgba(0, 0, 0, 0)',
         'paper_bgcolor': 'rgba(0, 0, 0, 0)',
@@ -108,10 +147,13 @@ def plot_comparison_bars(df: cudf.DataFrame, x: str, y: str, color: str) -> px.h
     color (str): The column name to be used for coloring the bars.
 
     Returns:
-    px.histogram: A Plotly histogram figure object with the grouped bar plot.
+    px.bar: A Plotly bar figure object with the grouped bar plot.
+
+    Notes:
+    - y is summed per (x, color) group in the frame's backend, so only one bar per group is sent to Plotly.
+    - A numeric x with many distinct values is binned first, as a histogram would.
     """
-    df = df.sort_values(by=[y], ascending=False)  # Sort by y-value descending
-    fig = px.histogram(df.to_pandas(), x=x, y=y, color=color, barmode="group")
+    fig = px.bar(grouped_sums(df, x, y, color), x=x, y=y, color=color, barmode="group")
     fig.update_traces(textposition='outside')
     fig.update_layout(
         plot_bgcolor='rgba(0, 0, 0, 0)',
@@ -188,9 +230,39 @@ def plot_violin(df: cudf.DataFrame, x: str, y: str, color: str) -> px.violin:
     color (str): The column name to be used for coloring the violins.
 
     Returns:
-    px.violin: A Plotly Express violin plot object.
+    go.Figure: A Plotly violin plot figure object.
+
+    Notes:
+    - Frames with more than PLOT_AGGREGATE_MIN_ROWS rows are drawn from precomputed per-category
+      densities and quartiles (one violin and box per x value) instead of every point.
     """
-    fig = px.violin(df.to_pandas(), x=x, y=y, color=color, box=True, points="all")
+    if len(df) <= PLOT_AGGREGATE_MIN_ROWS:
+        fig = px.violin(df.to_pandas(), x=x, y=y, color=color, box=True, points="all")
+    else:
+        fig = go.Figure()
+        palette = px.colors.qualitative.Plotly
+        distributions = binned_distributions(df, y, x)
+        for position, (name, distribution) in enumerate(distributions.items()):
+            low, q1, median, q3, high = distribution.quartiles
+            grid, density = kde_from_histogram(distribution)
+            inside = (grid >= low) & (grid <= high)
+            grid, density = grid[inside], density[inside]
+            half_width = 0.4 * density / density.max() if len(density) and density.max() > 0 else density
+            colour = palette[position % len(palette)]
+            fig.add_trace(go.Scatter(
+                x=np.concatenate([position - half_width, (position + half_width)[::-1]]),
+                y=np.concatenate([grid, grid[::-1]]),
+                fill='toself', mode='lines', line=dict(color=colour, width=1),
+                name=name, legendgroup=name, hoverinfo='skip',
+            ))
+            fig.add_trace(go.Box(
+                x=[position], q1=[q1], median=[median], q3=[q3], lowerfence=[low], upperfence=[high],
+                width=0.1, marker_color=colour, name=name, legendgroup=name, showlegend=False,
+            ))
+        fig.update_layout(
+            xaxis=dict(title=x, tickvals=list(range(len(distributions))), ticktext=list(distributions)),
+            yaxis_title=y,
+        )
     fig.update_layout({
         'plot_bgcolor': 'rgba(0, 0, 0, 0)',
         'paper_bgcolor': 'rgba(0, 0, 0, 0)',
@@ -208,9 +280,28 @@ def plot_ecdf(df: cudf.DataFrame, x: str, color: str) -> px.ecdf:
     color (str): The column name in the dataframe to be used for color coding the plot.
 
     Returns:
-    px.ecdf: A Plotly ECDF plot object.
+    go.Figure: A Plotly ECDF plot object with a marginal histogram.
+
+    Notes:
+    - Frames with more than PLOT_AGGREGATE_MIN_ROWS rows are drawn from binned cumulative counts as
+      step lines, with the marginal histogram built from the same bins.
     """
-    fig = px.ecdf(df.to_pandas(), x=x, color=color, marginal="histogram")
+    if len(df) <= PLOT_AGGREGATE_MIN_ROWS:
+        fig = px.ecdf(df.to_pandas(), x=x, color=color, marginal="histogram")
+    else:
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.25, 0.75], vertical_spacing=0.03)
+        palette = px.colors.qualitative.Plotly
+        for position, (name, distribution) in enumerate(binned_distributions(df, x, color).items()):
+            colour = palette[position % len(palette)]
+            centers = (distribution.edges[:-1] + distribution.edges[1:]) / 2
+            fig.add_trace(go.Bar(x=centers, y=distribution.counts, marker_color=colour, opacity=0.6,
+                                 name=name, legendgroup=name, showlegend=False), row=1, col=1)
+            steps_x, steps_y = ecdf_steps(distribution)
+            fig.add_trace(go.Scatter(x=steps_x, y=steps_y, mode='lines', line_shape='hv', line=dict(color=colour),
+                                     name=name, legendgroup=name), row=2, col=1)
+        fig.update_layout(barmode='overlay', bargap=0)
+        fig.update_xaxes(title_text=x, row=2, col=1)
+        fig.update_yaxes(title_text='probability', row=2, col=1)
     fig.update_layout({
         'plot_bgcolor': 'rgba(0, 0, 0, 0)',
         'paper_bgcolor': 'rgba(0, 0, 0, 0)',
@@ -218,26 +309,42 @@ def plot_ecdf(df: cudf.DataFrame, x: str, color: str) -> px.ecdf:
     return fig
 
 @apply_fuzzy_matching()
-def plot_parallel_coordinates(df: cudf.DataFrame) -> px.parallel_coordinates:
+def plot_parallel_coordinates(df: cudf.DataFrame, color: str = None, stats: CovarianceStats = None) -> px.parallel_coordinates:
     """
     Generates a parallel coordinates plot using Plotly for the given cuDF DataFrame.
 
     Parameters:
     df (cudf.DataFrame): The input cuDF DataFrame containing the data to be plotted.
+    color (str, optional): The numeric column used as the color dimension. Defaults to the column most
+        correlated with the others.
+    stats (CovarianceStats, optional): Precomputed covariance statistics of df. Computed if omitted.
 
     Returns:
     px.parallel_coordinates: A Plotly parallel coordinates figure object.
 
     Notes:
-    - The DataFrame is converted to a pandas DataFrame before plotting.
-    - The plot uses 'total_bill' as the color dimension.
-    - The color scale used is 'Tealrose' from Plotly's diverging color scales.
-    - The color midpoint is set to 2.
+    - At most PLOT_PARALLEL_MAX_DIMENSIONS axes are drawn: the color column and the columns most correlated with it.
+    - At most about PLOT_PARALLEL_MAX_ROWS lines are drawn, sampled in proportion to the lowest-cardinality
+      categorical column so small groups stay visible.
+    - The color scale used is 'Tealrose' from Plotly's diverging color scales, centred on the column median.
     - The background of the plot and paper is set to be transparent.
     """
-    fig = px.parallel_coordinates(df.to_pandas(), color="total_bill",
-                                   color_continuous_scale=px.colors.diverging.Tealrose,
-                                   color_continuous_midpoint=2)
+    stats = stats if stats is not None else covariance_stats(df)
+    color = color if color in stats.columns else choose_color_column(stats)
+    if color is None:
+        return None
+    strength = stats.correlation[color].abs().fillna(0.0).drop(color).sort_values(ascending=False)
+    dimensions = [color] + strength.index[:PLOT_PARALLEL_MAX_DIMENSIONS - 1].tolist()
+
+    categorical = df.select_dtypes(include=['object', 'string']).columns.tolist()
+    cardinality = {c: int(df[c].nunique()) for c in categorical}
+    strata = [c for c in categorical if 2 <= cardinality[c] <= PLOT_PARALLEL_MAX_STRATA]
+    strata = min(strata, key=cardinality.get) if strata else None
+    sample = stratified_sample(df[dimensions + ([strata] if strata else [])], PLOT_PARALLEL_MAX_ROWS, strata)
+
+    fig = px.parallel_coordinates(sample[dimensions].to_pandas(), color=color, dimensions=dimensions,
+                                  color_continuous_scale=px.colors.diverging.Tealrose,
+                                  color_continuous_midpoint=float(df[color].median()))
     fig.update_layout({
         'plot_bgcolor': 'rgba(0, 0, 0, 0)',
         'paper_bgcolor': 'rgba(0, 0, 0, 0)',
@@ -246,21 +353,27 @@ def plot_parallel_coordinates(df: cudf.DataFrame) -> px.parallel_coordinates:
     return fig
 
 @apply_fuzzy_matching()
-def plot_heatmap(df: cudf.DataFrame) -> px.parallel_coordinates:
+def plot_heatmap(df: cudf.DataFrame, stats: CovarianceStats = None) -> go.Figure:
     """
-    Generates a heatmap plot from a cuDF DataFrame using Plotly.
+    Generates a correlation-matrix heatmap of the numeric columns of a cuDF DataFrame using Plotly.
 
     Parameters:
     df (cudf.DataFrame): The input DataFrame containing the data to be plotted.
+    stats (CovarianceStats, optional): Precomputed covariance statistics of df. Computed if omitted.
 
     Returns:
-    px.parallel_coordinates: A Plotly figure object representing the heatmap.
+    go.Figure: A Plotly figure object representing the heatmap.
 
     Notes:
-    - The DataFrame is converted to a pandas DataFrame before plotting.
+    - Only the correlation matrix (at most PLOT_HEATMAP_MAX_COLUMNS columns square) is sent to Plotly,
+      never the rows themselves.
     - The background color of the plot and paper is set to transparent.
     """
-    fig = px.imshow(df.to_pandas())
+    stats = stats if stats is not None else covariance_stats(df)
+    if len(stats.columns) < 2:
+        return None
+    fig = px.imshow(stats.correlation.round(2), text_auto=len(stats.columns) <= 12, zmin=-1, zmax=1,
+                    color_continuous_scale=px.colors.diverging.RdBu, color_continuous_midpoint=0)
     fig.update_layout({
         'plot_bgcolor': 'rgba(0, 0, 0, 0)',
         'paper_bgcolor': 'rgba(0, 0, 0, 0)',
@@ -274,13 +387,13 @@ def plot_pie(df: cudf.DataFrame, x: str, y: str) -> px.pie:
 
     Parameters:
     df (cudf.DataFrame): The cuDF DataFrame containing the data.
-    x (str): The column name for the values of the pie chart.
-    y (str): The column name for the names of the pie chart slices.
+    x (str): The column name for the names of the pie chart slices.
+    y (str): The column name for the values of the pie chart.
 
     Returns:
     px.pie: A Plotly Express pie chart figure object.
     """
-    fig = px.pie(df.to_pandas(), values=x, names=y, color_discrete_sequence=px.colors.sequential.RdBu)
+    fig = px.pie(df.to_pandas(), names=x, values=y, color_discrete_sequence=px.colors.sequential.RdBu)
     fig.update_layout({
         'plot_bgcolor': 'rgba(0, 0, 0, 0)',
         'paper_bgcolor': 'rgba(0, 0, 0, 0)',
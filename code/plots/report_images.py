@@ -0,0 +1,161 @@
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple
+import numpy as np
+import plotly.io as pio
+from plots.plot_export import ExportSettings, plot_exporter
+from utils.artifact_store import artifact_store
+from utils.constants import (REPORT_IMAGE_WIDTH, REPORT_IMAGE_HEIGHT, REPORT_SVG_MAX_POINTS,
+                             SLIDE_IMAGE_DPI, REPORT_IMAGE_COLORS)
+
+logger = logging.getLogger('report_images')
+
+EMU_PER_INCH = 914400
+CSS_DPI = 96
+# Trace types plotly draws with WebGL; their SVG export is a raster image wrapped in SVG.
+WEBGL_TRACE_TYPES = {"scattergl", "splom", "parcoords", "heatmapgl", "pointcloud", "scatter3d", "surface", "mesh3d",
+                     "volume", "isosurface", "cone", "streamtube"}
+POINT_KEYS = ("x", "y", "z", "values", "dimensions")
+
+
+def _point_count(trace: dict) -> int:
+    count = 0
+    for key in POINT_KEYS:
+        value = trace.get(key)
+        if isinstance(value, dict) and "bdata" in value:
+            # A typed array; its length follows from the decoded byte count.
+            count = max(count, len(value["bdata"]) * 3 // 4 // np.dtype(value["dtype"]).itemsize)
+        elif isinstance(value, (list, tuple)):
+            count = max(count, sum(len(item) if isinstance(item, (list, tuple)) else 1 for item in value))
+    return count
+
+
+def svg_supported(figure: dict) -> bool:
+    """
+    Returns whether a figure is worth embedding as vector SVG.
+
+    WebGL traces only export as embedded rasters, and very dense traces make SVG larger and slower
+    to lay out than a PNG, so both fall back to a raster.
+    """
+    traces = figure.get("data", [])
+    if any(trace.get("type", "scatter") in WEBGL_TRACE_TYPES for trace in traces):
+        return False
+    return sum(_point_count(trace) for trace in traces) <= REPORT_SVG_MAX_POINTS
+
+
+def pdf_settings(figure: dict) -> ExportSettings:
+    """
+    Returns the export settings for a figure embedded in the PDF report: SVG where supported,
+    otherwise a palette PNG at print resolution.
+    """
+    if svg_supported(figure):
+        return ExportSettings(format="svg", width=REPORT_IMAGE_WIDTH, height=REPORT_IMAGE_HEIGHT)
+    return ExportSettings(format="png", width=REPORT_IMAGE_WIDTH, height=REPORT_IMAGE_HEIGHT, colors=REPORT_IMAGE_COLORS)
+
+
+def slide_settings(width_emu: int, height_emu: int) -> ExportSettings:
+    """
+    Returns the export settings for a figure filling a slide placeholder of the given size.
+
+    The figure is laid out at the placeholder's exact size, so PowerPoint neither crops nor rescales it.
+    """
+    return ExportSettings(format="png", width=max(round(width_emu * CSS_DPI / EMU_PER_INCH), 1),
+                          height=max(round(height_emu * CSS_DPI / EMU_PER_INCH), 1),
+                          dpi=SLIDE_IMAGE_DPI, colors=REPORT_IMAGE_COLORS)
+
+
+def store_figure(figure: Any) -> Optional[str]:
+    """
+    Serializes a figure once and keeps the JSON in the artifact store.
+
+    The stored JSON is the single source for every image rendered from the figure, for the PDF now
+    and for slides later, so nothing is decoded or re-serialized per target.
+
+    Args:
+        figure (Any): A plotly figure, or None.
+
+    Returns:
+        Optional[str]: The artifact id of the figure JSON, or None.
+    """
+    if figure is None:
+        return None
+    return artifact_store.put(pio.to_json(figure, validate=False).encode("utf-8"), "json")
+
+
+def _figure_json(figure_artifact: str) -> Optional[str]:
+    data = artifact_store.read(figure_artifact) if figure_artifact else None
+    return data.decode("utf-8") if data is not None else None
+
+
+async def export_pdf_images(figure_artifacts: List[Optional[str]]) -> List[Optional[str]]:
+    """
+    Renders the PDF image of each stored figure in parallel.
+
+    Args:
+        figure_artifacts (List[Optional[str]]): Figure JSON artifact ids; None entries are passed through.
+
+    Returns:
+        List[Optional[str]]: Image artifact ids (SVG or PNG) in input order, None where an export failed.
+    """
+    start = time.perf_counter()
+    figure_jsons = [_figure_json(figure_artifact) for figure_artifact in figure_artifacts]
+    settings = [pdf_settings(json.loads(figure_json)) if figure_json else None for figure_json in figure_jsons]
+    # One batch per distinct setting; the batches run concurrently on the shared renderer pool.
+    targets = list(dict.fromkeys(target for target in settings if target is not None))
+    batches = [[index for index, target in enumerate(settings) if target == current] for current in targets]
+    results = await asyncio.gather(*[plot_exporter.export_async([figure_jsons[index] for index in batch], target)
+                                     for batch, target in zip(batches, targets)])
+
+    images: List[Optional[str]] = [None] * len(figure_jsons)
+    for batch, target, batch_images in zip(batches, targets, results):
+        for index, image in zip(batch, batch_images):
+            images[index] = artifact_store.put(image, target.format) if image else None
+    svg_count = sum(target is not None and target.format == "svg" for target in settings)
+    logger.info(f"Exported {sum(image is not None for image in images)} PDF images ({svg_count} as SVG) "
+                f"in {time.perf_counter() - start:.3f}s")
+    return images
+
+
+def prefetch_slide_images(figure_artifacts: Iterable[Optional[str]], sizes: Iterable[Tuple[int, int]]):
+    """
+    Starts rendering slide images for each figure at each placeholder size, without waiting.
+
+    The renders are picked up by `slide_image`, which the exporter answers from its in-flight
+    futures and cache, so a deck's images render in parallel while its slides are being built.
+
+    Args:
+        figure_artifacts (Iterable[Optional[str]]): Figure JSON artifact ids; None entries are skipped.
+        sizes (Iterable[Tuple[int, int]]): Placeholder (width, height) sizes in EMU.
+    """
+    sizes = list(dict.fromkeys(sizes))
+    for figure_artifact in figure_artifacts:
+        figure_json = _figure_json(figure_artifact)
+        if figure_json is None:
+            continue
+        for width, height in sizes:
+            try:
+                plot_exporter.submit(figure_json, slide_settings(width, height))
+            except Exception as e:
+                logger.error(f"Error scheduling slide image: {str(e)}")
+
+
+def slide_image(figure_artifact: str, width_emu: int, height_emu: int) -> Optional[Path]:
+    """
+    Returns a stored palette PNG of a figure rendered at a slide placeholder's size.
+
+    Args:
+        figure_artifact (str): The figure JSON artifact id.
+        width_emu (int): The placeholder width in EMU.
+        height_emu (int): The placeholder height in EMU.
+
+    Returns:
+        Optional[Path]: The image file path, or None if the figure is gone or the export failed.
+    """
+    figure_json = _figure_json(figure_artifact)
+    if figure_json is None:
+        return None
+    image = plot_exporter.export([figure_json], slide_settings(width_emu, height_emu))[0]
+    return artifact_store.path(artifact_store.put(image, "png")) if image else None
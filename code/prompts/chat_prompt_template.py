@@ -6,6 +6,7 @@ You have access to a dataframe with the following columns:
 Categorical Columns: {{categorical_columns}}
 Numeric Columns: {{numeric_columns}}
 Datetime Columns: {{datetime_columns}}
+{{column_note}}
 
 The dataframe is already loaded and you may reference it as df. You do not need to instantiate it or create it.
 
@@ -60,4 +61,18 @@ fig = px.scatter(df, x='Season', y='Humidity', trendline='ols', title='Humidity
 Please provide a response to the user's latest message, including code where needed, and a figure.
 
 User's latest message: {{user_input}}
-""")
\ No newline at end of file
+""")
+summary_prompt = dedent("""
+You are maintaining a running summary of a conversation between a user and a data analysis assistant.
+
+Current summary:
+{summary}
+
+New messages to fold into the summary:
+{transcript}
+
+Rewrite the summary so it includes the new messages. Keep the user's goals, the columns and filters
+that were discussed, the key numbers and findings, and which figures were produced. Code blocks appear
+as references like [code ab12cd34: ...]; keep a reference only if the user is likely to ask about it again.
+Use at most {max_words} words of plain text. Return only the summary.
+""")
@@ -52,11 +52,8 @@ The section you are writing is as follows:
 
 User Query: {user_query}
 
-Schema:
-{schema}
-
-Summary:
-{summary}
+Dataset:
+{dataset_context}
 
 CRITICAL: Only use information directly present in the dataset as described above. Do not introduce any external information or assumptions. Do not mention any specific entities, platforms, tools, or channels that are not explicitly present in this dataset.
 
@@ -2,7 +2,7 @@ import asyncio
 from typing import Any, Dict, List, Tuple
 from .create_sections import get_outline, summarize_section_async, write_section_async, write_recommendations_conclusions_async
 from utils.utilities import generate_plot_title, extract_table_from_content
-from plots.plot_factory import parse_llm_response
+from plots.plot_factory import parse_llm_response, recommend_section_plots
 from utils.cache_config import cache, cache_key
 
 async def create_final_report(query: str, max_samples: int = 10000) -> Tuple[str, List[Tuple[str, Tuple[str, Any, Any]]], str, Dict[str, Any]]:
@@ -32,9 +32,12 @@ async def create_final_report(query: str, max_samples: int = 10000) -> Tuple[str
 
     section_results = await asyncio.gather(*section_tasks)
     
+    plot_recommendations = await recommend_section_plots(section_names, max_samples=max_samples)
+
     summarized_sections = []
     for i, (section_name, section_content) in enumerate(section_results):
-        plot, plot_data, plot_config = await parse_llm_response(section_name, max_samples=max_samples)
+        plot, figure_ref, plot_config = await parse_llm_response(section_name, max_samples=max_samples,
+                                                                  recommendation=plot_recommendations.get(section_name))
        
         summary = await summarize_section_async(section_content)
         summarized_sections.append((section_name, summary))
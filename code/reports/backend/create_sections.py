@@ -1,69 +1,114 @@
+from typing import Any, AsyncIterator, Callable, Optional, Tuple
 
 from prompts.report_prompt_template import prepare_outline_prompt, summarize_prompt, write_section_prompt, write_recommendations_conclusions_prompt
 from utils.cache_config import cache, cache_key
-import json
 from utils.utilities import parse_and_correct_json
-from .llm_report_handling import get_outline_response, get_llm_response_for_section
-from utils.data_cache import cached_get_summary, cached_get_schema
+from utils.configs import get_llm
+from utils.prompt_context import build_dataset_context
+from utils.column_index import relevant_columns
+from utils.json_stream import IncrementalJSONParser
+from .llm_report_handling import stream_outline_response, get_llm_response_for_section
+from .section_cache import section_key, content_key, get_part, set_part
 
 
-async def get_outline(query: str):
+def _is_section_name(path) -> bool:
+    # ('Sections', <index>, 'Section_Name')
+    return len(path) == 3 and path[0] == 'Sections' and path[2] == 'Section_Name'
+
+
+async def stream_outline(query: str) -> AsyncIterator[Tuple[str, Any]]:
     """
-    Generates an outline for a report based on the provided query.
+    Generates an outline for a report, yielding its parts as soon as they are complete.
 
-    This function attempts to retrieve a cached outline for the given query.
-    If no cached result is found, it generates a new outline by fetching the
-    schema and summary, preparing the context, and making an asynchronous
-    request to get the outline response. The result is then cached for future
-    use.
+    The outline is requested as a stream and parsed incrementally, so each section name is yielded
+    the moment its string closes, while the rest of the outline is still being generated. If nothing
+    could be parsed incrementally, the full response is parsed and repaired at the end. Outlines are
+    cached per query; a cached outline is replayed as the same events.
 
     Args:
         query (str): The query string for which the outline is to be generated.
 
-    Returns:
-        tuple: A tuple containing the report title (str), a list of section names (list of str),
-               and the number of sections (int). In case of an error, returns a default error
-               report with a single error section.
+    Yields:
+        tuple: ('title', str) for the report title, ('section', str) for each section name, and finally
+               ('outline', (report_title, section_names, num_sections)). If the stream fails, the final
+               outline keeps the sections yielded so far, or is a default error report with a single error section.
     """
-    
     outline_key = cache_key(query)
     cached_result = cache.get(outline_key)
     if cached_result is not None:
-        return cached_result
-
+        report_title, section_names, _ = cached_result
+        yield 'title', report_title
+        for section_name in section_names:
+            yield 'section', section_name
+        yield 'outline', cached_result
+        return
+
+    report_title, section_names = None, []
     try:
-        schema = cached_get_schema()
-        summary = cached_get_summary()
-
-        columns = schema.get('columns', [])
-        columns_str = ', '.join(columns)
-        summary_str = json.dumps(summary, indent=2)
+        dataset_context = build_dataset_context(columns=relevant_columns(query), provider=get_llm("outline").config.provider)
 
         context = f"""
-        Columns:
-        {columns_str}
-
-        Summary:
-        {summary_str}
+        Dataset:
+        {dataset_context}
 
         Query:
         {query}
         """
 
         prompt = prepare_outline_prompt.replace("{dataset_context}", context)
-        response = await get_outline_response(prompt)
-        outline = parse_and_correct_json(response)
-
-        report_title = outline['Report_Title']
-        section_names = [section['Section_Name'] for section in outline['Sections']]
-        num_sections = len(section_names)
-
-        result = (report_title, section_names, num_sections)
+        parser, chunks = IncrementalJSONParser(), []
+        async for chunk in stream_outline_response(prompt):
+            chunks.append(chunk)
+            for path, value in parser.feed(chunk):
+                if not isinstance(value, str) or not value.strip():
+                    continue
+                if path == ('Report_Title',) and report_title is None:
+                    report_title = value
+                    yield 'title', value
+                elif _is_section_name(path):
+                    section_names.append(value)
+                    yield 'section', value
+
+        if report_title is None or not section_names:
+            outline = parse_and_correct_json("".join(chunks))
+            if report_title is None:
+                report_title = outline['Report_Title']
+                yield 'title', report_title
+            if not section_names:
+                for section in outline['Sections']:
+                    section_names.append(section['Section_Name'])
+                    yield 'section', section['Section_Name']
+
+        result = (report_title, section_names, len(section_names))
 
         cache.set(outline_key, result, timeout=300)
-        return result
     except Exception as e:
-        return "Error Report", ["Error Section"], 1
+        # Sections that were already yielded may be in use, so a stream that breaks off keeps them.
+        result = (report_title or "Error Report", section_names, len(section_names)) if section_names else ("Error Report", ["Error Section"], 1)
+    yield 'outline', result
+
+
+async def get_outline(query: str, on_section: Optional[Callable[[str], None]] = None):
+    """
+    Generates an outline for a report based on the provided query.
+
+    The outline is streamed (see `stream_outline`); `on_section` is called with each section name as
+    soon as it is generated, so work on a section can start before the outline is finished.
+
+    Args:
+        query (str): The query string for which the outline is to be generated.
+        on_section (Optional[Callable[[str], None]], optional): Called with each section name as it arrives. Defaults to None.
+
+    Returns:
+        tuple: A tuple containing the report title (str), a list of section names (list of str),
+               and the number of sections (int). In case of an error, returns a default error
+               report with a single error section.
+    """
+    async for event, value in stream_outline(query):
+        if event == 'section' and on_section is not None:
+            on_section(value)
+        elif event == 'outline':
+            return value
 
 async def summarize_section_async(section_result: str):
     """
@@ -75,14 +120,24 @@ async def summarize_section_async(section_result: str):
     Returns:
         str: The summarized text of the section.
     """
+    key = content_key("summary", section_result, task="summary")
+    cached_summary = get_part(key)
+    if cached_summary is not None:
+        return cached_summary
+
     prompt = summarize_prompt.replace("{section_content}", section_result)
-    response = await get_llm_response_for_section(prompt)
+    response = await get_llm_response_for_section(prompt, task="summary")
+    if not response.startswith("Error"):
+        set_part(key, response)
     return response
 
 async def write_section_async(section_name: str, query: str):
     """
     Asynchronously generates content for a given section using a language model.
 
+    Content is cached per dataset version, query, section name and LLM configuration, so re-submitting
+    a report with sections added, removed or reordered only generates the new sections.
+
     Args:
         section_name (str): The name of the section to generate content for.
         query (str): The user query to be included in the prompt.
@@ -93,16 +148,19 @@ async def write_section_async(section_name: str, query: str):
     Raises:
         Exception: If there is an error generating content for the section.
     """
-    schema = cached_get_schema()
-    summary = cached_get_summary()
-
-    schema_str = json.dumps(schema, indent=2)
-    summary_str = json.dumps(summary, indent=2)
-
-    prompt = write_section_prompt.replace("{section_name}", section_name).replace("{user_query}", query).replace("{schema}", schema_str).replace("{summary}", summary_str)
     try:
-        response = await get_llm_response_for_section(prompt, section_name)
-        return (section_name, response.strip())
+        key = section_key("content", query, section_name)
+        cached_content = get_part(key)
+        if cached_content is not None:
+            return (section_name, cached_content)
+
+        dataset_context = build_dataset_context(columns=relevant_columns(f"{section_name} {query}"),
+                                                provider=get_llm("section").config.provider)
+        prompt = write_section_prompt.replace("{section_name}", section_name).replace("{user_query}", query).replace("{dataset_context}", dataset_context)
+        response = (await get_llm_response_for_section(prompt, section_name)).strip()
+        if not response.startswith("Error"):
+            set_part(key, response)
+        return (section_name, response)
     except Exception as e:
         return (section_name, f"Error generating content for this section: {str(e)}")
 
@@ -120,8 +178,14 @@ async def write_recommendations_conclusions_async(section_results):
         Exception: If there is an issue with generating the response from the language model.
     """
     combined_sections = "\n\n".join([f"{name}\n{content}" for name, content in section_results])
+    key = content_key("end_matter", combined_sections)
+    cached_end_matter = get_part(key)
+    if cached_end_matter is not None:
+        return cached_end_matter
 
     prompt = write_recommendations_conclusions_prompt.replace("{combined_sections}", combined_sections)
 
     response = await get_llm_response_for_section(prompt, "Recommendations and Conclusions")
+    if not response.startswith("Error"):
+        set_part(key, response)
     return response
\ No newline at end of file
@@ -1,47 +1,48 @@
-import re
-import asyncio
 from utils.configs import get_llm
-from utils.data_cache import cached_get_summary, cached_get_schema, cached_data_retrieval
+from .tool_executor import execute_tool_calls
 
-async def get_outline_response(prompt):
-    context = f"""
+def _outline_context(prompt):
+    return f"""
     Using the provided context, generate an outline for a report based on the dataset.
     
     Context: {prompt}
     """
-    llm = get_llm()
-    response = await asyncio.to_thread(llm.get_response, context)
-    
-    return response
 
-async def get_llm_response_for_section(prompt: str, section_name: str = None):
+async def stream_outline_response(prompt):
+    """
+    Streams the outline response chunk by chunk, so the outline can be parsed while it is generated.
+
+    Args:
+        prompt (str): The outline prompt, including the dataset context and query.
+
+    Yields:
+        str: The response text as it arrives.
+    """
+    llm = get_llm("outline")
+    async for chunk in llm.get_aresponse(_outline_context(prompt)):
+        yield chunk
+
+async def get_llm_response_for_section(prompt: str, section_name: str = None, task: str = "section"):
     """
     Asynchronously generates a response for a given section using a language model (LLM) based on a provided prompt and section name.
     Args:
         prompt (str): The prompt to guide the LLM's analysis.
         section_name (str, optional): The name of the section being analyzed. Defaults to None.
+        task (str, optional): The task type the LLM is routed by (see LLM_TASKS). Defaults to "section".
     Returns:
         str: The response generated by the LLM, with any function calls replaced by their respective results. If an error occurs, an error message is returned.
     Raises:
         Exception: If there is an error in generating the LLM response or executing the function calls.
     Notes:
-        - The function uses cached schema and summary data to provide context to the LLM.
+        - The dataset description is expected to be part of `prompt` already; it is not repeated here.
         - The LLM is instructed to use specific functions to retrieve additional data as needed.
-        - The function calls in the LLM's response are executed and their results are substituted back into the response.
+        - The function calls in the LLM's response are parsed, deduplicated and executed concurrently by
+          `execute_tool_calls`, and their results are spliced back into the response in one pass.
         - If the LLM cannot answer the prompt using the available data, it is instructed to say so explicitly.
     """
-    schema = cached_get_schema()
-    summary = cached_get_summary()
-    
     context = f"""
     You are an AI assistant analyzing a dataset for the section: {section_name}
 
-    Here's the schema of the dataset:
-    {schema}
-
-    And here's a summary of the dataset:
-    {summary}
-
     You can use these functions to get additional data as needed:
     
     1. get_sample(n=5): Get n sample rows
@@ -61,23 +62,10 @@ async def get_llm_response_for_section(prompt: str, section_name: str = None):
     If you cannot answer the prompt using the available data, say so explicitly.
     DO NOT make up or assume any information that is not provided by these functions.
     """
-    llm = get_llm()
+    llm = get_llm(task)
     try:
-        response = await asyncio.to_thread(llm.get_response, context)
+        response = await llm.get_acompletion(context)
     except Exception as e:
         return f"Error: {str(e)}"
 
-    function_calls = re.findall(r'(get_\w+\([^)]*\))', response)
-    
-    for full_call in function_calls:
-        try:
-            func_name, args_str = full_call.split('(', 1)
-            args_str = args_str.rstrip(')')
-            args = [eval(arg.strip()) for arg in args_str.split(',') if arg.strip()]
-            result = cached_data_retrieval(func_name, *args)
-        except Exception as e:
-            result = f"Error executing {full_call}: {str(e)}"
-
-        response = response.replace(full_call, str(result))
-
-    return response
\ No newline at end of file
+    return await execute_tool_calls(response)
@@ -0,0 +1,84 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import Future
+from typing import Dict, Optional
+from utils.background import background_loop
+from utils.cache_config import cache
+from utils.constants import REPORT_SPECULATIVE_SECTIONS, REPORT_OUTLINE_PROGRESS_TIMEOUT
+from .create_sections import stream_outline
+from .speculation import section_speculator
+
+logger = logging.getLogger('outline_stream')
+
+_streams: Dict[str, Future] = {}
+_streams_lock = threading.Lock()
+
+
+def _progress_key(stream_id: str) -> str:
+    return f"outline_progress_{stream_id}"
+
+
+async def _run(stream_id: str, query: str):
+    progress = {"report_title": "", "sections": [], "done": False}
+    async for event, value in stream_outline(query):
+        if event == 'title':
+            progress["report_title"] = value
+        elif event == 'section':
+            progress["sections"].append(value)
+            if REPORT_SPECULATIVE_SECTIONS:
+                # Start writing the section while the rest of the outline is still being generated.
+                section_speculator.start(query, [value])
+        elif event == 'outline':
+            report_title, section_names, _ = value
+            progress = {"report_title": report_title, "sections": list(section_names), "done": True}
+        # Progress goes through the disk cache so any app worker can serve the polling callback.
+        cache.set(_progress_key(stream_id), progress, timeout=REPORT_OUTLINE_PROGRESS_TIMEOUT)
+
+
+def start_outline(query: str) -> str:
+    """
+    Starts streaming an outline in the background.
+
+    Args:
+        query (str): The report query.
+
+    Returns:
+        str: The stream id to poll with `get_outline_progress`.
+    """
+    stream_id = uuid.uuid4().hex
+    cache.set(_progress_key(stream_id), {"report_title": "", "sections": [], "done": False},
+              timeout=REPORT_OUTLINE_PROGRESS_TIMEOUT)
+    future = background_loop.submit(_run(stream_id, query))
+    with _streams_lock:
+        _streams[stream_id] = future
+    future.add_done_callback(lambda _: _forget(stream_id))
+    return stream_id
+
+
+def _forget(stream_id: str):
+    with _streams_lock:
+        _streams.pop(stream_id, None)
+
+
+def get_outline_progress(stream_id: str) -> Optional[dict]:
+    """
+    Returns the outline generated so far.
+
+    Args:
+        stream_id (str): The stream id returned by `start_outline`.
+
+    Returns:
+        Optional[dict]: 'report_title', 'sections' (the names so far) and 'done', or None for an unknown stream.
+    """
+    return cache.get(_progress_key(stream_id)) if stream_id else None
+
+
+def stop_outline(stream_id: str):
+    """
+    Stops an outline stream that is no longer needed, e.g. because the user submitted or closed the modal.
+    """
+    with _streams_lock:
+        future = _streams.pop(stream_id, None)
+    if future is not None and future.cancel():
+        logger.info(f"Stopped outline stream {stream_id}")
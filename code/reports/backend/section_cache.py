@@ -0,0 +1,63 @@
+import logging
+from typing import Any, Optional
+from utils.artifact_store import artifact_store
+from utils.cache_config import cache, cache_key
+from utils.configs import llm_cache_identity
+from utils.utilities import get_dataset_version
+from utils.constants import REPORT_SECTION_CACHE_TIMEOUT
+
+logger = logging.getLogger('section_cache')
+
+
+def section_key(kind: str, query: str, section_name: str, *extra: Any, task: str = "section") -> str:
+    """
+    Returns the cache key of one part of one report section.
+
+    Keys cover the dataset version, the query, the section name and the LLM configuration, so a
+    section is reused across reports that share it and recomputed when the data or model changes.
+
+    Args:
+        kind (str): The part of the section, e.g. 'content' or 'plot'.
+        query (str): The report query.
+        section_name (str): The section name.
+        *extra (Any): Anything else the part depends on.
+        task (str, optional): The LLM task type that produces the part. Defaults to "section".
+
+    Returns:
+        str: The cache key.
+    """
+    return f"section_{kind}_" + cache_key(get_dataset_version(), query, section_name, llm_cache_identity(task), *extra)
+
+
+def content_key(kind: str, *content: Any, task: str = "section") -> str:
+    """
+    Returns the cache key of a part derived only from generated content and the LLM configuration,
+    such as a section summary or the end matter, under the LLM routed for `task`.
+    """
+    return f"section_{kind}_" + cache_key(llm_cache_identity(task), *content)
+
+
+def get_part(key: str) -> Optional[Any]:
+    part = cache.get(key)
+    if part is not None:
+        logger.info(f"Reusing cached report part {key}")
+    return part
+
+
+def set_part(key: str, part: Any):
+    cache.set(key, part, timeout=REPORT_SECTION_CACHE_TIMEOUT)
+
+
+def get_section_plot(key: str) -> Optional[dict]:
+    """
+    Returns a cached section plot record, or None if there is none or its stored images have been evicted.
+
+    A record holds the section's 'plot_image', 'plot_config', 'figure_ref' and 'figure_source'.
+    """
+    section_plot = get_part(key)
+    if section_plot is None:
+        return None
+    for artifact in (section_plot.get('plot_image'), section_plot.get('figure_source')):
+        if artifact and artifact_store.path(artifact) is None:
+            return None
+    return section_plot
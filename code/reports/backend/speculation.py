@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, Iterable, Tuple
+from utils.background import background_loop
+from .create_sections import write_section_async
+from .section_cache import section_key
+
+logger = logging.getLogger('speculation')
+
+
+class SectionSpeculator:
+    """
+    Writes the sections of a proposed outline in the background while the user reviews it.
+
+    Speculative sections are keyed like the section cache (dataset version, query, section name and LLM
+    configuration), so a finished one is also in the cache and a submitted report reuses it either way.
+    Sections the user unticks are cancelled, and renamed or added sections simply start fresh.
+
+    Methods:
+        start(query, section_names):
+            Starts writing every section that is not already being written.
+        keep_only(query, section_names):
+            Cancels the query's speculative sections that are not in section_names.
+        cancel(query):
+            Cancels all of the query's speculative sections.
+        write_section(section_name, query):
+            Returns the section, awaiting its speculative run if there is one.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running: Dict[str, Tuple[str, str, Future]] = {}
+
+    def start(self, query: str, section_names: Iterable[str]):
+        try:
+            keys = [(section_key("content", query, name), name) for name in section_names]
+        except Exception as e:
+            logger.error(f"Error starting speculative sections: {str(e)}")
+            return
+        with self._lock:
+            for key, name in keys:
+                if key in self._running:
+                    continue
+                future = background_loop.submit(write_section_async(name, query))
+                self._running[key] = (query, name, future)
+                future.add_done_callback(lambda _, key=key: self._forget(key))
+        logger.info(f"Speculatively writing {len(keys)} sections")
+
+    def _forget(self, key: str):
+        # Finished sections are served from the section cache from here on.
+        with self._lock:
+            self._running.pop(key, None)
+
+    def keep_only(self, query: str, section_names: Iterable[str]):
+        keep = set(section_names)
+        with self._lock:
+            cancelled = [future for running_query, name, future in self._running.values()
+                         if running_query == query and name not in keep]
+        for future in cancelled:
+            future.cancel()
+        if cancelled:
+            logger.info(f"Cancelled {len(cancelled)} speculative sections")
+
+    def cancel(self, query: str):
+        self.keep_only(query, ())
+
+    async def write_section(self, section_name: str, query: str) -> Tuple[str, str]:
+        """
+        Returns (section_name, content) like `write_section_async`, without writing a section twice.
+
+        Args:
+            section_name (str): The name of the section.
+            query (str): The user query.
+
+        Returns:
+            tuple: The section name and its content or an error message.
+        """
+        with self._lock:
+            running = self._running.get(section_key("content", query, section_name))
+        if running is not None:
+            try:
+                return await asyncio.wrap_future(running[2])
+            except asyncio.CancelledError:
+                if not running[2].cancelled():
+                    raise
+        return await write_section_async(section_name, query)
+
+
+section_speculator = SectionSpeculator()
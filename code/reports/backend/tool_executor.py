@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from utils.data_cache import cached_data_retrieval
+from utils.constants import TOOL_CALL_CONCURRENCY, TOOL_CALL_TIMEOUT
+
+logger = logging.getLogger('tool_executor')
+
+TOOL_NAMES = ("get_sample", "get_column_stats", "get_value_counts", "sum_single_column", "detect_outliers")
+
+_CALL_START = re.compile(r'\b(' + '|'.join(TOOL_NAMES) + r')\s*\(')
+_NUMBER = re.compile(r'[-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?')
+_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_BARE_WORDS = {"True": True, "False": False, "None": None}
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\", "'": "'", '"': '"'}
+
+
+class ToolCall(NamedTuple):
+    """
+    A single tool call found in an LLM response.
+
+    Attributes:
+        name (str): The tool name, e.g. 'get_column_stats'.
+        args (tuple): Positional argument values.
+        kwargs (tuple): Keyword arguments as sorted (name, value) pairs.
+        start (int): Offset of the first character of the call in the response.
+        end (int): Offset one past the closing parenthesis.
+    """
+    name: str
+    args: tuple
+    kwargs: tuple
+    start: int
+    end: int
+
+    @property
+    def key(self) -> Tuple[str, tuple, tuple]:
+        return (self.name, self.args, self.kwargs)
+
+
+def _tokenize_arguments(text: str, pos: int) -> Optional[Tuple[List[Tuple[str, Any]], int]]:
+    """
+    Tokenizes a call's argument list starting just after the opening parenthesis.
+
+    Args:
+        text (str): The full response text.
+        pos (int): Offset just after the opening parenthesis.
+
+    Returns:
+        Optional[Tuple[List[Tuple[str, Any]], int]]: The tokens as (kind, value) pairs and the offset
+        one past the closing parenthesis, or None if the argument list is not well formed.
+    """
+    tokens = []
+    length = len(text)
+    while pos < length:
+        char = text[pos]
+        if char.isspace():
+            pos += 1
+        elif char == ')':
+            return tokens, pos + 1
+        elif char in ',=':
+            tokens.append((char, char))
+            pos += 1
+        elif char in '"\'':
+            value = []
+            pos += 1
+            while pos < length and text[pos] != char:
+                if text[pos] == '\\' and pos + 1 < length:
+                    value.append(_ESCAPES.get(text[pos + 1], text[pos + 1]))
+                    pos += 2
+                elif text[pos] == '\n':
+                    return None
+                else:
+                    value.append(text[pos])
+                    pos += 1
+            if pos >= length:
+                return None
+            tokens.append(("value", ''.join(value)))
+            pos += 1
+        else:
+            number = _NUMBER.match(text, pos)
+            if number:
+                literal = number.group(0)
+                is_float = any(c in literal for c in '.eE')
+                tokens.append(("value", float(literal) if is_float else int(literal)))
+                pos = number.end()
+                continue
+            identifier = _IDENTIFIER.match(text, pos)
+            if identifier is None:
+                return None
+            tokens.append(("name", identifier.group(0)))
+            pos = identifier.end()
+    return None
+
+
+def _build_arguments(tokens: List[Tuple[str, Any]]) -> Optional[Tuple[tuple, tuple]]:
+    """
+    Groups argument tokens into positional and keyword arguments.
+
+    Bare identifiers are accepted as values: True/False/None map to their constants and anything
+    else is treated as a column name string, which is how models usually write them.
+
+    Args:
+        tokens (List[Tuple[str, Any]]): Tokens returned by `_tokenize_arguments`.
+
+    Returns:
+        Optional[Tuple[tuple, tuple]]: The positional arguments and sorted keyword pairs, or None
+        if the token sequence is not a valid argument list.
+    """
+    args, kwargs = [], {}
+    groups = [[]]
+    for token in tokens:
+        if token[0] == ',':
+            groups.append([])
+        else:
+            groups[-1].append(token)
+    if groups == [[]]:
+        return (), ()
+    for group in groups:
+        if len(group) == 1 and group[0][0] in ("value", "name"):
+            if kwargs:
+                return None
+            kind, value = group[0]
+            args.append(_BARE_WORDS.get(value, value) if kind == "name" else value)
+        elif len(group) == 3 and group[0][0] == "name" and group[1][0] == '=' and group[2][0] in ("value", "name"):
+            kind, value = group[2]
+            kwargs[group[0][1]] = _BARE_WORDS.get(value, value) if kind == "name" else value
+        elif not group and group is groups[-1] and len(groups) > 1:
+            continue
+        else:
+            return None
+    return tuple(args), tuple(sorted(kwargs.items()))
+
+
+def parse_tool_calls(response: str) -> List[ToolCall]:
+    """
+    Finds all well-formed tool calls in an LLM response in a single left-to-right scan.
+
+    Text that merely looks like a call but does not tokenize cleanly is left alone.
+
+    Args:
+        response (str): The LLM response text.
+
+    Returns:
+        List[ToolCall]: The calls in order of appearance, without overlaps.
+    """
+    calls = []
+    pos = 0
+    while True:
+        match = _CALL_START.search(response, pos)
+        if match is None:
+            break
+        tokenized = _tokenize_arguments(response, match.end())
+        arguments = _build_arguments(tokenized[0]) if tokenized else None
+        if arguments is None:
+            pos = match.end()
+            continue
+        args, kwargs = arguments
+        calls.append(ToolCall(match.group(1), args, kwargs, match.start(), tokenized[1]))
+        pos = tokenized[1]
+    return calls
+
+
+def _format_call(key: Tuple[str, tuple, tuple]) -> str:
+    name, args, kwargs = key
+    rendered = [repr(arg) for arg in args] + [f"{k}={v!r}" for k, v in kwargs]
+    return f"{name}({', '.join(rendered)})"
+
+
+async def _run_tool(key: Tuple[str, tuple, tuple], semaphore: asyncio.Semaphore, timeout: float) -> str:
+    """
+    Executes one unique tool call off the event loop, bounded by the semaphore and timeout.
+
+    Args:
+        key (Tuple[str, tuple, tuple]): The (name, args, kwargs) identity of the call.
+        semaphore (asyncio.Semaphore): Limits how many tool calls run at once.
+        timeout (float): Seconds to wait for the call before giving up.
+
+    Returns:
+        str: The stringified result, or an error message.
+    """
+    name, args, kwargs = key
+    call_repr = _format_call(key)
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(
+                asyncio.to_thread(cached_data_retrieval, name, *args, **dict(kwargs)),
+                timeout=timeout
+            )
+            logger.info(f"Tool call {call_repr} completed in {time.perf_counter() - start:.3f}s")
+            return str(result)
+        except asyncio.TimeoutError:
+            logger.warning(f"Tool call {call_repr} timed out after {timeout:.1f}s")
+            return f"Error executing {call_repr}: timed out after {timeout:.1f}s"
+        except Exception as e:
+            logger.error(f"Tool call {call_repr} failed after {time.perf_counter() - start:.3f}s: {str(e)}")
+            return f"Error executing {call_repr}: {str(e)}"
+
+
+async def execute_tool_calls(response: str, max_concurrency: int = TOOL_CALL_CONCURRENCY, timeout: float = TOOL_CALL_TIMEOUT) -> str:
+    """
+    Resolves every tool call in an LLM response and splices the results back in.
+
+    Identical calls are executed once, unique calls run concurrently, and the response is
+    rebuilt in a single pass over the original text.
+
+    Args:
+        response (str): The LLM response containing tool calls.
+        max_concurrency (int, optional): Maximum number of tool calls in flight. Defaults to TOOL_CALL_CONCURRENCY.
+        timeout (float, optional): Per-call timeout in seconds. Defaults to TOOL_CALL_TIMEOUT.
+
+    Returns:
+        str: The response with each call replaced by its result.
+    """
+    calls = parse_tool_calls(response)
+    if not calls:
+        return response
+
+    unique_keys = list(dict.fromkeys(call.key for call in calls))
+    semaphore = asyncio.Semaphore(max_concurrency)
+    start = time.perf_counter()
+    results = await asyncio.gather(*[_run_tool(key, semaphore, timeout) for key in unique_keys])
+    resolved: Dict[Tuple[str, tuple, tuple], str] = dict(zip(unique_keys, results))
+    logger.info(f"Resolved {len(calls)} tool calls ({len(unique_keys)} unique) in {time.perf_counter() - start:.3f}s")
+
+    pieces = []
+    cursor = 0
+    for call in calls:
+        pieces.append(response[cursor:call.start])
+        pieces.append(resolved[call.key])
+        cursor = call.end
+    pieces.append(response[cursor:])
+    return ''.join(pieces)
@@ -0,0 +1,135 @@
+import re
+import threading
+import xml.etree.ElementTree as etree
+import markdown
+from markdown.extensions import Extension
+from markdown.postprocessors import Postprocessor
+from markdown.treeprocessors import Treeprocessor
+from markdown.util import HTML_PLACEHOLDER_RE
+
+MARKDOWN_EXTENSIONS = ['tables', 'fenced_code', 'sane_lists', 'smarty', 'toc']
+
+# Classes the report stylesheet expects on each tag.
+TAG_CLASSES = {
+    'ul': 'list-unstyled',
+    'ol': 'list-unstyled',
+    'p': 'paragraph',
+    'pre': 'code-block',
+    'strong': 'bold-text',
+    'b': 'bold-text',
+    'em': 'italic-text',
+    'i': 'italic-text',
+    'table': 'table table-striped table-bordered',
+}
+HEADER_TAGS = {'h2', 'h3', 'h4', 'h5', 'h6'}
+NUMBER_PATTERN = re.compile(r'^(\d+\.?\d*|\.\d+)$')
+
+
+def _add_class(element: etree.Element, name: str):
+    existing = element.get('class')
+    element.set('class', f"{existing} {name}" if existing else name)
+
+
+def _format_cell(cell: etree.Element):
+    """
+    Formats a table cell that holds a plain non-negative number to two decimals, as report tables always have.
+    """
+    if len(cell) == 0 and cell.text and NUMBER_PATTERN.match(cell.text.strip()):
+        cell.text = f"{float(cell.text.strip()):.2f}"
+
+
+class ReportStyleTreeprocessor(Treeprocessor):
+    """
+    Styles the rendered element tree for the PDF report in a single walk.
+
+    Drops h1 headers and repeated h2-h6 headers (compared case-insensitively), adds the report
+    stylesheet's classes to headers, lists, paragraphs, code, emphasis and tables, and formats
+    numeric table cells to two decimals.
+    """
+    def run(self, root: etree.Element):
+        seen_headers = set()
+        self._walk(root, seen_headers, in_pre=False)
+
+    def _walk(self, parent: etree.Element, seen_headers: set, in_pre: bool):
+        for child in list(parent):
+            tag = child.tag
+            if tag == 'h1':
+                self._remove(parent, child)
+                continue
+            if tag in HEADER_TAGS:
+                text = ''.join(child.itertext()).strip().lower()
+                if text in seen_headers:
+                    self._remove(parent, child)
+                    continue
+                seen_headers.add(text)
+                _add_class(child, f'header-{tag[1]}')
+            elif tag == 'code':
+                if not in_pre:
+                    _add_class(child, 'inline-code')
+            elif tag in ('td', 'th'):
+                _format_cell(child)
+            elif tag == 'p' and len(child) == 0 and HTML_PLACEHOLDER_RE.fullmatch((child.text or '').strip()):
+                # A bare paragraph around stashed HTML (fenced code) must stay unstyled so markdown unwraps it.
+                continue
+            if tag in TAG_CLASSES:
+                _add_class(child, TAG_CLASSES[tag])
+            if len(child):
+                self._walk(child, seen_headers, in_pre or tag == 'pre')
+
+    @staticmethod
+    def _remove(parent: etree.Element, child: etree.Element):
+        # Keep any text that followed the removed element.
+        if child.tail and child.tail.strip():
+            siblings = list(parent)
+            index = siblings.index(child)
+            if index > 0:
+                siblings[index - 1].tail = (siblings[index - 1].tail or '') + child.tail
+            else:
+                parent.text = (parent.text or '') + child.tail
+        parent.remove(child)
+
+
+class CodeBlockPostprocessor(Postprocessor):
+    """
+    Adds the 'code-block' class to fenced code blocks, which only exist as stashed HTML until the raw HTML is restored.
+    """
+    def run(self, text: str) -> str:
+        return text.replace('<pre>', '<pre class="code-block">')
+
+
+class ReportStyleExtension(Extension):
+    def extendMarkdown(self, md):
+        # Runs after inline parsing (priority 20) and the TOC ids (priority 5), so every element exists.
+        md.treeprocessors.register(ReportStyleTreeprocessor(md), 'report_style', 1)
+        # Runs after the stashed raw HTML is put back (priority 30).
+        md.postprocessors.register(CodeBlockPostprocessor(md), 'report_code_blocks', 25)
+
+
+_local = threading.local()
+
+
+def _converter() -> markdown.Markdown:
+    converter = getattr(_local, 'converter', None)
+    if converter is None:
+        converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS + [ReportStyleExtension()])
+        _local.converter = converter
+    return converter
+
+
+def render_markdown(md_content: str) -> str:
+    """
+    Converts report markdown to styled HTML in one markdown pass.
+
+    Each thread reuses one configured Markdown instance, which is reset between documents.
+
+    Args:
+        md_content (str): The markdown content.
+
+    Returns:
+        str: The styled HTML.
+    """
+    converter = _converter()
+    try:
+        return converter.convert(md_content or '')
+    finally:
+        converter.reset()
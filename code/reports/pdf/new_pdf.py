@@ -1,137 +1,25 @@
-from weasyprint import HTML, CSS
-from weasyprint.text.fonts import FontConfiguration
-import markdown
 import base64
-from jinja2 import Template
 import io
 from datetime import datetime
-from bs4 import BeautifulSoup
-from utils.utilities import extract_content
-import pandas as pd
-
-def process_tables(md_content):
-    """
-    Processes markdown content to extract and convert tables into HTML format.
-
-    Args:
-        md_content (str): The markdown content containing tables to be processed.
-
-    Returns:
-        list: A list of HTML table strings.
-
-    The function performs the following steps:
-    1. Sets the pandas display option for maximum column width.
-    2. Extracts elements from the markdown content.
-    3. Iterates through the extracted elements to identify and process tables.
-    4. For string-based tables, it parses the table rows and headers.
-    5. For dictionary-based tables, it directly uses the columns and data.
-    6. Cleans the table data by removing markdown bold syntax.
-    7. Converts the table data into a pandas DataFrame.
-    8. Formats numeric values to two decimal places.
-    9. Converts the DataFrame to an HTML table with specific classes and without escaping HTML characters.
-    10. Appends the HTML table to the list of processed tables.
-
-    Note:
-        - The function assumes that the first row of a string-based table contains headers.
-        - Rows are split by newline characters, and cells are split by the '|' character.
-        - The function handles both string and dictionary representations of tables.
-    """
-    pd.set_option('display.max_colwidth', 0)
-    elements = extract_content(md_content)
-    processed_tables = []
-
-    for element_type, element in elements:
-        if element_type == 'table':
-            if isinstance(element, str):
-                rows = [row.strip() for row in element.split('\n') if row.strip()]
-                headers = [cell.strip() for cell in rows[0].split('|') if cell.strip()]
-                table_data = [headers]
-                for row in rows[2:]:
-                    cells = [cell.strip() for cell in row.split('|') if cell.strip()]
-                    if len(cells) == len(headers):
-                        table_data.append(cells)
-            elif isinstance(element, dict):
-                table_data = [element['columns']] + element['data']
-
-            table_data = [[cell.replace('**', '') for cell in row] for row in table_data]
-            df = pd.DataFrame(table_data[1:], columns=table_data[0])
-            df = df.map(lambda x: f"{float(x):.2f}" if x.replace('.', '', 1).isdigit() else x)
-            html_table = df.to_html(index=False, classes=['table', 'table-striped', 'table-bordered'], escape=False)
-            processed_tables.append(html_table)
-
-    return processed_tables
+from utils.artifact_store import artifact_store
+from .pdf_engine import get_pdf_renderer
+from .markdown_renderer import render_markdown
 
 def convert_markdown_to_html(md_content, section_title):
     """
-    Converts Markdown content to HTML with additional processing for tables and specific HTML elements.
+    Converts Markdown content to styled HTML for the PDF report.
     Args:
         md_content (str): The Markdown content to be converted.
         section_title (str): The title of the section being processed.
     Returns:
         str: The processed HTML content as a string.
-    The function performs the following steps:
-    1. Processes tables within the Markdown content.
-    2. Converts the Markdown content to HTML using the `markdown` library with specific extensions.
-    3. Uses BeautifulSoup to parse the HTML content and perform additional processing:
-        - Adds specific classes to headers (h2 to h6) to ensure unique headers.
-        - Removes all h1 headers.
-        - Adds 'list-unstyled' class to all unordered (ul) and ordered (ol) lists.
-        - Adds 'paragraph' class to all paragraph (p) tags.
-        - Adds 'code-block' class to all preformatted (pre) tags.
-        - Adds 'inline-code' class to all inline code (code) tags that are not within pre tags.
-        - Adds 'bold-text' class to all strong and b tags.
-        - Adds 'italic-text' class to all em and i tags.
-    4. Replaces table tags in the HTML content with processed tables.
-    Note:
-        The function assumes that the `process_tables` function and the `markdown` and `BeautifulSoup` libraries are available in the scope.
+    The conversion is a single markdown pass (see `reports.pdf.markdown_renderer`) whose tree processor:
+        - Removes h1 headers and repeated h2-h6 headers, and adds 'header-N' classes to the rest.
+        - Adds 'list-unstyled' to ul/ol, 'paragraph' to p, 'code-block' to pre and 'inline-code' to inline code.
+        - Adds 'bold-text' to strong/b and 'italic-text' to em/i.
+        - Adds the table classes and formats numeric table cells to two decimals.
     """
-    processed_tables = process_tables(md_content)
-    html_content = markdown.markdown(md_content, extensions=['tables', 'fenced_code', 'sane_lists', 'smarty', 'toc'])
-    
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    seen_headers = set()
-    for i in range(2, 7):  # h2 to h6, skip h1
-        for header in soup.find_all(f'h{i}'):
-            header_text = header.get_text(strip=True).lower()
-            if header_text not in seen_headers:
-                seen_headers.add(header_text)
-                header['class'] = header.get('class', []) + [f'header-{i}']
-            else:
-                header.decompose()  
-                
-    for header in soup.find_all('h1'):
-        header.decompose()
-        
-    for ul in soup.find_all('ul'):
-        ul['class'] = ul.get('class', []) + ['list-unstyled']
-    
-    for ol in soup.find_all('ol'):
-        ol['class'] = ol.get('class', []) + ['list-unstyled']
-    
-    for p in soup.find_all('p'):
-        p['class'] = p.get('class', []) + ['paragraph']
-    
-    for pre in soup.find_all('pre'):
-        pre['class'] = pre.get('class', []) + ['code-block']
-    
-    for code in soup.find_all('code'):
-        if code.parent.name != 'pre':
-            code['class'] = code.get('class', []) + ['inline-code']
-    
-    for strong in soup.find_all(['strong', 'b']):
-        strong['class'] = strong.get('class', []) + ['bold-text']
-    
-    for em in soup.find_all(['em', 'i']):
-        em['class'] = em.get('class', []) + ['italic-text']
-    
-    table_tags = soup.find_all('table')
-    for i, table_tag in enumerate(table_tags):
-        if i < len(processed_tables):
-            new_table = BeautifulSoup(processed_tables[i], 'html.parser')
-            table_tag.replace_with(new_table)
-    
-    return str(soup)
+    return render_markdown(md_content)
 
 def generate_toc(sections):
     """
@@ -171,9 +59,11 @@ def generate_toc(sections):
 def create_pdf_report(report_title, section_results, end_matter, logo_bytes, primary_color, accent_color, company_name):
     """
     Generates a PDF report with the given parameters.
+    The template, base stylesheet and fonts are prepared once by the shared PDF renderer; only the theme
+    colours and header texts are substituted per report.
     Args:
         report_title (str): The title of the report.
-        section_results (list): A list of tuples containing section names, content, plot images, and plot configurations.
+        section_results (list): A list of tuples containing section names, content, plot image artifact ids, and plot configurations.
         end_matter (str): The concluding content of the report.
         logo_bytes (bytes): The logo image in bytes.
         primary_color (str): The primary color for the report's styling.
@@ -182,70 +72,15 @@ def create_pdf_report(report_title, section_results, end_matter, logo_bytes, pri
     Returns:
         io.BytesIO: A buffer containing the generated PDF report.
     """
-    with open('reports/pdf/pdf_report.css', 'r') as file:
-        css_template = file.read()
-    
-    css = css_template.replace("{primary_color}", primary_color).replace("{accent_color}", accent_color).replace("{company_name}", company_name).replace("{report_title}", report_title)
-    
-    html_template = Template("""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <title>{{ report_title }}</title>
-        <style>
-            {{ css }}
-        </style>
-    </head>
-    <body>
-        <div class="cover">
-            <div class="layout">
-                <div class="top-section">
-                    <div class="logo-container">
-                        {% if logo %}
-                        <img src="data:image/png;base64,{{ logo }}" alt="Logo" class="logo">
-                        {% endif %}
-                    </div>
-                </div>
-                <h1>{{ report_title }}</h1>
-                <p class="date">{{ generated_date }}</p>
-            </div>
-        </div>
-        
-        <div class="content-start"></div>
-        
-        <article id="contents">
-            <h2>Table of Contents</h2>
-            {{ toc | safe }}
-        </article>
-        
-        <article id="sections">
-            {% for section in sections %}
-            <div class="section">
-                <h2 id="{{ section.id }}">{{ section.number }} {{ section.title }}</h2>
-                {{ section.content | safe }}
-                {% if section.plot %}
-                <img src="data:image/png;base64,{{ section.plot }}" alt="Plot" class="plot">
-                {{ section.plot_description | safe }}
-                {% endif %}
-            </div>
-            {% endfor %}
-        </article>
-        
-        <article id="conclusion">
-            <h2>Conclusion and Recommendations</h2>
-            {{ end_matter | safe }}
-        </article>
-    </body>
-    </html>
-    """)
-    
     processed_sections = []
     for index, (section_name, (section_content, plot_image, plot_config)) in enumerate(section_results, start=1):
         section_id = section_name.lower().replace(" ", "-")
         html_content = convert_markdown_to_html(section_content, section_name)
         
         plot_description = ""
+        # Plot images are artifact ids; WeasyPrint reads the stored files directly.
+        plot_path = artifact_store.path(plot_image) if plot_image else None
+        plot_image = plot_path.as_uri() if plot_path else None
         if plot_image:
             plot_description = f"Figure {index}: {plot_config.get('x', 'X')} vs {plot_config.get('y', 'Y')}"
             if plot_config.get('color'):
@@ -267,22 +102,24 @@ def create_pdf_report(report_title, section_results, end_matter, logo_bytes, pri
     toc_html = generate_toc(processed_sections)
     end_matter_html = convert_markdown_to_html(end_matter, "End Matter")
     
-    html_content = html_template.render(
+    renderer = get_pdf_renderer()
+    html_content = renderer.render_html(
         report_title=report_title,
         logo=base64.b64encode(logo_bytes).decode('utf-8') if logo_bytes else None,
         generated_date=datetime.now().strftime('%m-%d-%Y'),
         sections=processed_sections,
         end_matter=end_matter_html,
-        css=css,
         toc=toc_html
     )
-    
-    font_config = FontConfiguration()
-    html = HTML(string=html_content)
-    css = CSS(string=css)
+    theme = {
+        'primary_color': primary_color,
+        'accent_color': accent_color,
+        'company_name': company_name,
+        'report_title': report_title,
+    }
     
     pdf_buffer = io.BytesIO()
-    html.write_pdf(pdf_buffer, stylesheets=[css], font_config=font_config)
+    renderer.write_pdf(html_content, theme, pdf_buffer)
     pdf_buffer.seek(0)
     
     return pdf_buffer
\ No newline at end of file
@@ -0,0 +1,172 @@
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Tuple
+from jinja2 import Environment
+from weasyprint import HTML, CSS
+from weasyprint.text.fonts import FontConfiguration
+
+logger = logging.getLogger('pdf_engine')
+
+STYLESHEET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdf_report.css')
+THEME_PLACEHOLDER = re.compile(r"\{(primary_color|accent_color|company_name|report_title)\}")
+MASKED_PLACEHOLDER = re.compile(r"\x00(\w+)\x00")
+
+REPORT_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>{{ report_title }}</title>
+</head>
+<body>
+    <div class="cover">
+        <div class="layout">
+            <div class="top-section">
+                <div class="logo-container">
+                    {% if logo %}
+                    <img src="data:image/png;base64,{{ logo }}" alt="Logo" class="logo">
+                    {% endif %}
+                </div>
+            </div>
+            <h1>{{ report_title }}</h1>
+            <p class="date">{{ generated_date }}</p>
+        </div>
+    </div>
+
+    <div class="content-start"></div>
+
+    <article id="contents">
+        <h2>Table of Contents</h2>
+        {{ toc | safe }}
+    </article>
+
+    <article id="sections">
+        {% for section in sections %}
+        <div class="section">
+            <h2 id="{{ section.id }}">{{ section.number }} {{ section.title }}</h2>
+            {{ section.content | safe }}
+            {% if section.plot %}
+            <img src="{{ section.plot }}" alt="Plot" class="plot">
+            {{ section.plot_description | safe }}
+            {% endif %}
+        </div>
+        {% endfor %}
+    </article>
+
+    <article id="conclusion">
+        <h2>Conclusion and Recommendations</h2>
+        {{ end_matter | safe }}
+    </article>
+</body>
+</html>
+"""
+
+
+def split_stylesheet(css_text: str) -> List[Tuple[bool, str]]:
+    """
+    Splits a stylesheet into consecutive runs of top-level rules that do or do not use theme placeholders.
+
+    Keeping the runs in their original order preserves the cascade when they are passed to WeasyPrint
+    as separate stylesheets. Placeholders in the returned text are masked as NUL-delimited names.
+
+    Args:
+        css_text (str): The stylesheet with {primary_color}-style placeholders.
+
+    Returns:
+        List[Tuple[bool, str]]: (themed, css) runs in source order.
+    """
+    css_text = THEME_PLACEHOLDER.sub(lambda match: f"\x00{match.group(1)}\x00", css_text)
+    rules, depth, start, quote = [], 0, 0, None
+    for index, char in enumerate(css_text):
+        if quote:
+            if char == quote and css_text[index - 1] != '\\':
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        elif char == '{':
+            depth += 1
+        elif char == '}' and depth > 0:
+            depth -= 1
+            if depth == 0:
+                rules.append(css_text[start:index + 1])
+                start = index + 1
+        elif char == ';' and depth == 0:
+            rules.append(css_text[start:index + 1])
+            start = index + 1
+    if css_text[start:].strip():
+        rules.append(css_text[start:])
+
+    runs: List[Tuple[bool, str]] = []
+    for rule in rules:
+        themed = MASKED_PLACEHOLDER.search(rule) is not None
+        if runs and runs[-1][0] == themed:
+            runs[-1] = (themed, runs[-1][1] + rule)
+        else:
+            runs.append((themed, rule))
+    return runs
+
+
+def _css_string(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+class PDFRenderer:
+    """
+    Renders report HTML to PDF with the template, stylesheet and fonts prepared once.
+
+    The Jinja template is compiled and the theme-independent parts of the stylesheet (including the web
+    font import) are parsed once, with a single shared font configuration. Per report, only the few rules
+    that use theme placeholders are filled in by string substitution and parsed.
+
+    Attributes:
+        template (jinja2.Template): The compiled report template.
+        font_config (FontConfiguration): The shared WeasyPrint font configuration.
+
+    Methods:
+        render_html(**context):
+            Renders the report HTML.
+        write_pdf(html_content, theme, buffer):
+            Writes the PDF for rendered HTML and a theme into buffer.
+    """
+    def __init__(self, stylesheet_path: str = STYLESHEET_PATH):
+        self.template = Environment(autoescape=False).from_string(REPORT_TEMPLATE)
+        self.font_config = FontConfiguration()
+        with open(stylesheet_path, 'r') as file:
+            runs = split_stylesheet(file.read())
+        self._runs = [text if themed else CSS(string=text, font_config=self.font_config) for themed, text in runs]
+        # WeasyPrint's font configuration is not safe to share between concurrent renders.
+        self._lock = threading.Lock()
+
+    def render_html(self, **context) -> str:
+        return self.template.render(**context)
+
+    def stylesheets(self, theme: Dict[str, str]) -> list:
+        values = {key: _css_string(value or '') for key, value in theme.items()}
+        substitute = lambda match: values.get(match.group(1), match.group(0))
+        return [CSS(string=MASKED_PLACEHOLDER.sub(substitute, run), font_config=self.font_config) if isinstance(run, str) else run
+                for run in self._runs]
+
+    def write_pdf(self, html_content: str, theme: Dict[str, str], buffer):
+        with self._lock:
+            HTML(string=html_content).write_pdf(buffer, stylesheets=self.stylesheets(theme), font_config=self.font_config)
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_pdf_renderer() -> PDFRenderer:
+    """
+    Returns the process-wide PDF renderer, creating it on first use.
+
+    Returns:
+        PDFRenderer: The shared renderer.
+    """
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = PDFRenderer()
+            logger.info("PDF renderer ready")
+        return _renderer
@@ -1,14 +1,26 @@
 from pptx import Presentation
 from io import BytesIO
+import asyncio
+import hashlib
+import logging
 import sys
 import os
-import base64
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from functools import lru_cache
+from typing import List, Tuple
 from utils.configs import get_llm
+from utils.artifact_store import artifact_store
+from plots.report_images import slide_image
+from utils.cache_config import cache, cache_key
 from prompts.presentation_prompt_template import presentation_prompt
 import random
 import re
 
+logger = logging.getLogger('presentation_report')
+
+PLOT_LAYOUTS = (2, 3)
+PLOT_PLACEHOLDER_TYPES = (18, 13, 7)
+
 def select_slide_layout(slide_content, include_plot, include_table):
     """
     Selects the appropriate slide layout based on the content and inclusion flags.
@@ -31,7 +43,7 @@ def select_slide_layout(slide_content, include_plot, include_table):
         if include_table:
             return 4  
         elif include_plot:
-            layout_choice = random.choice([2, 3])  
+            layout_choice = random.choice(PLOT_LAYOUTS)
             return layout_choice
         else:
             return 1  
@@ -40,6 +52,19 @@ def select_slide_layout(slide_content, include_plot, include_table):
     else:
         return 1  
 
+def _slides_key(content: str) -> str:
+    llm = get_llm("slides")
+    content_hash = hashlib.sha256(content.encode()).hexdigest()
+    return "slides_" + cache_key(content_hash, llm.config.provider, llm.config.model)
+
+
+def _section_text(section_content) -> str:
+    content = section_content.get("content", "") if isinstance(section_content, dict) else section_content
+    if isinstance(content, list):
+        content = "\n".join(content)
+    return content
+
+
 def get_presentation_content(content):
     """
     Generates a presentation content response using a language model.
@@ -57,14 +82,63 @@ def get_presentation_content(content):
         content = {k: v for k, v in content.items() if k != 'plot_image'}
         content = str(content)
     prompt = presentation_prompt.replace("{section_content}", content)
-    llm = get_llm()
+    llm = get_llm("slides")
     response = llm.get_response(prompt)
     return response
 
 
+async def get_presentation_content_async(content: str) -> str:
+    """
+    Asynchronously generates the slide markup for one section's content.
+
+    Args:
+        content (str): The section content.
+
+    Returns:
+        str: The response generated by the language model.
+    """
+    prompt = presentation_prompt.replace("{section_content}", content)
+    return await get_llm("slides").get_acompletion(prompt)
+
+
+async def prepare_slides(section_contents: list) -> List[list]:
+    """
+    Produces the parsed slides for every section, issuing the LLM requests for all uncached sections concurrently.
+
+    Slides are cached per hash of the section content and the model configuration, so rebuilding a deck,
+    for example with a different theme, makes no LLM calls.
+
+    Args:
+        section_contents (list): The section contents, as dictionaries with a "content" key or as strings.
+
+    Returns:
+        List[list]: The slides for each section, in the format returned by `parse_slides`.
+    """
+    texts = [_section_text(section_content) for section_content in section_contents]
+    keys = [_slides_key(text) for text in texts]
+    slides = [cache.get(key) for key in keys]
+    missing = list(dict.fromkeys(keys[i] for i, cached in enumerate(slides) if cached is None))
+    if missing:
+        first = {key: keys.index(key) for key in missing}
+        responses = await asyncio.gather(*(get_presentation_content_async(texts[first[key]]) for key in missing),
+                                         return_exceptions=True)
+        generated = {}
+        for key, response in zip(missing, responses):
+            if isinstance(response, Exception):
+                logger.error(f"Error generating slides for section {first[key] + 1}: {str(response)}")
+                generated[key] = []
+                continue
+            generated[key] = parse_slide_response(response)
+            cache.set(key, generated[key])
+        slides = [generated.get(key, cached) if cached is None else cached for key, cached in zip(keys, slides)]
+    logger.info(f"Prepared slides for {len(texts)} sections with {len(missing)} LLM calls")
+    return slides
+
+
 def parse_slides(section_content):
     """
     Parses the given section content to extract slide information.
+    Slides are cached per section content hash, so the LLM is only asked once for the same content.
     Args:
         section_content (dict or str): The content of the section, either as a dictionary with a "content" key or as a string.
     Returns:
@@ -76,15 +150,23 @@ def parse_slides(section_content):
                 - 'text' (str): The text content.
             - 'table' (list or None): The parsed table content, if present, otherwise None.
     """
-    if isinstance(section_content, dict):
-        content = section_content.get("content", "")
-    else:
-        content = section_content
-    
-    if isinstance(content, list):
-        content = "\n".join(content)  
-    
-    response = get_presentation_content(content)
+    content = _section_text(section_content)
+    key = _slides_key(content)
+    slides = cache.get(key)
+    if slides is None:
+        slides = parse_slide_response(get_presentation_content(content))
+        cache.set(key, slides)
+    return slides
+
+
+def parse_slide_response(response):
+    """
+    Parses the LLM's <Slide> markup into slide dictionaries.
+    Args:
+        response (str): The response from `get_presentation_content`.
+    Returns:
+        list: A list of slide dictionaries, in the format returned by `parse_slides`.
+    """
     slides = []
     
     slide_pattern = re.compile(r'<Slide>(.*?)</Slide>', re.DOTALL)
@@ -158,41 +240,66 @@ def parse_markdown_table(markdown_table):
     except Exception as e:
         return None
     
-def create_presentation(section_content, prs=None, selected_template='default'):
+@lru_cache(maxsize=None)
+def _template_bytes(selected_template: str) -> bytes:
+    template = 'BlueYellow' if selected_template == 'default' else selected_template
+    with open(f"templates/{template}.pptx", 'rb') as file:
+        return file.read()
+
+
+def load_template(selected_template='default'):
+    """
+    Returns a fresh Presentation for a template.
+
+    Each template file is read from disk once; every deck is opened from an in-memory copy of its bytes,
+    so building another deck or switching themes never touches the template file again.
+
+    Args:
+        selected_template (str, optional): The template name. Defaults to 'default'.
+
+    Returns:
+        Presentation: A new presentation based on the template.
+    """
+    return Presentation(BytesIO(_template_bytes(selected_template)))
+
+
+def create_presentation(section_content, prs=None, selected_template='default', slides=None):
     """
     Creates a PowerPoint presentation based on the provided section content.
     Args:
         section_content (dict): A dictionary containing the content for the presentation sections.
-            Expected keys include 'report_title', 'plot_image', and 'table'.
+            Expected keys include 'report_title', 'plot_image', 'plot_source', and 'table'.
         prs (Presentation, optional): An existing Presentation object to add slides to. If None, a new
             presentation is created using the specified template. Defaults to None.
         selected_template (str, optional): The name of the template to use for the presentation. Defaults to 'default'.
+        slides (list, optional): Slides already prepared by `prepare_slides`. If None, they are parsed from
+            `section_content`, which may call the LLM. Defaults to None.
     Returns:
         Presentation: The created or modified Presentation object.
     Notes:
         - If `prs` is None, a new presentation is created using the specified template.
         - If the presentation has no slides, a title slide is added with the 'report_title' from `section_content`.
         - Slides are created based on the parsed content from `section_content`.
-        - If 'plot_image' is provided in `section_content`, it is added to the first slide that requires it.
+        - If 'plot_source' (a figure JSON artifact) or 'plot_image' is provided in `section_content`, the plot is
+          added to the first slide that requires it.
         - Tables are added to slides if 'table' is provided in the corresponding section content.
     """
     if prs is None:
-        if selected_template == 'default':
-            prs = Presentation('templates/BlueYellow.pptx')
-        else:
-            prs = Presentation(f"templates/{selected_template}.pptx")
+        prs = load_template(selected_template)
         
     if not prs.slides:
         title_slide = prs.slides.add_slide(prs.slide_layouts[0])
         report_title = title_slide.shapes.title
         report_title.text = section_content.get('report_title', 'Untitled Presentation')
     
-    slides = parse_slides(section_content)
+    if slides is None:
+        slides = parse_slides(section_content)
     plot_image = section_content.get('plot_image')
+    plot_source = section_content.get('plot_source')
     
     for index, slide_content in enumerate(slides):
         slide_number = len(prs.slides) + 1
-        include_plot = plot_image is not None
+        include_plot = plot_image is not None or plot_source is not None
         include_table = slide_content.get('table') is not None
         
         layout_index = select_slide_layout(slide_content, include_plot=include_plot, include_table=include_table)
@@ -215,29 +322,30 @@ def create_presentation(section_content, prs=None, selected_template='default'):
             add_table_to_slide(slide, slide_content['table'])
         
         if include_plot:
-            add_plot_to_slide(slide, plot_image)
-            plot_image = None
+            add_plot_to_slide(slide, plot_image, plot_source)
+            plot_image, plot_source = None, None
 
     return prs
 
-def add_plot_to_slide(slide, plot_image):
+def add_plot_to_slide(slide, plot_image, plot_source=None):
     """
     Adds a plot image to a PowerPoint slide.
 
     Args:
         slide (pptx.slide.Slide): The slide to which the plot image will be added.
-        plot_image (str): The plot image encoded as a base64 string.
+        plot_image (str): The artifact id of the plot image in the artifact store.
+        plot_source (str, optional): The artifact id of the figure JSON. When given, the plot is rendered
+            at the placeholder's size instead of using plot_image. Defaults to None.
 
     Returns:
-        None: If the plot_image is empty or an error occurs during the process.
+        None: If there is no plot or an error occurs during the process.
     """
-    if not plot_image:
+    if not plot_image and not plot_source:
         return None
 
     try:
         plot_placeholder = find_plot_placeholder(slide)
-        img_bytes = base64.b64decode(plot_image)
-        plot_placeholder.insert_picture(BytesIO(img_bytes))
+        plot_placeholder.insert_picture(str(_slide_plot_path(plot_placeholder, plot_image, plot_source)))
     except Exception as e:
         return None
         
@@ -280,28 +388,64 @@ def add_content_to_slide(slide, slide_content):
             p.text = item['text']
             p.level = 1
 
-def add_plot_to_slide(slide, plot_image):
+def add_plot_to_slide(slide, plot_image, plot_source=None):
     """
     Adds a plot image to a slide.
-    This function decodes a base64-encoded image and inserts it into a specified
-    placeholder on the given slide. If the plot image is not provided or an error
-    occurs during the process, the function returns None.
+    This function renders the stored figure at the plot placeholder's size (or, without a
+    figure, reads the stored plot image) and inserts it into the placeholder on the given
+    slide. If no plot is provided or an error occurs during the process, the function returns None.
     Args:
         slide (Slide): The slide object where the plot image will be added.
-        plot_image (str): The base64-encoded string of the plot image.
+        plot_image (str): The artifact id of the plot image in the artifact store.
+        plot_source (str, optional): The artifact id of the figure JSON. Defaults to None.
     Returns:
-        None: If the plot image is not provided or an error occurs.
+        None: If no plot is provided or an error occurs.
     """
-    if not plot_image:
+    if not plot_image and not plot_source:
         return None
 
     try:
         plot_placeholder = find_plot_placeholder(slide)
         
-        img_bytes = base64.b64decode(plot_image)
-        plot_placeholder.insert_picture(BytesIO(img_bytes))
+        plot_placeholder.insert_picture(str(_slide_plot_path(plot_placeholder, plot_image, plot_source)))
     except Exception as e:
         return None
+
+
+def _slide_plot_path(placeholder, plot_image, plot_source):
+    """
+    Returns the image file for a plot placeholder: the figure rendered as a palette PNG at the placeholder's
+    exact size, or the stored report image when there is no figure. PowerPoint cannot show the PDF's SVGs.
+    """
+    if plot_source:
+        path = slide_image(plot_source, placeholder.width, placeholder.height)
+        if path is not None:
+            return path
+    if plot_image and not plot_image.endswith('.svg'):
+        return artifact_store.path(plot_image)
+    raise ValueError("No slide image available for the plot")
+
+
+def plot_placeholder_sizes(prs) -> List[Tuple[int, int]]:
+    """
+    Returns the (width, height) in EMU of the plot placeholder in each of a template's plot layouts.
+
+    Args:
+        prs (Presentation): A presentation opened from the template.
+
+    Returns:
+        List[Tuple[int, int]]: The distinct placeholder sizes.
+    """
+    sizes = []
+    for layout_index in PLOT_LAYOUTS:
+        if layout_index >= len(prs.slide_layouts):
+            continue
+        for placeholder in prs.slide_layouts[layout_index].placeholders:
+            if placeholder.placeholder_format.type in PLOT_PLACEHOLDER_TYPES:
+                if placeholder.width and placeholder.height and (placeholder.width, placeholder.height) not in sizes:
+                    sizes.append((placeholder.width, placeholder.height))
+                break
+    return sizes
     
 def find_content_placeholder(slide):
     """
@@ -339,7 +483,7 @@ def find_plot_placeholder(slide):
         found in the slide, or None if no matching placeholder is found.
     """
     for shape in slide.placeholders:
-        if shape.placeholder_format.type in [18, 13, 7]:  
+        if shape.placeholder_format.type in PLOT_PLACEHOLDER_TYPES:
             return shape
     return None
 
@@ -0,0 +1,110 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+from .constants import ARTIFACT_STORE_DIR, ARTIFACT_STORE_MAX_BYTES
+
+logger = logging.getLogger('artifact_store')
+
+ARTIFACT_ID_PATTERN = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]{1,8}$")
+
+
+class ArtifactStore:
+    """
+    A content-addressed, disk-backed store for generated files such as PDFs and plot images.
+
+    An artifact's id is the sha256 of its bytes plus a file extension, so storing the same content
+    twice is free and ids are safe to hand to the browser. Files are written atomically, so the Dash
+    workers and the download route can share the directory. When the store grows past max_bytes, the
+    least recently used files are evicted; reads refresh a file's modification time.
+
+    Attributes:
+        root (Path): The directory holding the artifacts.
+        max_bytes (int): Upper bound on the total size of stored artifacts.
+
+    Methods:
+        put(data, extension):
+            Stores bytes and returns the artifact id.
+        path(artifact_id):
+            Returns the file path of a stored artifact, or None.
+        read(artifact_id):
+            Returns the bytes of a stored artifact, or None.
+        content_type(artifact_id):
+            Returns the MIME type for an artifact id.
+    """
+    def __init__(self, root: str = ARTIFACT_STORE_DIR, max_bytes: int = ARTIFACT_STORE_MAX_BYTES):
+        self.root = Path(root).resolve()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def put(self, data: bytes, extension: str) -> str:
+        artifact_id = f"{hashlib.sha256(data).hexdigest()}.{extension.lstrip('.').lower()}"
+        target = self.root / artifact_id
+        if target.exists():
+            os.utime(target)
+            return artifact_id
+        temporary = self.root / f".{artifact_id}.{os.getpid()}.{threading.get_ident()}.tmp"
+        temporary.write_bytes(data)
+        os.replace(temporary, target)
+        self._evict()
+        return artifact_id
+
+    def path(self, artifact_id: str) -> Optional[Path]:
+        if not artifact_id or not ARTIFACT_ID_PATTERN.match(artifact_id):
+            return None
+        target = self.root / artifact_id
+        try:
+            os.utime(target)
+        except FileNotFoundError:
+            logger.warning(f"Artifact {artifact_id} is not in the store")
+            return None
+        return target
+
+    def read(self, artifact_id: str) -> Optional[bytes]:
+        target = self.path(artifact_id)
+        return target.read_bytes() if target else None
+
+    def content_type(self, artifact_id: str) -> str:
+        return mimetypes.guess_type(artifact_id)[0] or "application/octet-stream"
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.root):
+                if entry.is_file() and ARTIFACT_ID_PATTERN.match(entry.name):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+
+
+def artifact_url(artifact_id: str, download_name: Optional[str] = None) -> str:
+    """
+    Returns the app URL that serves an artifact.
+
+    Args:
+        artifact_id (str): The artifact id.
+        download_name (Optional[str], optional): Serve as an attachment with this file name. Defaults to None (inline).
+
+    Returns:
+        str: The URL, under the app's proxy prefix.
+    """
+    proxy_prefix = os.getenv('PROXY_PREFIX', '/projects/nvidia-alm/applications/dash-app').rstrip('/')
+    url = f"{proxy_prefix}/artifacts/{artifact_id}"
+    return f"{url}?download={quote(download_name)}" if download_name else url
+
+
+artifact_store = ArtifactStore()
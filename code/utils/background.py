@@ -0,0 +1,58 @@
+import asyncio
+import atexit
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Coroutine, Optional
+
+logger = logging.getLogger('background')
+
+
+class BackgroundLoop:
+    """
+    An asyncio event loop running in a daemon thread, for work that outlives the callback that started it.
+
+    Dash callbacks run their coroutines on short-lived loops (see `run_async_in_sync`), which are closed
+    when the callback returns. Coroutines submitted here keep running, and any loop or thread can wait
+    for or cancel them through the returned future.
+
+    Attributes:
+        name (str): The name of the loop's thread.
+
+    Methods:
+        submit(coroutine) -> Future:
+            Schedules a coroutine on the loop and returns a thread-safe future for its result.
+        shutdown():
+            Cancels pending work and stops the loop.
+    """
+    def __init__(self, name: str = 'background-loop'):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name=self.name, daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coroutine: Coroutine) -> Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
+
+    def shutdown(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        def stop():
+            for task in asyncio.all_tasks(loop):
+                task.cancel()
+            loop.stop()
+        loop.call_soon_threadsafe(stop)
+
+
+background_loop = BackgroundLoop()
+atexit.register(background_loop.shutdown)
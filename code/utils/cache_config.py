@@ -2,11 +2,19 @@ import os
 import shutil
 import hashlib
 import pickle
+import tempfile
+import time
+
+# Written ahead of each value so expiry can be checked without unpickling the value itself.
+_EXPIRY_HEADER = "__cache_expires_at__"
+PURGE_INTERVAL = 60
 
 class ClearableCache:
     """
     A simple cache system that stores data in files within a specified directory.
-    The cache can be cleared by removing all files in the cache directory.
+    The cache can be cleared by removing all files in the cache directory. Entries set with a
+    timeout expire after that many seconds; expired files are deleted when read and by a purge
+    that runs at most once every PURGE_INTERVAL seconds when values are set.
 
     Attributes:
         cache_dir (str): The directory where cache files are stored.
@@ -16,10 +24,13 @@ class ClearableCache:
             Initializes the cache directory.
         
         set(key, value, timeout=None):
-            Stores a value in the cache with the specified key.
+            Stores a value in the cache with the specified key, expiring after timeout seconds if given.
         
         get(key):
-            Retrieves a value from the cache by its key.
+            Retrieves a value from the cache by its key, or None if it is missing or expired.
+        
+        purge_expired():
+            Deletes the files of expired entries.
         
         clear():
             Clears all files in the cache directory.
@@ -27,19 +38,64 @@ class ClearableCache:
     def __init__(self, cache_dir='cache-directory'):
         self.cache_dir = cache_dir
         os.makedirs(self.cache_dir, exist_ok=True)
+        self._last_purge = 0.0
 
     def set(self, key, value, timeout=None):
         file_path = os.path.join(self.cache_dir, key)
-        with open(file_path, 'wb') as f:
-            pickle.dump(value, f)
+        expires_at = time.time() + timeout if timeout else None
+        # Written to a temporary file and moved into place, so a concurrent get never reads a partial entry.
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((_EXPIRY_HEADER, expires_at), f)
+                pickle.dump(value, f)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            self._remove(temp_path)
+            raise
+        if time.monotonic() - self._last_purge > PURGE_INTERVAL:
+            self._last_purge = time.monotonic()
+            self.purge_expired()
+
+    @staticmethod
+    def _is_expired(f):
+        # Leaves f positioned at the value. Files written before expiry was added have no header.
+        header = pickle.load(f)
+        if isinstance(header, tuple) and len(header) == 2 and header[0] == _EXPIRY_HEADER:
+            return header[1] is not None and header[1] <= time.time()
+        f.seek(0)
+        return False
 
     def get(self, key):
         file_path = os.path.join(self.cache_dir, key)
         if os.path.exists(file_path):
             with open(file_path, 'rb') as f:
-                return pickle.load(f)
+                expired = self._is_expired(f)
+                if not expired:
+                    return pickle.load(f)
+            self._remove(file_path)
         return None
 
+    def purge_expired(self):
+        for filename in os.listdir(self.cache_dir):
+            file_path = os.path.join(self.cache_dir, filename)
+            if not os.path.isfile(file_path):
+                continue
+            try:
+                with open(file_path, 'rb') as f:
+                    expired = self._is_expired(f)
+            except Exception:
+                continue
+            if expired:
+                self._remove(file_path)
+
+    @staticmethod
+    def _remove(file_path):
+        try:
+            os.unlink(file_path)
+        except OSError:
+            pass
+
     def clear(self):
         for filename in os.listdir(self.cache_dir):
             file_path = os.path.join(self.cache_dir, filename)
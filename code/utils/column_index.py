@@ -0,0 +1,207 @@
+import math
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from utils.cache_config import cache
+from utils.utilities import get_dataset_version
+from utils.constants import (COLUMN_INDEX_KEY, COLUMN_INDEX_TOP_K, COLUMN_INDEX_EMBEDDING_MODEL,
+                             COLUMN_INDEX_EMBEDDING_WEIGHT, DATETIME_FORMATS, NUMERIC_DTYPES)
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+STOPWORDS = {"a", "an", "and", "by", "for", "from", "in", "is", "of", "on", "or", "per", "the", "to", "vs", "with", "what", "how", "which", "over", "across", "analysis", "data"}
+
+# Words that tie a query to a kind of column even when no column name matches.
+DTYPE_TERMS = {
+    "datetime": ["date", "time", "trend", "timeseries", "temporal", "period"],
+    "numeric": ["numeric", "amount", "value", "distribution", "correlation"],
+    "categorical": ["category", "categorical", "group", "segment", "breakdown"],
+}
+
+NAME_WEIGHT = 3
+PREFIX_MATCH_WEIGHT = 0.5
+MIN_PREFIX_LENGTH = 4
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def _stem(token: str) -> str:
+    if len(token) > 5 and token.endswith("ing"):
+        token = token[:-3]
+        return token[:-1] if len(token) > 2 and token[-1] == token[-2] else token
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lowercase, lightly stemmed terms, breaking snake_case and camelCase names.
+    """
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", str(text))
+    return [_stem(t) for t in re.findall(r"[a-z]+|\d+", text.lower()) if t not in STOPWORDS]
+
+
+def dtype_family(dtype: str) -> str:
+    if dtype in DATETIME_FORMATS or dtype.startswith("datetime"):
+        return "datetime"
+    if dtype in NUMERIC_DTYPES:
+        return "numeric"
+    return "categorical"
+
+
+@lru_cache(maxsize=1)
+def _get_embedding_model():
+    if SentenceTransformer is None or not COLUMN_INDEX_EMBEDDING_MODEL:
+        return None
+    try:
+        return SentenceTransformer(COLUMN_INDEX_EMBEDDING_MODEL)
+    except Exception:
+        return None
+
+
+class ColumnIndex:
+    """
+    A small retrieval index over a dataset's columns.
+
+    Each column is described by the terms in its name (weighted highest), words for its dtype family
+    and, for categorical columns, its sample values. Queries are scored with BM25 and, when a local
+    sentence-embedding model is configured, blended with cosine similarity. Query terms that share a
+    prefix with an indexed term ('profitability' and 'profit') count at reduced weight. Ties are broken in favour
+    of columns whose profile shows they vary (non-zero std), then by dataset order.
+
+    Attributes:
+        columns (List[str]): Column names in dataset order.
+        families (Dict[str, str]): Column name to dtype family ('numeric', 'categorical', 'datetime').
+        embeddings (Optional[list]): Normalised column embeddings, if an embedding model was available.
+
+    Methods:
+        score(query: str) -> Dict[str, float]:
+            Returns a relevance score for every column.
+        top_k(query: str, k: int) -> List[str]:
+            Returns the k most relevant columns, padded in dataset order when few columns match.
+    """
+    def __init__(self, schema: Dict[str, Any], summary: Optional[Dict[str, Any]] = None):
+        self.columns = list(schema.get("columns", []))
+        dtypes = schema.get("dtypes", {})
+        samples = schema.get("sample_values", {})
+        self.families = {c: dtype_family(dtypes.get(c, "")) for c in self.columns}
+        self._constant = {c for c, stats in (summary or {}).items() if isinstance(stats, dict) and stats.get("std") == 0.0}
+
+        self._documents = {}
+        for column in self.columns:
+            terms = tokenize(column) * NAME_WEIGHT + DTYPE_TERMS[self.families[column]]
+            if self.families[column] == "categorical":
+                for value in (samples.get(column) or [])[:5]:
+                    terms += tokenize(value)[:3]
+            self._documents[column] = Counter(terms)
+
+        self._doc_lengths = {c: sum(doc.values()) for c, doc in self._documents.items()}
+        self._avg_length = (sum(self._doc_lengths.values()) / len(self.columns)) if self.columns else 0
+        document_frequency = Counter(term for doc in self._documents.values() for term in doc)
+        n = len(self.columns)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+        self.embeddings = None
+        model = _get_embedding_model()
+        if model is not None and self.columns:
+            descriptions = [f"{c} ({self.families[c]})" for c in self.columns]
+            self.embeddings = model.encode(descriptions, normalize_embeddings=True).tolist()
+
+    def _expand_query(self, query: str) -> Dict[str, float]:
+        weights = {}
+        for term in tokenize(query):
+            if term in self._idf:
+                weights[term] = max(weights.get(term, 0.0), 1.0)
+            if len(term) < MIN_PREFIX_LENGTH:
+                continue
+            for indexed in self._idf:
+                if indexed != term and len(indexed) >= MIN_PREFIX_LENGTH and (indexed.startswith(term) or term.startswith(indexed)):
+                    weights[indexed] = max(weights.get(indexed, 0.0), PREFIX_MATCH_WEIGHT)
+        return weights
+
+    def score(self, query: str) -> Dict[str, float]:
+        terms = self._expand_query(query)
+        scores = {}
+        for column, doc in self._documents.items():
+            length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[column] / (self._avg_length or 1))
+            total = 0.0
+            for term, weight in terms.items():
+                tf = doc.get(term, 0)
+                if tf:
+                    total += weight * self._idf[term] * tf * (BM25_K1 + 1) / (tf + length_norm)
+            scores[column] = total
+
+        model = _get_embedding_model() if self.embeddings is not None else None
+        if model is not None and query.strip():
+            best = max(scores.values(), default=0.0) or 1.0
+            query_vector = model.encode([query], normalize_embeddings=True)[0].tolist()
+            for column, vector in zip(self.columns, self.embeddings):
+                cosine = sum(a * b for a, b in zip(query_vector, vector))
+                scores[column] = scores[column] / best + COLUMN_INDEX_EMBEDDING_WEIGHT * cosine
+        return scores
+
+    def top_k(self, query: str, k: int = COLUMN_INDEX_TOP_K) -> List[str]:
+        scores = self.score(query)
+        position = {c: i for i, c in enumerate(self.columns)}
+        ranked = sorted(self.columns, key=lambda c: (-scores[c], c in self._constant, position[c]))
+        return ranked[:k]
+
+
+_index_lock = threading.Lock()
+_loaded_indexes: Dict[str, ColumnIndex] = {}
+
+
+def build_column_index(schema: Dict[str, Any], summary: Optional[Dict[str, Any]] = None) -> ColumnIndex:
+    """
+    Builds the column index for a freshly ingested dataset and stores it alongside the data.
+
+    Args:
+        schema (Dict[str, Any]): The dataset schema.
+        summary (Optional[Dict[str, Any]], optional): The dataset summary. Defaults to None.
+
+    Returns:
+        ColumnIndex: The new index.
+    """
+    index = ColumnIndex(schema, summary)
+    cache.set(COLUMN_INDEX_KEY, index)
+    return index
+
+
+def get_column_index() -> Optional[ColumnIndex]:
+    """
+    Returns the column index for the loaded dataset, loading it from the cache once per dataset version.
+    """
+    version = get_dataset_version()
+    with _index_lock:
+        index = _loaded_indexes.get(version)
+        if index is None:
+            index = cache.get(COLUMN_INDEX_KEY)
+            if index is not None:
+                _loaded_indexes.clear()
+                _loaded_indexes[version] = index
+        return index
+
+
+def relevant_columns(query: str, k: int = COLUMN_INDEX_TOP_K) -> Optional[List[str]]:
+    """
+    Returns the k columns most relevant to a query, or None if no index is available.
+
+    Args:
+        query (str): The user query, section name, or both.
+        k (int, optional): Number of columns to return. Defaults to COLUMN_INDEX_TOP_K.
+
+    Returns:
+        Optional[List[str]]: Column names ordered by relevance.
+    """
+    index = get_column_index()
+    if index is None:
+        return None
+    return index.top_k(query, k)
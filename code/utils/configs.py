@@ -9,21 +9,41 @@ cache_dir.mkdir(exist_ok=True)
 
 
 
-def get_llm():
+def get_llm(task=None):
     """
     Retrieve the Language Learning Model (LLM) instance from the holder.
 
+    Args:
+        task (str, optional): The task type (see LLM_TASKS). When given, returns the LLM routed for the task,
+            limited by the task's concurrency pool. Defaults to None (the primary LLM).
+
     Returns:
         The LLM instance if it is set.
 
     Raises:
         ValueError: If the LLM instance is not set.
     """
-    llm = llm_holder.llm
+    llm = llm_holder.llm_for(task) if task else llm_holder.llm
     if llm is None:
         raise ValueError("LLM is not set. Please configure the LLM before using it.")
     return llm
 
+def llm_cache_identity(task=None):
+    """
+    Returns what identifies the configured LLM's outputs in cache keys: provider, model, endpoint and parameters.
+
+    Args:
+        task (str, optional): The task type whose routed LLM to describe. Defaults to None (the primary LLM).
+
+    Returns:
+        tuple: A hashable, stable description of the current LLM configuration.
+
+    Raises:
+        ValueError: If the LLM instance is not set.
+    """
+    config = get_llm(task).config
+    return (config.provider, config.model, config.base_url, tuple(sorted((key, str(value)) for key, value in config.params.items())))
+
 app_config = {
     'DEBUG': True,
     'HOST': '0.0.0.0',
@@ -16,4 +16,118 @@ PPT_THEME_OPTIONS = ["BlackWhite", "BlueYellow", "Orange", "Teal", "BlueGrey", "
 BASE_URL = "http://localhost:8000"
 
 LOGO_ICON = 'assets/pie.png'
-MAX_CACHE_FILES = 10 
\ No newline at end of file
+MAX_CACHE_FILES = 10 
+TOOL_CALL_CONCURRENCY = 4
+TOOL_CALL_TIMEOUT = 30
+
+LLM_REQUEST_TIMEOUT = 120
+LLM_REQUEST_DEADLINE = 300
+LLM_HEDGE_SETTINGS = {
+    "enabled": False,
+    "percentile": 95,
+    "min_samples": 20,
+    "static_delay": None,
+    "to_fallback": True,
+    "max_extra_ratio": 0.1,
+    "max_in_flight": 2,
+}
+LLM_RETRY_SETTINGS = {
+    "max_attempts": 4,
+    "base_delay": 1.0,
+    "max_delay": 30.0,
+    "budget_ratio": 0.2,
+    "min_retries": 5,
+}
+LLM_RATE_LIMITS = {
+    "huggingface-openai": {"requests_per_minute": 30, "tokens_per_minute": 60000},
+    "nvidia": {"requests_per_minute": 40, "tokens_per_minute": 120000},
+    "gemini": {"requests_per_minute": 15, "tokens_per_minute": 1000000},
+}
+LLM_RATE_LIMIT_BURST_SECONDS = 10
+LLM_TASKS = {
+    "outline": "Report outline",
+    "section": "Report sections",
+    "summary": "Summaries",
+    "plot_config": "Plot selection",
+    "slides": "Slides",
+    "chat": "Chat",
+}
+LLM_TASK_CONCURRENCY = {
+    "outline": 2,
+    "section": 6,
+    "summary": 8,
+    "plot_config": 4,
+    "slides": 6,
+    "chat": 4,
+}
+
+DATASET_VERSION_KEY = 'dataset_version'
+PROMPT_CONTEXT_TOKEN_BUDGET = 3000
+PROMPT_CONTEXT_SAMPLE_VALUES = 3
+
+COLUMN_INDEX_KEY = 'column_index'
+COLUMN_INDEX_TOP_K = 25
+COLUMN_INDEX_EMBEDDING_MODEL = None
+COLUMN_INDEX_EMBEDDING_WEIGHT = 0.5
+
+CHAT_MEMORY_RECENT_TURNS = 3
+CHAT_MEMORY_TOKEN_BUDGET = 2000
+CHAT_SUMMARY_MAX_TOKENS = 400
+CHAT_MEMORY_EXCERPT_CHARS = 200
+CHAT_SAMPLE_ROWS = 10
+
+PLOT_EXPORT_WORKERS = 2
+PLOT_EXPORT_SETTINGS = {
+    "format": "png",
+    "width": 900,
+    "height": 500,
+    "dpi": 192,
+    "quality": None,
+    "compress_level": None,
+    "colors": None,
+}
+PLOT_EXPORT_CACHE_BYTES = 64 * 1024 * 1024
+REPORT_IMAGE_WIDTH = 900
+REPORT_IMAGE_HEIGHT = 500
+REPORT_SVG_MAX_POINTS = 20000
+SLIDE_IMAGE_DPI = 192
+REPORT_IMAGE_COLORS = 256
+
+PLOT_RECOMMENDER_TIE_MARGIN = 0.15
+PLOT_RECOMMENDER_LLM_TIEBREAK = True
+PLOT_RECOMMENDER_MAX_OPTIONS = 3
+PLOT_RECOMMENDER_MAX_COLUMNS = 8
+PLOT_FRAME_CACHE_SIZE = 4
+RESAMPLE_MAX_BUCKETS = 2000
+
+TIMESERIES_PYRAMID_KEY = 'timeseries_pyramids'
+PYRAMID_BASE_BUCKETS = 8192
+PYRAMID_FACTOR = 4
+PYRAMID_MIN_ROWS = 5000
+PYRAMID_MAX_SERIES = 64
+PYRAMID_FIGURE_MAX_POINTS = 4000
+PLOT_TIMESERIES_WIDTH_PX = 1500
+
+PLOT_AGGREGATE_MIN_ROWS = 2000
+PLOT_AGGREGATE_MAX_ROWS = 5000000
+PLOT_DENSITY_BINS = 100
+PLOT_DENSITY_MAX_FACETS = 6
+PLOT_DISTRIBUTION_BINS = 200
+PLOT_KDE_POINTS = 200
+PLOT_HEATMAP_MAX_COLUMNS = 30
+PLOT_PARALLEL_MAX_ROWS = 2000
+PLOT_PARALLEL_MAX_DIMENSIONS = 8
+PLOT_PARALLEL_MAX_STRATA = 12
+
+FIGURE_TYPED_ARRAY_MIN_LENGTH = 16
+FIGURE_STORE_CACHE_BYTES = 64 * 1024 * 1024
+CHAT_RENDER_CACHE_SIZE = 64
+
+ARTIFACT_STORE_DIR = 'artifact-store'
+ARTIFACT_STORE_MAX_BYTES = 512 * 1024 * 1024
+
+REPORT_SECTION_CACHE_TIMEOUT = 24 * 60 * 60
+REPORT_OUTLINE_PROGRESS_TIMEOUT = 300
+# Opt-in: writes each proposed section while the user reviews the outline, spending LLM calls on
+# sections that may be unticked or renamed in exchange for a faster report.
+REPORT_SPECULATIVE_SECTIONS = False
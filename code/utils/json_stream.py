@@ -0,0 +1,101 @@
+import json
+from typing import Any, List, Tuple, Union
+
+PathItem = Union[str, int]
+
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON document as it streams in, emitting every scalar value as soon as it is complete.
+
+    Text before the first '{' or '[' (such as a markdown fence or a preamble) is skipped, and so is
+    anything after the top-level value closes. Each emitted value comes with its path from the root,
+    e.g. ('Sections', 0, 'Section_Name'). Every character is looked at once, so feeding a whole
+    response chunk by chunk costs the same as parsing it at the end.
+
+    Attributes:
+        done (bool): Whether the top-level value has closed.
+
+    Methods:
+        feed(text) -> List[Tuple[Tuple[PathItem, ...], Any]]:
+            Consumes a chunk and returns the (path, value) pairs completed by it.
+    """
+    def __init__(self):
+        self.done = False
+        # One [container, key or index, expecting_key] frame per open object or array.
+        self._stack: List[list] = []
+        self._started = False
+        self._in_string = False
+        self._escaped = False
+        self._token: List[str] = []
+
+    def _path(self) -> Tuple[PathItem, ...]:
+        return tuple(frame[1] for frame in self._stack)
+
+    def _emit_string(self, raw: str, events: list):
+        try:
+            value = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            value = raw
+        frame = self._stack[-1] if self._stack else None
+        if frame is not None and frame[0] == 'object' and frame[2]:
+            frame[1], frame[2] = value, False
+        else:
+            events.append((self._path(), value))
+
+    def _flush_literal(self, events: list):
+        if not self._token:
+            return
+        literal = ''.join(self._token)
+        self._token = []
+        try:
+            value = json.loads(literal)
+        except json.JSONDecodeError:
+            value = literal
+        events.append((self._path(), value))
+
+    def feed(self, text: str) -> List[Tuple[Tuple[PathItem, ...], Any]]:
+        events = []
+        for char in text:
+            if self.done:
+                break
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                    self._token.append(char)
+                elif char == '\\':
+                    self._escaped = True
+                    self._token.append(char)
+                elif char == '"':
+                    self._in_string = False
+                    raw, self._token = ''.join(self._token), []
+                    self._emit_string(raw, events)
+                else:
+                    self._token.append(char)
+                continue
+            if not self._started:
+                if char not in '{[':
+                    continue
+                self._started = True
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._stack.append(['object', None, True] if char == '{' else ['array', 0, False])
+            elif char in '}]':
+                self._flush_literal(events)
+                if self._stack:
+                    self._stack.pop()
+                self.done = not self._stack
+            elif char == ',':
+                self._flush_literal(events)
+                if self._stack:
+                    frame = self._stack[-1]
+                    if frame[0] == 'object':
+                        frame[2] = True
+                    else:
+                        frame[1] += 1
+            elif char == ':' or char.isspace():
+                self._flush_literal(events)
+            else:
+                self._token.append(char)
+        return events
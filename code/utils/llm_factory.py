@@ -1,12 +1,15 @@
 import os
 import asyncio
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Optional, Dict, List, Union
+from collections import deque
+from typing import Any, Optional, Dict, List, Tuple, Union
 import requests
 import google.generativeai as genai
 from openai import AsyncOpenAI, OpenAI
 from PIL import Image
 import logging
+from utils.constants import LLM_REQUEST_TIMEOUT, LLM_TASKS, LLM_TASK_CONCURRENCY
 
 class LLMConfig:
     """
@@ -17,18 +20,20 @@ class LLMConfig:
         base_url (Optional[str]): The base URL for the API endpoint, if applicable.
         params (dict): Additional parameters for the LLM configuration.
         api_key (str): The API key for accessing the LLM provider's services.
+        timeout (float): Default per-request timeout in seconds.
     Methods:
-        __init__(provider: str, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None, **kwargs):
+        __init__(provider: str, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None, timeout: Optional[float] = None, **kwargs):
             Initializes the LLMConfig instance with the given provider, model, and optional parameters.
         _get_api_key(provided_key: Optional[str]) -> str:
             Retrieves the API key for the specified provider. If a key is provided, it is used directly.
             Otherwise, the method attempts to fetch the key from environment variables based on the provider.
             Raises a ValueError if the API key is not set.
     """
-    def __init__(self, provider: str, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None, **kwargs):
+    def __init__(self, provider: str, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None, timeout: Optional[float] = None, **kwargs):
         self.provider = provider.lower()
         self.model = model
         self.base_url = base_url
+        self.timeout = timeout or LLM_REQUEST_TIMEOUT
         self.params = kwargs
         self.api_key = self._get_api_key(api_key)
 
@@ -68,11 +73,15 @@ class BaseLLM(ABC):
         _create_client():
             Abstract method to create and return a client instance.
         
-        get_response(prompt: str) -> Any:
+        get_response(prompt: str, timeout: Optional[float] = None) -> Any:
             Abstract method to get a response from the language model synchronously.
         
-        get_aresponse(prompt: str) -> Any:
+        get_aresponse(prompt: str, timeout: Optional[float] = None) -> Any:
             Abstract method to get a response from the language model asynchronously.
+
+        get_acompletion(prompt: str, timeout: Optional[float] = None) -> str:
+            Collects the asynchronous response into a single string. Cancelling the awaiting task
+            closes the underlying stream.
         
         get_model_info() -> Dict[str, Any]:
             Returns a dictionary containing information about the model, including the provider, model name, and parameters.
@@ -86,13 +95,19 @@ class BaseLLM(ABC):
         pass
 
     @abstractmethod
-    def get_response(self, prompt: str) -> Any:
+    def get_response(self, prompt: str, timeout: Optional[float] = None) -> Any:
         pass
 
     @abstractmethod
-    async def get_aresponse(self, prompt: str) -> Any:
+    async def get_aresponse(self, prompt: str, timeout: Optional[float] = None) -> Any:
         pass
 
+    async def get_acompletion(self, prompt: str, timeout: Optional[float] = None) -> str:
+        chunks = []
+        async for chunk in self.get_aresponse(prompt, timeout=timeout):
+            chunks.append(chunk)
+        return "".join(chunks)
+
     def get_model_info(self) -> Dict[str, Any]:
         return {
             "provider": self.config.provider,
@@ -113,9 +128,9 @@ class NVIDIALLM(BaseLLM):
             Initializes the NVIDIALLM instance with the given configuration.
         _create_client():
             Creates both synchronous and asynchronous clients for interacting with the NVIDIA API.
-        get_response(prompt: str) -> str:
+        get_response(prompt: str, timeout: Optional[float] = None) -> str:
             Sends a prompt to the NVIDIA API and returns the response as a string.
-        async get_aresponse(prompt: str):
+        async get_aresponse(prompt: str, timeout: Optional[float] = None):
             Sends a prompt to the NVIDIA API and yields the response asynchronously.
     """
     def __init__(self, config):
@@ -125,27 +140,32 @@ class NVIDIALLM(BaseLLM):
         
     def _create_client(self):
         base_url = "https://integrate.api.nvidia.com/v1"
-        self.sync_client = OpenAI(base_url=base_url, api_key=self.config.api_key)
-        self.async_client = AsyncOpenAI(base_url=base_url, api_key=self.config.api_key)
+        self.sync_client = OpenAI(base_url=base_url, api_key=self.config.api_key, timeout=self.config.timeout, max_retries=0)
+        self.async_client = AsyncOpenAI(base_url=base_url, api_key=self.config.api_key, timeout=self.config.timeout, max_retries=0)
 
-    def get_response(self, prompt: str) -> str:
+    def get_response(self, prompt: str, timeout: Optional[float] = None) -> str:
         response = self.sync_client.chat.completions.create(
             model=self.config.model,
             messages=[{"role": "user", "content": prompt}],
+            timeout=timeout or self.config.timeout,
             **self.config.params
         )
         return response.choices[0].message.content
 
-    async def get_aresponse(self, prompt: str):
+    async def get_aresponse(self, prompt: str, timeout: Optional[float] = None):
         stream = await self.async_client.chat.completions.create(
             model=self.config.model,
             messages=[{"role": "user", "content": prompt}],
             stream=True,
+            timeout=timeout or self.config.timeout,
             **self.config.params
         )
-        async for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                yield chunk.choices[0].delta.content
+        try:
+            async for chunk in stream:
+                if chunk.choices[0].delta.content is not None:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
 
 class GeminiLLM(BaseLLM):
     """
@@ -161,10 +181,12 @@ class GeminiLLM(BaseLLM):
             Configures and creates the generative model client.
         _prepare_content(prompt: Union[str, List[Union[str, Image.Image]]]) -> Union[str, List[Union[str, Image.Image]]]:
             Prepares the content to be sent to the generative model based on the type of the prompt.
-        get_response(prompt: Union[str, List[Union[str, Image.Image]]]) -> str:
+        get_response(prompt: Union[str, List[Union[str, Image.Image]]], timeout: Optional[float] = None) -> str:
             Generates a response from the generative model based on the provided prompt.
-        async get_aresponse(prompt: Union[str, List[Union[str, Image.Image]]]):
+        async get_aresponse(prompt: Union[str, List[Union[str, Image.Image]]], timeout: Optional[float] = None):
             Asynchronously generates a response from the generative model based on the provided prompt, yielding chunks of text.
+        async get_acompletion(prompt: Union[str, List[Union[str, Image.Image]]], timeout: Optional[float] = None) -> str:
+            Runs the blocking SDK call in a worker thread so it does not stall the event loop.
     """
     def __init__(self, config):
         self.provider = "Google"
@@ -183,20 +205,30 @@ class GeminiLLM(BaseLLM):
         else:
             return str(prompt)
 
-    def get_response(self, prompt: Union[str, List[Union[str, Image.Image]]]) -> str:
+    def get_response(self, prompt: Union[str, List[Union[str, Image.Image]]], timeout: Optional[float] = None) -> str:
         generation_config = genai.GenerationConfig(**{k: v for k, v in self.config.params.items() if k in ['temperature', 'max_output_tokens', 'top_p', 'top_k']})
         content = self._prepare_content(prompt)
-        response = self.client.generate_content(content, generation_config=generation_config)
+        response = self.client.generate_content(content, generation_config=generation_config,
+                                                request_options={"timeout": timeout or self.config.timeout})
         response.resolve()
         return response.text
 
-    async def get_aresponse(self, prompt: Union[str, List[Union[str, Image.Image]]]):
+    async def get_aresponse(self, prompt: Union[str, List[Union[str, Image.Image]]], timeout: Optional[float] = None):
         generation_config = genai.GenerationConfig(**{k: v for k, v in self.config.params.items() if k in ['temperature', 'max_output_tokens', 'top_p', 'top_k']})
         content = self._prepare_content(prompt)
-        response = self.client.generate_content(content, generation_config=generation_config, stream=True)
-        for chunk in response:
+        # The Gemini client blocks while it waits for each chunk, so the request and every chunk are pulled
+        # on a worker thread to keep the event loop free for other requests, deadlines and hedges.
+        response = await asyncio.to_thread(self.client.generate_content, content, generation_config=generation_config,
+                                           stream=True, request_options={"timeout": timeout or self.config.timeout})
+        chunks = iter(response)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
             yield chunk.text
-            await asyncio.sleep(0.01)
+
+    async def get_acompletion(self, prompt: Union[str, List[Union[str, Image.Image]]], timeout: Optional[float] = None) -> str:
+        return await asyncio.to_thread(self.get_response, prompt, timeout)
 
 class HFOpenAIAPILLM(BaseLLM):
     """
@@ -211,9 +243,9 @@ class HFOpenAIAPILLM(BaseLLM):
             Initializes the HFOpenAIAPILLM instance with the given configuration.
         _create_client():
             Creates synchronous and asynchronous clients for API interactions.
-        get_response(prompt: str) -> str:
+        get_response(prompt: str, timeout: Optional[float] = None) -> str:
             Gets a response from the language model for the given prompt using the synchronous client.
-        async get_aresponse(prompt: str):
+        async get_aresponse(prompt: str, timeout: Optional[float] = None):
             Asynchronously gets a response from the language model for the given prompt using the asynchronous client.
     """
     def __init__(self, config):
@@ -223,30 +255,32 @@ class HFOpenAIAPILLM(BaseLLM):
         
     def _create_client(self):
         base_url = f"https://api-inference.huggingface.co/models/{self.config.model}/v1/"
-        self.sync_client = OpenAI(base_url=base_url, api_key=self.config.api_key)
-        self.async_client = AsyncOpenAI(base_url=base_url, api_key=self.config.api_key)
+        self.sync_client = OpenAI(base_url=base_url, api_key=self.config.api_key, timeout=self.config.timeout, max_retries=0)
+        self.async_client = AsyncOpenAI(base_url=base_url, api_key=self.config.api_key, timeout=self.config.timeout, max_retries=0)
 
-    def get_response(self, prompt: str) -> str:
-        try:
-            response = self.sync_client.chat.completions.create(
-                model=self.config.model,
-                messages=[{"role": "user", "content": prompt}],
-                **self.config.params
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return str(e)
+    def get_response(self, prompt: str, timeout: Optional[float] = None) -> str:
+        response = self.sync_client.chat.completions.create(
+            model=self.config.model,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=timeout or self.config.timeout,
+            **self.config.params
+        )
+        return response.choices[0].message.content
 
-    async def get_aresponse(self, prompt: str):
+    async def get_aresponse(self, prompt: str, timeout: Optional[float] = None):
         stream = await self.async_client.chat.completions.create(
             model=self.config.model,
             messages=[{"role": "user", "content": prompt}],
             stream=True,
+            timeout=timeout or self.config.timeout,
             **self.config.params
         )
-        async for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                yield chunk.choices[0].delta.content
+        try:
+            async for chunk in stream:
+                if chunk.choices[0].delta.content is not None:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
 
 
 class LLMFactory:
@@ -275,6 +309,169 @@ class LLMFactory:
         return llm_classes[config.provider](config)
 
 
+class ConcurrencyPool:
+    """
+    Limits how many requests run at once, across threads and event loops.
+
+    Dash callbacks run their coroutines on separate short-lived event loops, so an asyncio.Semaphore,
+    which belongs to one loop, cannot be shared between them. Waiters are served in arrival order,
+    and a freed slot is handed straight to the next waiter.
+
+    Attributes:
+        limit (int): The maximum number of concurrent holders.
+
+    Methods:
+        async acquire():
+            Waits for a slot without blocking the event loop.
+        acquire_blocking():
+            Waits for a slot, blocking the calling thread.
+        release():
+            Frees a slot or hands it to the next waiter.
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        with self._lock:
+            if self._active < self.limit:
+                self._active += 1
+                return
+            loop = asyncio.get_running_loop()
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, waiter))
+                    waiting = True
+                except ValueError:
+                    waiting = False
+            if not waiting and waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait was cancelled.
+                self.release()
+            raise
+
+    def acquire_blocking(self):
+        with self._lock:
+            if self._active < self.limit:
+                self._active += 1
+                return
+            event = threading.Event()
+            self._waiters.append((None, event))
+        event.wait()
+
+    def _hand_over(self, waiter: asyncio.Future):
+        if waiter.cancelled():
+            self.release()
+        else:
+            waiter.set_result(None)
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                if loop is None:
+                    waiter.set()
+                    return
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(self._hand_over, waiter)
+                    return
+            self._active -= 1
+
+
+class PooledLLM(BaseLLM):
+    """
+    Runs an LLM's requests through a concurrency pool.
+
+    Streaming requests hold their slot until the stream ends. It exposes the wrapped LLM's `config`.
+
+    Attributes:
+        llm (BaseLLM): The wrapped LLM.
+        pool (ConcurrencyPool): The pool requests are limited by.
+    """
+    def __init__(self, llm: BaseLLM, pool: ConcurrencyPool):
+        self.llm = llm
+        self.pool = pool
+        self.config = llm.config
+        self.provider = getattr(llm, "provider", llm.config.provider)
+
+    def _create_client(self):
+        return None
+
+    def get_response(self, prompt: Any, timeout: Optional[float] = None) -> str:
+        self.pool.acquire_blocking()
+        try:
+            return self.llm.get_response(prompt, timeout=timeout)
+        finally:
+            self.pool.release()
+
+    async def get_aresponse(self, prompt: Any, timeout: Optional[float] = None):
+        await self.pool.acquire()
+        try:
+            async for chunk in self.llm.get_aresponse(prompt, timeout=timeout):
+                yield chunk
+        finally:
+            self.pool.release()
+
+    async def get_acompletion(self, prompt: Any, timeout: Optional[float] = None) -> str:
+        await self.pool.acquire()
+        try:
+            return await self.llm.get_acompletion(prompt, timeout=timeout)
+        finally:
+            self.pool.release()
+
+
+class LLMRouter:
+    """
+    Maps task types to configured LLMs, so cheap tasks can run on a small, fast model.
+
+    Each task type (see LLM_TASKS) can be routed to a configured (provider, model) pair; unrouted tasks
+    use the primary LLM. Every task type has its own concurrency pool (see LLM_TASK_CONCURRENCY), so a
+    burst of summaries cannot hold up section writing.
+
+    Attributes:
+        routes (Dict[str, Tuple[str, str]]): The (provider, model) each routed task uses.
+
+    Methods:
+        set_route(task, route):
+            Routes a task to a (provider, model) pair, or back to the primary LLM with None.
+        order(task, llms) -> List[BaseLLM]:
+            Orders configured LLMs for a task: its routed LLM first, then the rest as failover.
+        pool(task) -> ConcurrencyPool:
+            Returns the task's concurrency pool.
+    """
+    def __init__(self, concurrency: Optional[Dict[str, int]] = None):
+        concurrency = {**LLM_TASK_CONCURRENCY, **(concurrency or {})}
+        self.routes: Dict[str, Tuple[str, str]] = {}
+        self._pools = {task: ConcurrencyPool(concurrency[task]) for task in LLM_TASKS}
+
+    def _check(self, task: str):
+        if task not in LLM_TASKS:
+            raise ValueError(f"Unknown LLM task: {task}. Use one of {', '.join(LLM_TASKS)}.")
+
+    def set_route(self, task: str, route: Optional[Tuple[str, str]]):
+        self._check(task)
+        if route is None:
+            self.routes.pop(task, None)
+        else:
+            self.routes[task] = tuple(route)
+
+    def order(self, task: str, llms: List[BaseLLM]) -> List[BaseLLM]:
+        self._check(task)
+        route = self.routes.get(task)
+        routed = [llm for llm in llms if (llm.config.provider, llm.config.model) == route]
+        return routed + [llm for llm in llms if llm not in routed]
+
+    def pool(self, task: str) -> ConcurrencyPool:
+        self._check(task)
+        return self._pools[task]
+
+
 def batch_process(llm: BaseLLM, prompts: List[str]) -> List[str]:
     """
     Process a batch of prompts and return their responses.
@@ -0,0 +1,590 @@
+import asyncio
+import logging
+import math
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+from openai import APIConnectionError
+from utils.llm_factory import BaseLLM
+from utils.token_counter import count_tokens
+from utils.constants import (LLM_RATE_LIMITS, LLM_RATE_LIMIT_BURST_SECONDS, LLM_RETRY_SETTINGS,
+                             LLM_REQUEST_DEADLINE, LLM_HEDGE_SETTINGS)
+
+logger = logging.getLogger('llm_resilience')
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request cannot complete before its deadline."""
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket that hands out reservations.
+
+    A reservation always succeeds and returns how long the caller must wait before using it, so
+    concurrent callers queue fairly instead of all polling the bucket.
+
+    Attributes:
+        capacity (float): Maximum number of tokens the bucket can hold.
+        refill_rate (float): Tokens added per second.
+
+    Methods:
+        reserve(amount: float) -> float:
+            Takes `amount` tokens and returns the number of seconds to wait before proceeding.
+        refund(amount: float):
+            Returns tokens from a reservation that was not used.
+    """
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill()
+            self._tokens -= min(amount, self.capacity)
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.refill_rate
+
+    def refund(self, amount: float):
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + min(amount, self.capacity))
+
+
+class ProviderRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits for a single provider.
+
+    Attributes:
+        requests (TokenBucket): Bucket counting requests.
+        tokens (TokenBucket): Bucket counting prompt plus completion tokens.
+
+    Methods:
+        reserve(token_count: int) -> float:
+            Reserves one request and `token_count` tokens, returning the seconds to wait.
+        refund(token_count: int):
+            Gives back a reservation that was abandoned.
+    """
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, burst_seconds: float = LLM_RATE_LIMIT_BURST_SECONDS):
+        self.requests = TokenBucket(max(1.0, requests_per_minute * burst_seconds / 60), requests_per_minute / 60)
+        self.tokens = TokenBucket(max(1.0, tokens_per_minute * burst_seconds / 60), tokens_per_minute / 60)
+
+    def reserve(self, token_count: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(token_count))
+
+    def refund(self, token_count: int):
+        self.requests.refund(1)
+        self.tokens.refund(token_count)
+
+
+class RetryBudget:
+    """
+    Caps retries (or hedges) to a fraction of recent traffic so a provider is not hammered.
+
+    Every request deposits `ratio` tokens and every retry withdraws one. The balance starts at
+    `min_retries` and never grows past `max_balance`, so a long quiet period cannot bank a retry storm.
+
+    Methods:
+        record_request():
+            Credits the budget for a new request.
+        try_spend() -> bool:
+            Withdraws one retry if the budget allows it.
+    """
+    def __init__(self, ratio: float, min_retries: int, max_balance: float = 20.0):
+        self.ratio = ratio
+        self.max_balance = max(max_balance, min_retries)
+        self._balance = float(min_retries)
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self._balance = min(self.max_balance, self._balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._balance >= 1:
+                self._balance -= 1
+                return True
+            return False
+
+
+class RetryPolicy:
+    """
+    Jittered exponential backoff settings.
+
+    Attributes:
+        max_attempts (int): Attempts per provider, including the first.
+        base_delay (float): Backoff for the first retry in seconds.
+        max_delay (float): Upper bound for a single backoff in seconds.
+
+    Methods:
+        backoff(attempt: int) -> float:
+            Returns a "full jitter" delay for the given zero-based attempt.
+    """
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 30.0, **kwargs):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+_rate_limiters: Dict[str, ProviderRateLimiter] = {}
+_retry_budgets: Dict[str, RetryBudget] = {}
+_registry_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> Optional[ProviderRateLimiter]:
+    """
+    Returns the shared rate limiter for a provider, or None if the provider has no configured limits.
+    """
+    limits = LLM_RATE_LIMITS.get(provider)
+    if not limits:
+        return None
+    with _registry_lock:
+        if provider not in _rate_limiters:
+            _rate_limiters[provider] = ProviderRateLimiter(limits["requests_per_minute"], limits["tokens_per_minute"])
+        return _rate_limiters[provider]
+
+
+def get_retry_budget(provider: str) -> RetryBudget:
+    """
+    Returns the shared retry budget for a provider.
+    """
+    with _registry_lock:
+        if provider not in _retry_budgets:
+            _retry_budgets[provider] = RetryBudget(LLM_RETRY_SETTINGS["budget_ratio"], LLM_RETRY_SETTINGS["min_retries"])
+        return _retry_budgets[provider]
+
+
+def estimate_tokens(llm: BaseLLM, prompt: Any) -> int:
+    """
+    Roughly estimates the tokens a request will consume: the prompt plus the completion allowance.
+    """
+    prompt_tokens = count_tokens(str(prompt), llm.config.provider)
+    completion_tokens = llm.config.params.get("max_tokens") or llm.config.params.get("max_output_tokens") or 0
+    return prompt_tokens + int(completion_tokens)
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Decides whether an error is transient: rate limiting, server errors, timeouts and dropped connections.
+    """
+    status = getattr(error, "status_code", None)
+    if status is None and isinstance(getattr(error, "code", None), int):
+        status = error.code
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return isinstance(error, (TimeoutError, ConnectionError, APIConnectionError))
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """
+    Reads a Retry-After header from a provider error, if one was sent.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    Returns the q-th percentile (0-100) of `values` using nearest-rank, or None if empty.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class LatencyTracker:
+    """
+    Rolling window of completed request latencies for one provider/model.
+
+    Methods:
+        record(seconds: float):
+            Adds a completed request's latency.
+        percentile(q: float, min_samples: int = 1) -> Optional[float]:
+            Returns the q-th percentile, or None until `min_samples` latencies have been seen.
+        snapshot() -> List[float]:
+            Returns a copy of the window.
+    """
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        samples = self.snapshot()
+        if len(samples) < min_samples:
+            return None
+        return percentile(samples, q)
+
+    def snapshot(self) -> List[float]:
+        with self._lock:
+            return list(self._samples)
+
+
+class HedgeMetrics:
+    """
+    Tracks what hedging costs and what it buys.
+
+    Baseline latencies are single, un-hedged attempts; observed latencies are end-to-end times of
+    requests that were eligible for hedging. Comparing their percentiles shows the tail improvement.
+
+    Methods:
+        record_attempt(seconds: float):
+            Adds the latency of a single completed attempt.
+        record_request(seconds: float, hedged: bool, hedge_won: bool):
+            Adds the end-to-end latency of a hedge-eligible request.
+        report() -> Dict[str, Any]:
+            Returns p50/p95/p99 for both distributions plus hedge counts and extra spend.
+    """
+    def __init__(self, window: int = 500, log_every: int = 50):
+        self._attempts = deque(maxlen=window)
+        self._requests = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.log_every = log_every
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def record_attempt(self, seconds: float):
+        with self._lock:
+            self._attempts.append(seconds)
+
+    def record_request(self, seconds: float, hedged: bool, hedge_won: bool):
+        with self._lock:
+            self._requests.append(seconds)
+            self.requests += 1
+            self.hedges_sent += int(hedged)
+            self.hedges_won += int(hedge_won)
+            should_log = self.requests % self.log_every == 0
+        if should_log:
+            logger.info(f"Hedging metrics: {self.report()}")
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts, requests = list(self._attempts), list(self._requests)
+            sent, won, total = self.hedges_sent, self.hedges_won, self.requests
+        return {
+            "baseline": {f"p{q}": percentile(attempts, q) for q in (50, 95, 99)},
+            "hedged": {f"p{q}": percentile(requests, q) for q in (50, 95, 99)},
+            "requests": total,
+            "hedges_sent": sent,
+            "hedges_won": won,
+            "extra_spend_ratio": sent / total if total else 0.0,
+        }
+
+
+_latency_trackers: Dict[Tuple[str, str], LatencyTracker] = {}
+_hedge_budget = RetryBudget(LLM_HEDGE_SETTINGS["max_extra_ratio"], min_retries=1,
+                            max_balance=LLM_HEDGE_SETTINGS["max_in_flight"])
+_hedges_in_flight = threading.BoundedSemaphore(LLM_HEDGE_SETTINGS["max_in_flight"])
+hedge_metrics = HedgeMetrics()
+
+
+def get_latency_tracker(llm: BaseLLM) -> LatencyTracker:
+    """
+    Returns the shared latency tracker for an LLM's provider/model.
+    """
+    key = (llm.config.provider, llm.config.model)
+    with _registry_lock:
+        if key not in _latency_trackers:
+            _latency_trackers[key] = LatencyTracker()
+        return _latency_trackers[key]
+
+
+def _record_latency(llm: BaseLLM, seconds: float):
+    get_latency_tracker(llm).record(seconds)
+    hedge_metrics.record_attempt(seconds)
+
+
+def _describe(llm: BaseLLM) -> str:
+    return f"{llm.config.provider}/{llm.config.model}"
+
+
+class ResilientLLM(BaseLLM):
+    """
+    Wraps one or more configured LLMs with rate limiting, retries, deadlines, hedging and failover.
+
+    The first LLM is the primary; the rest are tried in order when it fails. It exposes the primary's
+    `config` so callers that display the active provider and model keep working.
+
+    When hedging is enabled, a request that has not finished within the configured percentile of
+    recent latency for the primary provider/model is duplicated, optionally to the next provider,
+    and the first response wins. Hedges are capped by a spend ratio and an in-flight limit. Only
+    `get_acompletion` can cancel the losing request; `get_response` lets it finish in the background.
+
+    Attributes:
+        llms (List[BaseLLM]): The configured LLMs in failover order.
+        retry_policy (RetryPolicy): Backoff settings applied per provider.
+        deadline (float): Overall seconds allowed for one logical request, across retries and failover.
+        hedge_settings (Dict[str, Any]): Hedging configuration, see LLM_HEDGE_SETTINGS.
+
+    Methods:
+        get_response(prompt: str, timeout: Optional[float] = None) -> str:
+            Returns a complete response, retrying, hedging and failing over as needed.
+        async get_aresponse(prompt: str, timeout: Optional[float] = None):
+            Streams a response; retries and failover apply until the first chunk arrives.
+        async get_acompletion(prompt: str, timeout: Optional[float] = None) -> str:
+            Returns a complete response asynchronously, cancelling the losing hedge.
+    """
+    def __init__(self, llms: List[BaseLLM], retry_policy: Optional[RetryPolicy] = None,
+                 deadline: float = LLM_REQUEST_DEADLINE, hedge_settings: Optional[Dict[str, Any]] = None):
+        if not llms:
+            raise ValueError("ResilientLLM needs at least one LLM")
+        self.llms = llms
+        self.config = llms[0].config
+        self.provider = getattr(llms[0], "provider", self.config.provider)
+        self.retry_policy = retry_policy or RetryPolicy(**LLM_RETRY_SETTINGS)
+        self.deadline = deadline
+        self.hedge_settings = {**LLM_HEDGE_SETTINGS, **(hedge_settings or {})}
+
+    def _create_client(self):
+        return None
+
+    def _deadline_for(self, timeout: Optional[float]) -> float:
+        return time.monotonic() + min(timeout or self.deadline, self.deadline)
+
+    def _acquire(self, llm: BaseLLM, prompt: Any, deadline: float) -> float:
+        """
+        Reserves rate-limit capacity and returns the wait, raising if it would overrun the deadline.
+        """
+        limiter = get_rate_limiter(llm.config.provider)
+        if limiter is None:
+            return 0.0
+        token_count = estimate_tokens(llm, prompt)
+        delay = limiter.reserve(token_count)
+        if time.monotonic() + delay >= deadline:
+            limiter.refund(token_count)
+            raise DeadlineExceeded(f"Rate limit for {llm.config.provider} would exceed the request deadline")
+        return delay
+
+    def _next_delay(self, llm: BaseLLM, error: Exception, attempt: int, deadline: float) -> Optional[float]:
+        """
+        Returns how long to back off before retrying, or None if the error should not be retried here.
+        """
+        if not is_retryable(error) or attempt + 1 >= self.retry_policy.max_attempts:
+            return None
+        if not get_retry_budget(llm.config.provider).try_spend():
+            logger.warning(f"Retry budget exhausted for {llm.config.provider}")
+            return None
+        delay = retry_after(error) or self.retry_policy.backoff(attempt)
+        if time.monotonic() + delay >= deadline:
+            return None
+        logger.info(f"Retrying {_describe(llm)} in {delay:.2f}s after attempt {attempt + 1}: {str(error)}")
+        return delay
+
+    def _hedge_delay(self) -> Optional[float]:
+        """
+        Returns how long to wait before hedging, or None if this request should not be hedged.
+        """
+        if not self.hedge_settings["enabled"]:
+            return None
+        observed = get_latency_tracker(self.llms[0]).percentile(self.hedge_settings["percentile"],
+                                                                self.hedge_settings["min_samples"])
+        return observed if observed is not None else self.hedge_settings["static_delay"]
+
+    def _hedge_order(self) -> List[BaseLLM]:
+        if self.hedge_settings["to_fallback"] and len(self.llms) > 1:
+            return self.llms[1:] + self.llms[:1]
+        return self.llms
+
+    def _start_hedge(self) -> bool:
+        """
+        Claims an in-flight slot and a unit of hedge budget; both must be available to hedge.
+        """
+        if not _hedges_in_flight.acquire(blocking=False):
+            return False
+        if not _hedge_budget.try_spend():
+            _hedges_in_flight.release()
+            return False
+        return True
+
+    def _call_with_retries(self, llm: BaseLLM, prompt: Any, deadline: float) -> str:
+        get_retry_budget(llm.config.provider).record_request()
+        for attempt in range(self.retry_policy.max_attempts):
+            time.sleep(self._acquire(llm, prompt, deadline))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"Deadline reached before calling {_describe(llm)}")
+            start = time.monotonic()
+            try:
+                response = llm.get_response(prompt, timeout=remaining)
+                _record_latency(llm, time.monotonic() - start)
+                return response
+            except Exception as e:
+                delay = self._next_delay(llm, e, attempt, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+        raise DeadlineExceeded(f"No attempts left for {_describe(llm)}")
+
+    def _call_with_failover(self, llms: List[BaseLLM], prompt: Any, deadline: float) -> str:
+        last_error = None
+        for llm in llms:
+            try:
+                return self._call_with_retries(llm, prompt, deadline)
+            except Exception as e:
+                last_error = e
+                logger.warning(f"{_describe(llm)} failed: {str(e)}")
+                if time.monotonic() >= deadline:
+                    break
+        raise last_error
+
+    def get_response(self, prompt: Any, timeout: Optional[float] = None) -> str:
+        deadline = self._deadline_for(timeout)
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is None:
+            return self._call_with_failover(self.llms, prompt, deadline)
+
+        _hedge_budget.record_request()
+        start = time.monotonic()
+        primary = _hedge_executor.submit(self._call_with_failover, self.llms, prompt, deadline)
+        done, _ = wait([primary], timeout=hedge_delay)
+        if done or not self._start_hedge():
+            result = primary.result()
+            hedge_metrics.record_request(time.monotonic() - start, hedged=False, hedge_won=False)
+            return result
+
+        try:
+            hedge_order = self._hedge_order()
+            logger.info(f"Hedging request to {_describe(hedge_order[0])} after {hedge_delay:.2f}s")
+            hedge = _hedge_executor.submit(self._call_with_failover, hedge_order, prompt, deadline)
+            pending = {primary, hedge}
+            last_error = None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    hedge_metrics.record_request(time.monotonic() - start, hedged=True, hedge_won=future is hedge)
+                    return result
+            raise last_error
+        finally:
+            _hedges_in_flight.release()
+
+    async def _astream(self, llms: List[BaseLLM], prompt: Any, deadline: float):
+        """
+        Streams from the first LLM in `llms` that produces a chunk, retrying and failing over before then.
+        """
+        last_error = None
+        for llm in llms:
+            get_retry_budget(llm.config.provider).record_request()
+            for attempt in range(self.retry_policy.max_attempts):
+                try:
+                    delay = self._acquire(llm, prompt, deadline)
+                except DeadlineExceeded as e:
+                    last_error = e
+                    break
+                await asyncio.sleep(delay)
+                start = time.monotonic()
+                stream = llm.get_aresponse(prompt, timeout=max(0.0, deadline - time.monotonic()))
+                try:
+                    first_chunk = await asyncio.wait_for(stream.__anext__(), max(0.0, deadline - time.monotonic()))
+                except StopAsyncIteration:
+                    return
+                except Exception as e:
+                    await stream.aclose()
+                    last_error = DeadlineExceeded(f"{_describe(llm)} timed out") if isinstance(e, asyncio.TimeoutError) else e
+                    delay = self._next_delay(llm, last_error, attempt, deadline)
+                    if delay is None:
+                        logger.warning(f"{_describe(llm)} failed: {str(last_error)}")
+                        break
+                    await asyncio.sleep(delay)
+                    continue
+
+                try:
+                    yield first_chunk
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(stream.__anext__(), max(0.0, deadline - time.monotonic()))
+                        except StopAsyncIteration:
+                            _record_latency(llm, time.monotonic() - start)
+                            return
+                        except asyncio.TimeoutError:
+                            raise DeadlineExceeded(f"{_describe(llm)} stream exceeded the request deadline")
+                        yield chunk
+                finally:
+                    await stream.aclose()
+            if time.monotonic() >= deadline:
+                break
+        raise last_error or DeadlineExceeded("Request deadline exceeded")
+
+    async def get_aresponse(self, prompt: Any, timeout: Optional[float] = None):
+        async for chunk in self._astream(self.llms, prompt, self._deadline_for(timeout)):
+            yield chunk
+
+    async def _acollect(self, llms: List[BaseLLM], prompt: Any, deadline: float) -> str:
+        chunks = []
+        async for chunk in self._astream(llms, prompt, deadline):
+            chunks.append(chunk)
+        return "".join(chunks)
+
+    async def get_acompletion(self, prompt: Any, timeout: Optional[float] = None) -> str:
+        deadline = self._deadline_for(timeout)
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is None:
+            return await self._acollect(self.llms, prompt, deadline)
+
+        _hedge_budget.record_request()
+        start = time.monotonic()
+        primary = asyncio.create_task(self._acollect(self.llms, prompt, deadline))
+        tasks = {primary}
+        hedge = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done and self._start_hedge():
+                hedge_order = self._hedge_order()
+                logger.info(f"Hedging request to {_describe(hedge_order[0])} after {hedge_delay:.2f}s")
+                hedge = asyncio.create_task(self._acollect(hedge_order, prompt, deadline))
+                tasks.add(hedge)
+
+            pending = set(tasks)
+            last_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    hedge_metrics.record_request(time.monotonic() - start, hedged=hedge is not None,
+                                                 hedge_won=task is hedge)
+                    return task.result()
+            raise last_error
+        finally:
+            losers = [task for task in tasks if not task.done()]
+            for task in losers:
+                task.cancel()
+            await asyncio.gather(*losers, return_exceptions=True)
+            if hedge is not None:
+                _hedges_in_flight.release()
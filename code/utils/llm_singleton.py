@@ -1,18 +1,29 @@
-from typing import Optional
-from utils.llm_factory import BaseLLM
+from typing import List, Optional
+from utils.llm_factory import BaseLLM, LLMRouter, PooledLLM
+from utils.llm_resilience import ResilientLLM
 
 class LLMHolder:
     """
-    LLMHolder is a singleton class that holds a single instance of a language model (LLM).
+    LLMHolder is a singleton class that holds the language model (LLM) used by the application.
+
+    Every LLM configured during the session is remembered. The most recently configured one is the
+    primary (unless it was added as a secondary model) and the others are kept, in order, as failover
+    targets behind a ResilientLLM. A router maps task types to configured LLMs, each with its own
+    concurrency pool.
 
     Attributes:
         _instance (LLMHolder): The singleton instance of the LLMHolder class.
-        _llm (Optional[BaseLLM]): The language model instance held by the singleton.
+        _llm (Optional[BaseLLM]): The resilient language model held by the singleton.
+        _configured (Dict[Tuple[str, str], BaseLLM]): Configured LLMs keyed by (provider, model), primary first.
+        router (LLMRouter): The task routes and concurrency pools.
 
     Methods:
         __new__(cls): Creates a new instance of the LLMHolder class if one does not already exist.
         llm (property): Gets the current language model instance.
-        llm (setter): Sets a new language model instance.
+        llm (setter): Makes a newly configured language model the primary and rebuilds the failover chain.
+        add(new_llm, primary): Adds a configured language model, as the primary or as a secondary model.
+        llm_for(task): Gets the language model for a task type, limited by the task's concurrency pool.
+        configured_llms (property): Gets the configured language models in failover order.
     """
     _instance = None
 
@@ -20,6 +31,9 @@ class LLMHolder:
         if cls._instance is None:
             cls._instance = super(LLMHolder, cls).__new__(cls)
             cls._instance._llm = None
+            cls._instance._configured = {}
+            cls._instance._routed = {}
+            cls._instance.router = LLMRouter()
         return cls._instance
 
     @property
@@ -28,6 +42,35 @@ class LLMHolder:
 
     @llm.setter
     def llm(self, new_llm: BaseLLM):
-        self._llm = new_llm
+        if new_llm is None:
+            self._configured = {}
+            self._routed = {}
+            self._llm = None
+            return
+        self.add(new_llm)
+
+    def add(self, new_llm: BaseLLM, primary: bool = True):
+        key = (new_llm.config.provider, new_llm.config.model)
+        others = {k: v for k, v in self._configured.items() if k != key}
+        if primary or not others:
+            self._configured = {key: new_llm, **others}
+        else:
+            self._configured = {**others, key: new_llm}
+        self._routed = {}
+        self._llm = ResilientLLM(list(self._configured.values()))
+
+    def llm_for(self, task: str) -> Optional[BaseLLM]:
+        if self._llm is None:
+            return None
+        llms = self.router.order(task, list(self._configured.values()))
+        key = tuple((llm.config.provider, llm.config.model) for llm in llms)
+        routed = self._routed.get(key)
+        if routed is None:
+            routed = self._routed[key] = ResilientLLM(llms)
+        return PooledLLM(routed, self.router.pool(task))
+
+    @property
+    def configured_llms(self) -> List[BaseLLM]:
+        return list(self._configured.values())
 
-llm_holder = LLMHolder()
\ No newline at end of file
+llm_holder = LLMHolder()
@@ -0,0 +1,125 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from utils.data_cache import cached_get_schema, cached_get_summary
+from utils.utilities import get_dataset_version
+from utils.token_counter import count_tokens
+from utils.constants import PROMPT_CONTEXT_TOKEN_BUDGET, PROMPT_CONTEXT_SAMPLE_VALUES
+
+STAT_KEYS = ("mean", "std", "min", "max")
+MAX_CELL_CHARS = 24
+
+
+def _format_value(value: Any) -> str:
+    """
+    Formats a schema or summary value compactly for a pipe-delimited prompt table.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    text = str(value).replace("|", "/").replace("\n", " ")
+    if len(text) > MAX_CELL_CHARS:
+        text = text[:MAX_CELL_CHARS - 1] + "…"
+    return text
+
+
+def _render_row(column: str, schema: Dict[str, Any], summary: Dict[str, Any], sample_count: int) -> str:
+    dtypes = schema.get("dtypes", {})
+    non_null = schema.get("non_null_counts", {})
+    stats = summary.get(column, {})
+    samples = (schema.get("sample_values", {}).get(column) or [])[:sample_count]
+    cells = [column, dtypes.get(column, ""), _format_value(non_null.get(column))]
+    cells += [_format_value(stats.get(key)) for key in STAT_KEYS]
+    cells.append(", ".join(_format_value(v) for v in samples))
+    return " | ".join(cells)
+
+
+def _render_table(columns: List[str], schema: Dict[str, Any], summary: Dict[str, Any], sample_count: int, total_columns: int) -> str:
+    row_count = max((v for v in schema.get("non_null_counts", {}).values() if isinstance(v, (int, float))), default=0)
+    lines = [
+        f"{total_columns} columns, {int(row_count)} rows.",
+        "column | dtype | non-null | mean | std | min | max | sample values",
+    ]
+    lines += [_render_row(column, schema, summary, sample_count) for column in columns]
+    omitted = total_columns - len(columns)
+    if omitted > 0:
+        lines.append(f"({omitted} more columns not shown)")
+    return "\n".join(lines)
+
+
+def render_dataset_context(schema: Dict[str, Any], summary: Dict[str, Any], columns: Optional[List[str]] = None,
+                           token_budget: int = PROMPT_CONTEXT_TOKEN_BUDGET, provider: str = None) -> str:
+    """
+    Renders the schema and summary as one compact table that fits a token budget.
+
+    Columns are kept in the given priority order. To fit the budget, sample values are trimmed first
+    and then the lowest-priority columns are dropped.
+
+    Args:
+        schema (Dict[str, Any]): The dataset schema as returned by the /schema endpoint.
+        summary (Dict[str, Any]): The dataset summary as returned by the /summary endpoint.
+        columns (Optional[List[str]], optional): Columns in priority order. Defaults to all schema columns.
+        token_budget (int, optional): Maximum tokens for the rendered context. Defaults to PROMPT_CONTEXT_TOKEN_BUDGET.
+        provider (str, optional): LLM provider used for token counting. Defaults to None.
+
+    Returns:
+        str: The rendered dataset context.
+    """
+    all_columns = schema.get("columns", [])
+    columns = [c for c in (columns or all_columns) if c in schema.get("dtypes", {})] or list(all_columns)
+    total_columns = len(all_columns)
+
+    for sample_count in sorted({PROMPT_CONTEXT_SAMPLE_VALUES, 1, 0}, reverse=True):
+        text = _render_table(columns, schema, summary, sample_count, total_columns)
+        if count_tokens(text, provider) <= token_budget:
+            return text
+
+    low, high = 0, len(columns)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(_render_table(columns[:middle], schema, summary, 0, total_columns), provider) <= token_budget:
+            low = middle
+        else:
+            high = middle - 1
+    return _render_table(columns[:low], schema, summary, 0, total_columns)
+
+
+def render_sample_rows(records: List[Dict[str, Any]], columns: List[str], max_rows: int = 10) -> str:
+    """
+    Renders sample records as a compact pipe-delimited table restricted to the given columns.
+
+    Args:
+        records (List[Dict[str, Any]]): Sample rows as returned by the /sample endpoint.
+        columns (List[str]): Columns to include, in display order.
+        max_rows (int, optional): Maximum number of rows to render. Defaults to 10.
+
+    Returns:
+        str: The rendered table, or an empty string when there are no records.
+    """
+    if not records or not columns:
+        return ""
+    lines = [" | ".join(columns)]
+    lines += [" | ".join(_format_value(record.get(column)) for column in columns) for record in records[:max_rows]]
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=128)
+def _cached_dataset_context(dataset_version: str, provider: str, columns: Optional[Tuple[str, ...]], token_budget: int) -> str:
+    return render_dataset_context(cached_get_schema(), cached_get_summary(), list(columns) if columns else None,
+                                  token_budget, provider)
+
+
+def build_dataset_context(columns: Optional[List[str]] = None, token_budget: int = PROMPT_CONTEXT_TOKEN_BUDGET,
+                          provider: str = None) -> str:
+    """
+    Returns the compact dataset context for the loaded dataset, cached per dataset version.
+
+    Args:
+        columns (Optional[List[str]], optional): Columns in priority order. Defaults to all columns.
+        token_budget (int, optional): Maximum tokens for the context. Defaults to PROMPT_CONTEXT_TOKEN_BUDGET.
+        provider (str, optional): LLM provider used for token counting. Defaults to None.
+
+    Returns:
+        str: The rendered dataset context.
+    """
+    return _cached_dataset_context(get_dataset_version(), provider, tuple(columns) if columns else None, token_budget)
@@ -0,0 +1,173 @@
+import pandas as pd
+from typing import Optional, Union
+from .constants import RESAMPLE_MAX_BUCKETS
+
+try:
+    import cudf
+except ImportError:
+    cudf = None
+
+NUMERIC_TYPES = ['float64', 'float32', 'int64', 'int32']
+CATEGORICAL_TYPES = ['object', 'string']
+DATETIME_TYPES = ['datetime64', 'datetime64[ns]']
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_DAY = 86_400 * NS_PER_SECOND
+# 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday.
+EPOCH_WEEKDAY = 3
+
+# Approximate bucket widths in seconds, used to pick a granularity and to estimate bucket counts.
+GRANULARITIES = {
+    "hour": 3_600,
+    "day": 86_400,
+    "week": 7 * 86_400,
+    "month": 30 * 86_400,
+}
+
+Frame = Union[pd.DataFrame, "cudf.DataFrame"]
+
+
+def _backend(df: Frame):
+    return cudf if cudf is not None and isinstance(df, cudf.DataFrame) else pd
+
+
+def infer_frequency(timestamps) -> Optional[float]:
+    """
+    Infers the sampling interval of a timestamp column from the median gap between distinct timestamps.
+
+    Unlike `.dt.seconds`, which drops the day component of a timedelta, this works on whole
+    nanosecond gaps, so daily and weekly data are recognised correctly.
+
+    Args:
+        timestamps (Series): A datetime64 column (pandas or cuDF).
+
+    Returns:
+        Optional[float]: The typical interval in seconds, or None if there are fewer than two distinct timestamps.
+    """
+    nanoseconds = timestamps.dropna().astype('datetime64[ns]').astype('int64').drop_duplicates().sort_values()
+    gaps = nanoseconds.diff().dropna()
+    gaps = gaps[gaps > 0]
+    if len(gaps) == 0:
+        return None
+    return float(gaps.median()) / NS_PER_SECOND
+
+
+def choose_granularity(step_seconds: Optional[float], span_seconds: float, max_buckets: int = RESAMPLE_MAX_BUCKETS) -> Optional[str]:
+    """
+    Picks the finest granularity that is coarser than the data and keeps the bucket count under max_buckets.
+
+    Args:
+        step_seconds (Optional[float]): The data's sampling interval in seconds.
+        span_seconds (float): Seconds between the first and last timestamp.
+        max_buckets (int, optional): Maximum number of buckets. Defaults to RESAMPLE_MAX_BUCKETS.
+
+    Returns:
+        Optional[str]: 'hour', 'day', 'week' or 'month', or None if the data is already coarse enough.
+    """
+    if step_seconds is None:
+        return None
+    for granularity, width in GRANULARITIES.items():
+        if width > step_seconds and span_seconds / width <= max_buckets:
+            return granularity
+        if width >= step_seconds and span_seconds / width <= max_buckets:
+            return None
+    return "month" if GRANULARITIES["month"] > step_seconds else None
+
+
+def _bucket_keys(nanoseconds, granularity: str):
+    """
+    Maps int64 nanosecond timestamps to consecutive integer bucket numbers using column arithmetic only.
+    """
+    if granularity == "hour":
+        return nanoseconds // (3_600 * NS_PER_SECOND)
+    days = nanoseconds // NS_PER_DAY
+    if granularity == "day":
+        return days
+    if granularity == "week":
+        return (days + EPOCH_WEEKDAY) // 7
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+
+def _bucket_starts(keys, granularity: str):
+    if granularity == "hour":
+        nanoseconds = keys * (3_600 * NS_PER_SECOND)
+    elif granularity == "day":
+        nanoseconds = keys * NS_PER_DAY
+    else:
+        nanoseconds = (keys * 7 - EPOCH_WEEKDAY) * NS_PER_DAY
+    return nanoseconds.astype('datetime64[ns]')
+
+
+def resample_frame(df: Frame, time_column: Optional[str] = None, granularity: Optional[str] = None,
+                   max_buckets: int = RESAMPLE_MAX_BUCKETS) -> Frame:
+    """
+    Resamples a frame onto a regular time grid in its own backend (cuDF or pandas).
+
+    Numeric columns are averaged and rounded to two decimals, and categorical and other columns keep
+    the last value in each bucket, all in a single grouped aggregation. Empty buckets between the first
+    and last timestamp are kept as missing values so gaps stay visible. Frames that are already at or
+    coarser than the chosen granularity are only sorted.
+
+    Args:
+        df (Frame): The frame to resample.
+        time_column (Optional[str], optional): The datetime column to resample on. Defaults to the first datetime column.
+        granularity (Optional[str], optional): 'hour', 'day', 'week' or 'month'. Defaults to an inferred granularity.
+        max_buckets (int, optional): Upper bound on buckets when inferring the granularity. Defaults to RESAMPLE_MAX_BUCKETS.
+
+    Returns:
+        Frame: The resampled frame, with the time column first.
+
+    Raises:
+        ValueError: If the frame has no datetime column or the granularity is unknown.
+    """
+    xp = _backend(df)
+    if time_column is None:
+        datetime_cols = df.select_dtypes(include=DATETIME_TYPES).columns.tolist()
+        if not datetime_cols:
+            raise ValueError("No datetime columns found in the DataFrame")
+        time_column = datetime_cols[0]
+    if granularity is not None and granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}. Use one of {', '.join(GRANULARITIES)}.")
+
+    df = df[df[time_column].notna()]
+    if len(df) == 0:
+        return df
+    nanoseconds = df[time_column].astype('datetime64[ns]').astype('int64')
+    if granularity is None:
+        span = float(nanoseconds.max() - nanoseconds.min()) / NS_PER_SECOND
+        granularity = choose_granularity(infer_frequency(df[time_column]), span, max_buckets)
+        if granularity is None:
+            return df.sort_values(by=time_column).reset_index(drop=True)
+
+    if granularity == "month":
+        timestamps = df[time_column]
+        keys = (timestamps.dt.year - 1970) * 12 + (timestamps.dt.month - 1)
+    else:
+        keys = _bucket_keys(nanoseconds, granularity)
+
+    numeric_cols = [c for c in df.select_dtypes(include=NUMERIC_TYPES).columns if c != time_column]
+    other_cols = [c for c in df.columns if c != time_column and c not in numeric_cols]
+    aggregations = {**{c: 'mean' for c in numeric_cols}, **{c: 'last' for c in other_cols}}
+
+    ordered = df.drop(columns=[time_column]).assign(_bucket=keys.astype('int64'))
+    ordered = ordered.assign(_order=nanoseconds).sort_values(by='_order').drop(columns=['_order'])
+    if aggregations:
+        grouped = ordered.groupby('_bucket', sort=True).agg(aggregations)
+    else:
+        grouped = xp.DataFrame(index=ordered['_bucket'].drop_duplicates().sort_values())
+
+    first, last = int(grouped.index.min()), int(grouped.index.max())
+    full_range = xp.Series(range(first, last + 1), dtype='int64')
+    grouped = grouped.reindex(full_range)
+
+    if granularity == "month":
+        starts = xp.to_datetime(xp.DataFrame({"year": full_range // 12 + 1970, "month": full_range % 12 + 1, "day": 1}))
+    else:
+        starts = _bucket_starts(full_range, granularity)
+
+    result = grouped.reset_index(drop=True)
+    for column in numeric_cols:
+        if result[column].dtype in ['float64', 'float32']:
+            result[column] = result[column].round(2)
+    result.insert(0, time_column, starts.reset_index(drop=True))
+    return result[[time_column] + [c for c in df.columns if c != time_column]]
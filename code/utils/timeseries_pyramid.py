@@ -0,0 +1,342 @@
+import logging
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from .cache_config import cache
+from .constants import (TIMESERIES_PYRAMID_KEY, PYRAMID_BASE_BUCKETS, PYRAMID_FACTOR, PYRAMID_MIN_ROWS,
+                        PYRAMID_MAX_SERIES, PYRAMID_FIGURE_MAX_POINTS)
+
+logger = logging.getLogger('timeseries_pyramid')
+
+NUMERIC_TYPES = ['float64', 'float32', 'int64', 'int32']
+DATETIME_TYPES = ['datetime64', 'datetime64[ns]']
+DECIMATION_METHODS = ("minmax", "lttb")
+
+
+class PyramidLevel(NamedTuple):
+    """
+    One resolution of a series pyramid: fixed-width time buckets with their min, max and mean.
+
+    Empty buckets have a count of zero, a minimum of +inf and a maximum of -inf.
+
+    Attributes:
+        width (int): Bucket width in nanoseconds.
+        minimum (np.ndarray): Smallest value per bucket.
+        maximum (np.ndarray): Largest value per bucket.
+        total (np.ndarray): Sum of values per bucket, for means.
+        count (np.ndarray): Number of values per bucket.
+        min_time (np.ndarray): Timestamp (ns) of each bucket's minimum.
+        max_time (np.ndarray): Timestamp (ns) of each bucket's maximum.
+    """
+    width: int
+    minimum: np.ndarray
+    maximum: np.ndarray
+    total: np.ndarray
+    count: np.ndarray
+    min_time: np.ndarray
+    max_time: np.ndarray
+
+
+def _base_level(times: np.ndarray, values: np.ndarray, start: int, width: int, buckets: int) -> PyramidLevel:
+    """
+    Buckets time-sorted points into the finest pyramid level.
+    """
+    index = ((times - start) // width).astype(np.int64)
+    order = np.lexsort((values, index))
+    first = np.flatnonzero(np.r_[True, index[order][1:] != index[order][:-1]])
+    last = np.r_[first[1:] - 1, len(order) - 1]
+    occupied = index[order][first]
+
+    minimum = np.full(buckets, np.inf)
+    maximum = np.full(buckets, -np.inf)
+    min_time = np.zeros(buckets, dtype=times.dtype)
+    max_time = np.zeros(buckets, dtype=times.dtype)
+    minimum[occupied] = values[order][first]
+    maximum[occupied] = values[order][last]
+    min_time[occupied] = times[order][first]
+    max_time[occupied] = times[order][last]
+    total = np.bincount(index, weights=values, minlength=buckets)
+    count = np.bincount(index, minlength=buckets)
+    return PyramidLevel(width, minimum, maximum, total, count, min_time, max_time)
+
+
+def _coarsen(level: PyramidLevel, factor: int) -> PyramidLevel:
+    """
+    Merges every `factor` neighbouring buckets of a level into one.
+    """
+    pad = (-len(level.count)) % factor
+
+    def grouped(array, fill):
+        return np.concatenate([array, np.full(pad, fill, dtype=array.dtype)]).reshape(-1, factor)
+
+    minimum, maximum = grouped(level.minimum, np.inf), grouped(level.maximum, -np.inf)
+    rows = np.arange(len(minimum))
+    low, high = minimum.argmin(axis=1), maximum.argmax(axis=1)
+    return PyramidLevel(
+        level.width * factor,
+        minimum[rows, low],
+        maximum[rows, high],
+        grouped(level.total, 0.0).sum(axis=1),
+        grouped(level.count, 0).sum(axis=1),
+        grouped(level.min_time, 0)[rows, low],
+        grouped(level.max_time, 0)[rows, high],
+    )
+
+
+def _interleave(level: PyramidLevel, lo: int, hi: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Emits each non-empty bucket's minimum and maximum in time order.
+    """
+    occupied = lo + np.flatnonzero(level.count[lo:hi])
+    if len(occupied) == 0:
+        return level.min_time[:0], level.minimum[:0]
+    min_first = level.min_time[occupied] <= level.max_time[occupied]
+    first_time = np.where(min_first, level.min_time[occupied], level.max_time[occupied])
+    second_time = np.where(min_first, level.max_time[occupied], level.min_time[occupied])
+    first_value = np.where(min_first, level.minimum[occupied], level.maximum[occupied])
+    second_value = np.where(min_first, level.maximum[occupied], level.minimum[occupied])
+    times = np.column_stack([first_time, second_time]).ravel()
+    values = np.column_stack([first_value, second_value]).ravel()
+    # A bucket holding a single point reports it as both minimum and maximum.
+    keep = np.r_[True, (times[1:] != times[:-1]) | (values[1:] != values[:-1])]
+    return times[keep], values[keep]
+
+
+def lttb(times: np.ndarray, values: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Args:
+        times (np.ndarray): Sorted x values (int64 ns or floats).
+        values (np.ndarray): y values.
+        threshold (int): Number of points to keep.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The selected points.
+    """
+    n = len(times)
+    if threshold >= n or threshold < 3:
+        return times, values
+    x = times.astype(np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        next_x, next_y = x[next_lo:next_hi].mean(), values[next_lo:next_hi].mean()
+        area = np.abs((x[previous] - next_x) * (values[lo:hi] - values[previous])
+                      - (x[previous] - x[lo:hi]) * (next_y - values[previous]))
+        previous = lo + int(area.argmax())
+        selected[i + 1] = previous
+    return times[selected], values[selected]
+
+
+class SeriesPyramid:
+    """
+    A multi-resolution min/max/mean summary of one time series.
+
+    The finest level splits the series' time span into PYRAMID_BASE_BUCKETS equal buckets; each
+    coarser level merges PYRAMID_FACTOR neighbours. A query picks the finest level that gives at
+    most one bucket per pixel over the requested range, so the points returned stay proportional to
+    the plot width while every bucket's extremes (and therefore every peak) are kept.
+
+    Attributes:
+        start (int): First timestamp in nanoseconds (or first x value for numeric series).
+        end (int): Last timestamp in nanoseconds (or last x value for numeric series).
+        rows (int): Number of points summarised.
+        levels (List[PyramidLevel]): Levels from finest to coarsest.
+
+    Methods:
+        count(start, end) -> int:
+            Returns the number of raw points in a time range.
+        query(start, end, width, method) -> Tuple[np.ndarray, np.ndarray, int]:
+            Returns decimated (times, values) for a range and the level used.
+    """
+    def __init__(self, times: np.ndarray, values: np.ndarray, base_buckets: int = PYRAMID_BASE_BUCKETS,
+                 factor: int = PYRAMID_FACTOR):
+        mask = ~np.isnan(values)
+        times, values = times[mask], values[mask].astype(np.float64)
+        order = np.argsort(times, kind="stable")
+        times, values = times[order], values[order]
+        self.rows = len(times)
+        self.start = times[0] if self.rows else 0
+        self.end = times[-1] if self.rows else 0
+        if np.issubdtype(times.dtype, np.integer):
+            width = max(1, -(-(int(self.end) - int(self.start) + 1) // base_buckets))
+        else:
+            width = float(self.end - self.start) / base_buckets or 1.0
+        buckets = int((self.end - self.start) // width) + 1
+        self.levels: List[PyramidLevel] = [_base_level(times, values, self.start, width, buckets)] if self.rows else []
+        while self.levels and len(self.levels[-1].count) > factor:
+            self.levels.append(_coarsen(self.levels[-1], factor))
+
+    def _bucket_range(self, level: PyramidLevel, start: int, end: int) -> Tuple[int, int]:
+        lo = max(0, int((start - self.start) // level.width))
+        hi = min(len(level.count), int((end - self.start) // level.width) + 1)
+        return int(lo), int(max(lo, hi))
+
+    def count(self, start: Optional[int] = None, end: Optional[int] = None) -> int:
+        if not self.levels:
+            return 0
+        lo, hi = self._bucket_range(self.levels[0], self.start if start is None else start, self.end if end is None else end)
+        return int(self.levels[0].count[lo:hi].sum())
+
+    def query(self, start: Optional[int] = None, end: Optional[int] = None, width: int = 1000,
+              method: str = "minmax") -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Returns a decimated view of the series over a time range.
+
+        Args:
+            start (Optional[int], optional): Range start in nanoseconds. Defaults to the first timestamp.
+            end (Optional[int], optional): Range end in nanoseconds. Defaults to the last timestamp.
+            width (int, optional): Plot width in pixels. Defaults to 1000.
+            method (str, optional): 'minmax' keeps each bucket's extremes (about 2 points per pixel);
+                'lttb' runs Largest-Triangle-Three-Buckets over those extremes down to one point per pixel.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, int]: Times (ns), values and the pyramid level used.
+        """
+        if method not in DECIMATION_METHODS:
+            raise ValueError(f"Unsupported decimation method: {method}. Use one of {', '.join(DECIMATION_METHODS)}.")
+        if not self.levels:
+            return np.array([], dtype=np.int64), np.array([]), 0
+        start = self.start if start is None else start
+        end = self.end if end is None else end
+        for index, level in enumerate(self.levels):
+            lo, hi = self._bucket_range(level, start, end)
+            if hi - lo <= width or index == len(self.levels) - 1:
+                break
+        times, values = _interleave(level, lo, hi)
+        inside = (times >= start) & (times <= end)
+        times, values = times[inside], values[inside]
+        if method == "lttb":
+            times, values = lttb(times, values, width)
+        return times, values, index
+
+
+def decimate_points(times: np.ndarray, values: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Min-max decimates one sorted series to at most about max_points points.
+
+    Args:
+        times (np.ndarray): Sorted x values as int64 nanoseconds or numbers.
+        values (np.ndarray): y values.
+        max_points (int): Target number of points.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The decimated series.
+    """
+    if len(times) <= max_points:
+        return times, values
+    pyramid = SeriesPyramid(times, values, base_buckets=max(1, max_points // 2))
+    decimated_times, decimated_values, _ = pyramid.query(width=max(1, max_points // 2))
+    return decimated_times, decimated_values
+
+
+def build_timeseries_pyramids(df, dataset_version: str, max_series: int = PYRAMID_MAX_SERIES) -> Dict[Tuple[str, str], SeriesPyramid]:
+    """
+    Builds pyramids for datetime x numeric column pairs of a freshly ingested dataset and stores them.
+
+    Small datasets are skipped, since their raw points are cheap to plot. Pairs beyond max_series are
+    built on first request.
+
+    Args:
+        df (cudf.DataFrame): The ingested dataset.
+        dataset_version (str): The dataset's version, stored with the pyramids so they are never served for another dataset.
+        max_series (int, optional): Maximum number of pairs to build up front. Defaults to PYRAMID_MAX_SERIES.
+
+    Returns:
+        Dict[Tuple[str, str], SeriesPyramid]: Pyramids keyed by (datetime column, numeric column).
+    """
+    pyramids = {}
+    if len(df) > PYRAMID_MIN_ROWS:
+        datetime_cols = df.select_dtypes(include=DATETIME_TYPES).columns.tolist()
+        numeric_cols = df.select_dtypes(include=NUMERIC_TYPES).columns.tolist()
+        start = time.perf_counter()
+        for x in datetime_cols:
+            for y in numeric_cols:
+                if len(pyramids) >= max_series:
+                    break
+                pyramids[(x, y)] = build_series_pyramid(df, x, y)
+        logger.info(f"Built {len(pyramids)} time-series pyramids in {time.perf_counter() - start:.3f}s")
+    cache.set(TIMESERIES_PYRAMID_KEY, {"dataset_version": dataset_version, "pyramids": pyramids})
+    return pyramids
+
+
+def build_series_pyramid(df, x: str, y: str) -> SeriesPyramid:
+    pair = df[[x, y]].dropna()
+    times = pair[x].astype('datetime64[ns]').astype('int64').to_numpy()
+    values = pair[y].astype('float64').to_numpy()
+    return SeriesPyramid(times, values)
+
+
+_lock = threading.Lock()
+_loaded: Dict[str, Dict[Tuple[str, str], SeriesPyramid]] = {}
+
+
+def get_series_pyramid(x: str, y: str, dataset_version: str, df=None) -> Optional[SeriesPyramid]:
+    """
+    Returns the pyramid for a (datetime, numeric) column pair, loading stored pyramids once per
+    dataset version and building missing pairs from df when it is given.
+
+    Args:
+        x (str): The datetime column.
+        y (str): The numeric column.
+        dataset_version (str): The loaded dataset's version.
+        df (cudf.DataFrame, optional): The dataset, used to build a pyramid that was not built at ingest. Defaults to None.
+
+    Returns:
+        Optional[SeriesPyramid]: The pyramid, or None if it is not available.
+    """
+    with _lock:
+        pyramids = _loaded.get(dataset_version)
+        if pyramids is None:
+            stored = cache.get(TIMESERIES_PYRAMID_KEY) or {}
+            if stored.get("dataset_version") == dataset_version:
+                pyramids = dict(stored["pyramids"])
+                _loaded.clear()
+                _loaded[dataset_version] = pyramids
+            else:
+                # The stored pyramids belong to another dataset, e.g. while a new upload is still
+                # building its own. Nothing is kept, so the new pyramids are loaded once they are stored.
+                pyramids = {}
+        pyramid = pyramids.get((x, y))
+        if pyramid is None and df is not None and len(df) > PYRAMID_MIN_ROWS:
+            pyramid = pyramids[(x, y)] = build_series_pyramid(df, x, y)
+        return pyramid
+
+
+def decimate_figure(figure, max_points: int = PYRAMID_FIGURE_MAX_POINTS):
+    """
+    Min-max decimates long line traces of a plotly figure in place.
+
+    Only line traces with sorted x values are touched; marker-only scatter traces are left alone
+    because dropping their points changes what they show.
+
+    Args:
+        figure (go.Figure): The figure to decimate.
+        max_points (int, optional): Maximum points per trace. Defaults to PYRAMID_FIGURE_MAX_POINTS.
+
+    Returns:
+        go.Figure: The same figure.
+    """
+    for trace in figure.data:
+        if trace.type not in ("scatter", "scattergl") or "lines" not in (trace.mode or "lines"):
+            continue
+        if trace.x is None or trace.y is None or len(trace.x) <= max_points:
+            continue
+        try:
+            x = np.asarray(trace.x)
+            is_datetime = not np.issubdtype(x.dtype, np.number)
+            times = x.astype('datetime64[ns]').astype(np.int64) if is_datetime else x.astype(np.float64)
+            if np.any(np.diff(times) < 0):
+                continue
+            times, values = decimate_points(times, np.asarray(trace.y, dtype=np.float64), max_points)
+            trace.x = times.astype('datetime64[ns]') if is_datetime else times
+            trace.y = values
+        except (TypeError, ValueError):
+            continue
+    return figure
@@ -0,0 +1,43 @@
+import math
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Providers served through OpenAI-compatible endpoints are counted with a BPE encoding;
+# the others fall back to a characters-per-token estimate.
+TIKTOKEN_PROVIDERS = {"nvidia", "huggingface-openai"}
+CHARS_PER_TOKEN = {"gemini": 4.0}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+
+@lru_cache(maxsize=None)
+def _get_encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, provider: str = None) -> int:
+    """
+    Counts the tokens in a piece of text for the given provider.
+
+    Args:
+        text (str): The text to count.
+        provider (str, optional): The LLM provider key, e.g. 'nvidia' or 'gemini'. Defaults to None.
+
+    Returns:
+        int: The token count, exact when a tokenizer is available for the provider and estimated otherwise.
+    """
+    if not text:
+        return 0
+    if provider in TIKTOKEN_PROVIDERS:
+        encoding = _get_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN.get(provider, DEFAULT_CHARS_PER_TOKEN))
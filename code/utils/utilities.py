@@ -5,11 +5,11 @@ import io
 import base64
 import requests
 import cudf
-import pandas as pd
-from .constants import BASE_URL
+from .constants import BASE_URL, DATASET_VERSION_KEY
 import asyncio
 from .formatting_utilities import parse_markdown_table
 from .cache_config import cache
+from .resampling import resample_frame
 from fastapi import HTTPException
 from typing import Dict, Any
 from concurrent.futures import ThreadPoolExecutor
@@ -29,6 +29,15 @@ def get_dataframe() -> cudf.DataFrame:
         raise HTTPException(status_code=400, detail="No data loaded")
     return df
 
+def get_dataset_version():
+    """
+    Returns the version id of the currently loaded dataset, or None if nothing is loaded.
+
+    The version is a content hash set at upload time, so anything derived from the data can be
+    cached under it and is invalidated automatically when a different file is loaded.
+    """
+    return cache.get(DATASET_VERSION_KEY)
+
 def extract_table_from_content(content):
     table_data = None
     elements = extract_content(content)
@@ -69,53 +78,18 @@ def run_async(coroutine):
     finally:
         loop.close()
         
-def resample_df(df):
-    datetime_cols = df.select_dtypes(include=['datetime64', 'datetime64[ns]']).columns.tolist()
-    
-    if not datetime_cols:
-        raise ValueError("No datetime columns found in the DataFrame")
-
-    resampled_dfs = []
-
-    for col in datetime_cols:
-        freq = df[col].diff().dt.seconds.mode().values[0] / 60
-                      
-        if freq < 1440:
-            numeric_cols = df.select_dtypes(include=['float64', 'float32', 'int64', 'int32']).columns.tolist()
-            agg_dict = {colu: 'mean' for colu in numeric_cols if colu != col}
-            
-            for colu in agg_dict.keys():
-                if colu not in df.columns:
-                    raise ValueError(f"Column '{colu}' specified in aggregation dictionary not found in the DataFrame")
-
-            categorical_cols = df.select_dtypes(include=['object', 'string']).columns.tolist()
-            df_pandas = df.to_pandas() 
-            for cat_col in categorical_cols:
-                df_pandas[cat_col] = df_pandas[cat_col].ffill()
-
-      
-            df = cudf.DataFrame.from_pandas(df_pandas)  
-            df = df.set_index(col)
-            
-            resampled = df.resample('D').agg(agg_dict).reset_index()
-
-            for colu in resampled.columns:
-                if resampled[colu].dtype in ['float64', 'float32']:
-                    resampled[colu] = resampled[colu].round(2)
-
-            resampled_pandas = resampled.to_pandas()
-            for cat_col in categorical_cols:
-                resampled_pandas[cat_col] = df_pandas[cat_col].reindex(resampled_pandas.index, method='ffill')
-            
-            resampled_dfs.append(resampled_pandas)
-
-    if not resampled_dfs:
-        raise ValueError("No columns met the frequency condition for resampling")
-    
-    final_resampled_df = pd.concat(resampled_dfs, axis=1)
-    
-    final_resampled_df = cudf.DataFrame.from_pandas(final_resampled_df)
-    return final_resampled_df
+def resample_df(df: cudf.DataFrame, granularity: str = None) -> cudf.DataFrame:
+    """
+    Resamples a time-series frame onto a regular grid without leaving its columnar backend.
+
+    Args:
+        df (cudf.DataFrame): The frame to resample; its first datetime column is used as the time axis.
+        granularity (str, optional): 'hour', 'day', 'week' or 'month'. Defaults to a granularity inferred from the data.
+
+    Returns:
+        cudf.DataFrame: The resampled frame.
+    """
+    return resample_frame(df, granularity=granularity)
 
 def sample_data(df: cudf.DataFrame, max_samples: int = 10000):
     if len(df) > max_samples:
@@ -192,34 +166,106 @@ def create_default_structure(content):
         ]
     }
     
+MARKDOWN_FENCE_OPENERS = ("```markdown", "```shell")
+TABLE_SEPARATOR_CHARS = frozenset("-:| \t")
+
+
+def _is_separator_row(line: str) -> bool:
+    stripped = line.strip()
+    return '|' in stripped and '-' in stripped and set(stripped) <= TABLE_SEPARATOR_CHARS
+
+
+def _match_table(lines, start: int):
+    """
+    Matches a pipe table starting at `start`.
+
+    A table is a header row with a pipe followed by rows with pipes. Without a leading pipe on the
+    header, one or more separator rows (e.g. `---|---`) must come directly after it, as in GitHub markdown.
+
+    Returns:
+        tuple: (end, resume) where lines[start:end] is the table, or end is None if there is none.
+               Scanning can resume at `resume`, which skips separator rows that cannot start a table either.
+    """
+    header = lines[start]
+    end = start + 1
+    leading_pipe = header.lstrip().startswith('|')
+    if leading_pipe:
+        if end < len(lines) and _is_separator_row(lines[end]):
+            end += 1
+    else:
+        if end >= len(lines) or not _is_separator_row(lines[end]):
+            return None, start + 1
+        while end < len(lines) and _is_separator_row(lines[end]):
+            end += 1
+    rows = end
+    while end < len(lines) and '|' in lines[end] and lines[end].strip():
+        end += 1
+    if end > rows or (leading_pipe and end > start + 1):
+        return end, end
+    return None, max(rows, start + 1)
+
+
+def _split_tables(lines):
+    """
+    Splits lines into ('text', str) and ('table', str) elements in one pass.
+    """
+    elements, text_start, index = [], 0, 0
+    while index < len(lines):
+        if '|' not in lines[index]:
+            index += 1
+            continue
+        end, resume = _match_table(lines, index)
+        if end is not None:
+            text = '\n'.join(lines[text_start:index]).strip()
+            if text:
+                elements.append(('text', text))
+            elements.append(('table', '\n'.join(lines[index:end]).strip()))
+            text_start = end
+        index = resume
+    text = '\n'.join(lines[text_start:]).strip()
+    if text:
+        elements.append(('text', text))
+    return elements
+
+
 def extract_content(content):
+    """
+    Splits LLM markdown into text, table and code elements with a single line-based pass.
+
+    ```markdown fences (optionally opened as ```shell followed by a `markdown` line) become a 'table'
+    element if they contain a pipe table and a 'code' element otherwise. Outside those fences, pipe tables
+    with or without leading and trailing pipes become 'table' elements, and everything else is 'text'.
+    Each line is looked at a bounded number of times, so the cost is linear in the input.
+
+    Args:
+        content (str): The markdown content.
+
+    Returns:
+        list: (element_type, text) tuples in document order, with element_type 'text', 'table' or 'code'.
+    """
     elements = []
-    
-    # Pattern for code blocks (including nested ones and those with shell markdown)
-    code_pattern = r'```(?:shell\s*\n)?markdown\n([\s\S]*?)```'
-    
-    # Pattern for tables (now including those without leading/trailing pipes)
-    table_pattern = r'(\|[^\n]+\|(?:\n\|[-:| ]+\|)?(?:\n[^\n]+\|)+|\n*[^\n\|]+\|[^\n]+(?:\n[-:| ]+\|[-:| ]+)+(?:\n[^\n\|]+\|[^\n]+)+)'
-    
-    # Split content by code blocks first
-    parts = re.split(code_pattern, content)
-    
-    for i, part in enumerate(parts):
-        if i % 2 == 0:  # Not a code block
-            # Extract tables
-            table_parts = re.split(table_pattern, part)
-            for j, table_part in enumerate(table_parts):
-                if j % 2 == 0:  # Not a table
-                    if table_part.strip():
-                        elements.append(('text', table_part.strip()))
-                else:  # Table
-                    elements.append(('table', table_part.strip()))
-        else:  # Code block (potential markdown table)
-            # Check if the code block contains a table
-            table_match = re.search(table_pattern, part)
-            if table_match:
-                elements.append(('table', table_match.group(0).strip()))
-            else:
-                elements.append(('code', part.strip()))
-    
+    lines = content.split('\n')
+    block_start, index = 0, 0
+    while index < len(lines):
+        opener = lines[index].strip()
+        is_fence = opener.startswith(MARKDOWN_FENCE_OPENERS)
+        if is_fence and opener.startswith("```shell"):
+            is_fence = index + 1 < len(lines) and lines[index + 1].strip() == "markdown"
+        if not is_fence:
+            index += 1
+            continue
+
+        body_start = index + (2 if opener.startswith("```shell") else 1)
+        close = body_start
+        while close < len(lines) and "```" not in lines[close]:
+            close += 1
+        if close == len(lines):
+            break
+        elements.extend(_split_tables(lines[block_start:index]))
+        body = lines[body_start:close] + [lines[close].split("```", 1)[0]]
+        tables = [element for element in _split_tables(body) if element[0] == 'table']
+        elements.append(tables[0] if tables else ('code', '\n'.join(body).strip()))
+        lines[close] = lines[close].split("```", 1)[1]
+        block_start = index = close
+    elements.extend(_split_tables(lines[block_start:]))
     return elements